@@ -0,0 +1,144 @@
+"""
+Benchmark the Python side overhead of single VME cycles against a simulated crate.
+
+Usage:
+    python benchmarks/bench_cycles.py [--call-latency SECONDS] [--output FILE]
+
+The results are written as JSON with cycles per second and latency percentiles for
+every benchmark, so runs can be compared to catch regressions.
+"""
+import argparse
+import json
+import sys
+from time import perf_counter
+
+from pyvme import V2718
+from pyvme._controllers import locking
+from pyvme.modules import V6533, V895
+from pyvme.simulation import SimulatedCrate, SimulatedV6533, SimulatedV895
+
+
+V6533_BASE = 0x100000
+V895_BASE = 0x200000
+
+# Channel properties polled per HV channel, measured_current is skipped since it
+# contains a fixed sleep that would dominate the result.
+CHANNEL_PROPERTIES = [
+    "voltage",
+    "measured_voltage",
+    "current_limit",
+    "imon_range",
+    "enabled",
+    "status",
+    "trip_time",
+    "voltage_limit",
+    "ramp_down_rate",
+    "ramp_up_rate",
+    "power_down_mode",
+    "polarity",
+    "temperature",
+]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def measure(func, iterations, cycles_per_call=1):
+    """
+    Time a function call.
+
+    Returns:
+        dict: Call/cycle rates and latency percentiles in microseconds.
+    """
+    func()
+    latencies = []
+    start = perf_counter()
+    for _ in range(iterations):
+        call_start = perf_counter()
+        func()
+        latencies.append(perf_counter() - call_start)
+    total = perf_counter() - start
+    return dict(
+        iterations=iterations,
+        cycles_per_call=cycles_per_call,
+        calls_per_second=iterations / total,
+        cycles_per_second=iterations * cycles_per_call / total,
+        p50_us=percentile(latencies, 0.5) * 1e6,
+        p90_us=percentile(latencies, 0.9) * 1e6,
+        p99_us=percentile(latencies, 0.99) * 1e6,
+        max_us=max(latencies) * 1e6,
+    )
+
+
+def setup(call_latency, cycle_latency):
+    crate = SimulatedCrate(call_latency=call_latency, cycle_latency=cycle_latency)
+    crate.add_module(V6533_BASE, SimulatedV6533())
+    crate.add_module(V895_BASE, SimulatedV895())
+    controller = V2718(backend=crate)
+    return controller, V6533(controller, V6533_BASE), V895(controller, V895_BASE)
+
+
+def run(iterations, call_latency=0.0, cycle_latency=0.0):
+    controller, hv, discriminator = setup(call_latency, cycle_latency)
+    locked_noop = locking(lambda self: None)
+
+    def poll_channels():
+        for channel in hv.channels:
+            for name in CHANNEL_PROPERTIES:
+                getattr(channel, name)
+
+    def configure_discriminator():
+        for channel in range(16):
+            discriminator.set_threshold(channel, 20)
+        discriminator.set_output_width(0, 100)
+        discriminator.set_output_width(1, 100)
+        discriminator.set_majority_threshold(2)
+        discriminator.set_inhibit_pattern(0xFFFF)
+
+    return dict(
+        read=measure(lambda: controller.read(V6533_BASE + 0x50), iterations),
+        write=measure(lambda: controller.write(V6533_BASE + 0x80, 10), iterations),
+        # Read the registers directly, hv.description is served from the identity
+        read_string=measure(
+            lambda: hv.read_string(0x8102, 0x8114), iterations, cycles_per_call=10
+        ),
+        locking=measure(lambda: locked_noop(controller), iterations, 0),
+        v6533_channel_poll=measure(
+            poll_channels,
+            max(iterations // 100, 1),
+            cycles_per_call=len(hv.channels) * len(CHANNEL_PROPERTIES),
+        ),
+        v895_configuration=measure(
+            configure_discriminator, max(iterations // 20, 1), cycles_per_call=20
+        ),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--call-latency", type=float, default=0.0)
+    parser.add_argument("--cycle-latency", type=float, default=0.0)
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = dict(
+        parameters=dict(
+            iterations=args.iterations,
+            call_latency=args.call_latency,
+            cycle_latency=args.cycle_latency,
+        ),
+        benchmarks=run(args.iterations, args.call_latency, args.cycle_latency),
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark the ctypes call overhead of single VME cycles against a C library.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_library.py [--library PATH] [--output FILE]
+
+Without --library the no-op stub in benchmarks/stub is compiled with the system C
+compiler and loaded through `pyvme._controllers.load_library`, so the call path of
+the controllers is measured without hardware. The controllers call the hot path
+functions (`pyvme._bindings.UNCHECKED`) without argument conversion ("unchecked").
+For comparison the same calls are timed through the declared prototypes
+("prototyped"), by hiding the library behind a plain forwarding object.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from pyvme import V2718
+from pyvme._controllers import load_library
+
+from bench_cycles import measure
+
+
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub", "CAENVMEstub.c")
+
+
+def build_stub(directory):
+    """
+    Compile the stub library.
+
+    Returns:
+        str: Path of the shared library.
+    """
+    path = os.path.join(directory, "libCAENVMEstub.so")
+    compiler = os.environ.get("CC", "cc")
+    subprocess.check_call([compiler, "-O2", "-shared", "-fPIC", "-o", path, STUB])
+    return path
+
+
+class Prototyped:
+    """ Forward to a library, the controllers then call the declared prototypes """
+
+    def __init__(self, library):
+        self.library = library
+
+    def __getattr__(self, name):
+        return getattr(self.library, name)
+
+
+def run(library, iterations):
+    controller = V2718(backend=library)
+    buffer = bytearray(256)
+    addresses = [0x100000 + 0x80 * channel + 0x88 for channel in range(6)]
+    return dict(
+        read=measure(lambda: controller.read(0x100050), iterations),
+        write=measure(lambda: controller.write(0x100080, 10), iterations),
+        read_many=measure(lambda: controller.read_many(addresses), iterations, 6),
+        blt_read=measure(lambda: controller.blt_read(0x100000, buffer), iterations),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--library", help="Library to load instead of the stub")
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.library or build_stub(directory)
+        library = load_library(path)
+        benchmarks = dict(
+            unchecked=run(library, args.iterations),
+            prototyped=run(Prototyped(library), args.iterations),
+        )
+    results = dict(
+        parameters=dict(library=args.library or "stub", iterations=args.iterations),
+        benchmarks=benchmarks,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark the aggregate throughput of a ControllerPool over several simulated links.
+
+Usage:
+    python benchmarks/bench_links.py [--links 4] [--call-latency SECONDS]
+
+Every link polls a V6533 snapshot in a loop. With one worker per link the driver
+calls of the links overlap, so the aggregate rate should scale with the number of
+links. Results are printed as JSON.
+"""
+import argparse
+import json
+import sys
+from time import perf_counter
+
+from pyvme import BoardTypes, ControllerPool
+from pyvme.modules import V6533
+from pyvme.simulation import SimulatedBridge, SimulatedCrate, SimulatedV6533
+
+
+V6533_BASE = 0x100000
+
+
+def run(num_links, call_latency, cycle_latency, snapshots):
+    crates = {}
+    for link in range(num_links):
+        crates[link] = SimulatedCrate(call_latency, cycle_latency)
+        crates[link].add_module(V6533_BASE, SimulatedV6533())
+
+    with ControllerPool(backend=SimulatedBridge(crates)) as pool:
+        for link in range(num_links):
+            pool.add(BoardTypes.A3818, link)
+
+        def poll(controller, count=snapshots):
+            module = V6533(controller, V6533_BASE)
+            for _ in range(count):
+                module.snapshot()
+
+        pool.map(lambda controller: poll(controller, 1))
+        start = perf_counter()
+        pool.map(poll)
+        total = perf_counter() - start
+    return dict(
+        links=num_links,
+        snapshots=num_links * snapshots,
+        seconds=total,
+        snapshots_per_second=num_links * snapshots / total,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--links", type=int, default=4)
+    parser.add_argument("--snapshots", type=int, default=200)
+    parser.add_argument("--call-latency", type=float, default=0.001)
+    parser.add_argument("--cycle-latency", type=float, default=0.0)
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = [
+        run(num_links, args.call_latency, args.cycle_latency, args.snapshots)
+        for num_links in range(1, args.links + 1)
+    ]
+    for result in results:
+        result["scaling"] = (
+            result["snapshots_per_second"] / results[0]["snapshots_per_second"]
+        )
+    results = dict(
+        parameters=dict(
+            call_latency=args.call_latency,
+            cycle_latency=args.cycle_latency,
+            snapshots=args.snapshots,
+        ),
+        benchmarks=results,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+/*
+ * No-op stand-in for libCAENVME to measure the Python and ctypes overhead of
+ * pyvme without hardware. Every call succeeds immediately, reads return 0 and
+ * block transfers report the requested size.
+ *
+ * Build: cc -O2 -shared -fPIC -o libCAENVMEstub.so CAENVMEstub.c
+ */
+#include <stdint.h>
+#include <string.h>
+
+#define EXPORT __attribute__((visibility("default")))
+
+EXPORT int CAENVME_Init(int type, short link, short board, int32_t *handle)
+{
+    *handle = 1;
+    return 0;
+}
+
+EXPORT int CAENVME_End(int32_t handle) { return 0; }
+
+EXPORT int CAENVME_BoardFWRelease(int32_t handle, char *release)
+{
+    strcpy(release, "0.0.stub");
+    return 0;
+}
+
+EXPORT int CAENVME_ReadCycle(int32_t handle, uint32_t address, void *data,
+                             int modifier, int width)
+{
+    memset(data, 0, width & 0x0F);
+    return 0;
+}
+
+EXPORT int CAENVME_WriteCycle(int32_t handle, uint32_t address, void *data,
+                              int modifier, int width)
+{
+    return 0;
+}
+
+EXPORT int CAENVME_MultiRead(int32_t handle, uint32_t *addresses, uint32_t *data,
+                             int num_cycles, int *modifiers, int *widths,
+                             int *errors)
+{
+    for (int i = 0; i < num_cycles; i++) {
+        data[i] = 0;
+        errors[i] = 0;
+    }
+    return 0;
+}
+
+EXPORT int CAENVME_MultiWrite(int32_t handle, uint32_t *addresses, uint32_t *data,
+                              int num_cycles, int *modifiers, int *widths,
+                              int *errors)
+{
+    for (int i = 0; i < num_cycles; i++)
+        errors[i] = 0;
+    return 0;
+}
+
+static int block(int size, int *count)
+{
+    *count = size;
+    return 0;
+}
+
+EXPORT int CAENVME_BLTReadCycle(int32_t handle, uint32_t address, void *buffer,
+                                int size, int modifier, int width, int *count)
+{
+    return block(size, count);
+}
+
+EXPORT int CAENVME_MBLTReadCycle(int32_t handle, uint32_t address, void *buffer,
+                                 int size, int modifier, int *count)
+{
+    return block(size, count);
+}
+
+EXPORT int CAENVME_BLTWriteCycle(int32_t handle, uint32_t address, void *buffer,
+                                 int size, int modifier, int width, int *count)
+{
+    return block(size, count);
+}
+
+EXPORT int CAENVME_MBLTWriteCycle(int32_t handle, uint32_t address, void *buffer,
+                                  int size, int modifier, int *count)
+{
+    return block(size, count);
+}
+
+EXPORT int CAENVME_FIFOBLTReadCycle(int32_t handle, uint32_t address, void *buffer,
+                                    int size, int modifier, int width, int *count)
+{
+    return block(size, count);
+}
+
+EXPORT int CAENVME_FIFOMBLTReadCycle(int32_t handle, uint32_t address, void *buffer,
+                                     int size, int modifier, int *count)
+{
+    return block(size, count);
+}
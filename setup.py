@@ -9,4 +9,5 @@ setuptools.setup(
     url="https://github.com/fneuhaus/pyvme",
     packages=setuptools.find_packages(where="src"),
     package_dir={"": "src"},
+    extras_require={"numpy": ["numpy"]},
 )
@@ -2,6 +2,33 @@ from . import modules
 from .vme import VMEModule
 from ._vmetypes import *
 from ._controllers import V2718
+from ._identity import IdentityCache
+from ._irq import IRQDispatcher
+from ._metrics import VMEMetrics
+from ._monitor import HVMonitor
+from ._profiler import VMEProfiler
+from ._pool import ControllerPool
+from ._readout import ReadoutPipeline, read_records
+from ._registry import HandleRegistry, handle_registry
+from ._scan import CrateScanner, ScanResult
+from ._scheduler import LinkScheduler, Priority
 
 
-__all__ = ["V2718", "modules"]
+__all__ = [
+    "V2718",
+    "ControllerPool",
+    "CrateScanner",
+    "HandleRegistry",
+    "HVMonitor",
+    "IdentityCache",
+    "IRQDispatcher",
+    "LinkScheduler",
+    "Priority",
+    "ReadoutPipeline",
+    "ScanResult",
+    "VMEMetrics",
+    "VMEProfiler",
+    "handle_registry",
+    "modules",
+    "read_records",
+]
@@ -0,0 +1,200 @@
+from concurrent.futures import Future
+from .exceptions import BatchError, error_from_code
+from ._vmetypes import AddressModifier, DataWidth
+
+
+class VMEBatch:
+    """
+    Queue of VME cycles that is flushed with as few driver calls as possible.
+
+    Reads and writes return futures which are resolved when the batch is flushed,
+    either explicitly with `flush` or when leaving the context. Consecutive reads
+    and writes are coalesced into multi-cycle calls while keeping their order.
+
+    A cycle failing with a bus error only sets the exception of its future, unless
+    `raise_errors` is set: then `flush` raises a `BatchError` listing the failed
+    cycles once all cycles were executed.
+
+    Args:
+        controller (VMEController): Controller executing the cycles.
+        max_cycles (int): Maximum number of cycles per driver call.
+        raise_errors (bool): Raise a `BatchError` if any cycle failed.
+    """
+
+    MAX_CYCLES = 256
+
+    def __init__(self, controller, max_cycles=MAX_CYCLES, raise_errors=False):
+        self.controller = controller
+        self.max_cycles = max_cycles
+        self.raise_errors = raise_errors
+        self._queue = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        if type_ is None:
+            self.flush()
+        else:
+            self.cancel()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def read(
+        self,
+        address,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        """
+        Queue a read cycle.
+
+        Returns:
+            Future: Resolves to the read value.
+        """
+        future = Future()
+        self._queue.append((False, address, None, width, modifier, future))
+        return future
+
+    def write(
+        self,
+        address,
+        data,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        """
+        Queue a write cycle.
+
+        Returns:
+            Future: Resolves to None once the data has been written.
+        """
+        future = Future()
+        self._queue.append((True, address, int(data), width, modifier, future))
+        return future
+
+    def module(self, module):
+        """
+        Get a view on the batch with addresses relative to a module.
+
+        Args:
+            module (VMEModule): Module whose base address is used.
+        """
+        return ModuleBatch(self, module)
+
+    def cancel(self):
+        """ Drop all queued cycles and cancel their futures """
+        for *_, future in self._queue:
+            future.cancel()
+        self._queue = []
+
+    def flush(self):
+        """
+        Execute all queued cycles.
+
+        Returns:
+            int: Number of driver calls used.
+
+        Raises:
+            BatchError: If `raise_errors` is set and any cycle failed.
+        """
+        queue, self._queue = self._queue, []
+        start = 0
+        calls = 0
+        try:
+            with self.controller._lock:
+                while start < len(queue):
+                    is_write = queue[start][0]
+                    end = start + 1
+                    while (
+                        end < len(queue)
+                        and end - start < self.max_cycles
+                        and queue[end][0] == is_write
+                    ):
+                        end += 1
+                    self._execute(queue[start:end], is_write)
+                    calls += 1
+                    start = end
+        except Exception as e:
+            for *_, future in queue[start:]:
+                future.set_exception(e)
+            raise
+        if self.raise_errors:
+            errors = {
+                address: future.exception()
+                for _, address, *_, future in queue
+                if future.exception() is not None
+            }
+            if errors:
+                raise BatchError(errors)
+        return calls
+
+    def _execute(self, cycles, is_write):
+        _, addresses, data, widths, modifiers, futures = zip(*cycles)
+        if is_write:
+            errors = self.controller.write_many(addresses, data, widths, modifiers)
+            data = [None] * len(errors)
+        else:
+            data, errors = self.controller.read_many(addresses, widths, modifiers)
+        for future, value, error in zip(futures, data, errors):
+            if error:
+                future.set_exception(error_from_code(error))
+            else:
+                future.set_result(value)
+
+
+class ModuleBatch:
+    """
+    View on a `VMEBatch` with addresses relative to the base address of a module.
+    """
+
+    def __init__(self, batch, module):
+        self.batch = batch
+        self.module = module
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        try:
+            self.batch.__exit__(type_, value, traceback)
+        except BatchError as e:
+            raise self._relative(e) from None
+
+    def flush(self):
+        try:
+            return self.batch.flush()
+        except BatchError as e:
+            raise self._relative(e) from None
+
+    def _relative(self, error):
+        """ Batch error with the addresses as offsets relative to the module """
+        base = self.module.base_address
+        return BatchError(
+            {address - base: e for address, e in error.errors.items()},
+            {address - base: result for address, result in error.results.items()},
+        )
+
+    def read(self, address, width=None, modifier=None):
+        self.module._check_range(address)
+        return self.batch.read(
+            self.module.base_address + address,
+            self.module.width if width is None else width,
+            self.module.modifier if modifier is None else modifier,
+        )
+
+    def write(self, address, data, width=None, modifier=None):
+        self.module._check_range(address)
+        future = self.batch.write(
+            self.module.base_address + address,
+            data,
+            self.module.width if width is None else width,
+            self.module.modifier if modifier is None else modifier,
+        )
+        future.add_done_callback(lambda f: self._record(f, address, data))
+        return future
+
+    def _record(self, future, address, data):
+        if not future.cancelled() and future.exception() is None:
+            self.module.shadow[address] = int(data)
@@ -0,0 +1,179 @@
+from ctypes import (
+    CDLL,
+    POINTER,
+    c_char_p,
+    c_int,
+    c_int32,
+    c_short,
+    c_ubyte,
+    c_uint32,
+    c_void_p,
+)
+
+
+_handle = c_int32
+_error = c_int
+_enum = c_int
+
+# Prototypes (return type, argument types) of the CAENVME functions
+PROTOTYPES = {
+    "CAENVME_Init": (_error, [_enum, c_short, c_short, POINTER(c_int32)]),
+    "CAENVME_End": (_error, [_handle]),
+    "CAENVME_BoardFWRelease": (_error, [_handle, c_char_p]),
+    "CAENVME_ReadCycle": (_error, [_handle, c_uint32, c_void_p, _enum, _enum]),
+    "CAENVME_WriteCycle": (_error, [_handle, c_uint32, c_void_p, _enum, _enum]),
+    "CAENVME_MultiRead": (
+        _error,
+        [
+            _handle,
+            POINTER(c_uint32),
+            POINTER(c_uint32),
+            c_int,
+            POINTER(_enum),
+            POINTER(_enum),
+            POINTER(_error),
+        ],
+    ),
+    "CAENVME_MultiWrite": (
+        _error,
+        [
+            _handle,
+            POINTER(c_uint32),
+            POINTER(c_uint32),
+            c_int,
+            POINTER(_enum),
+            POINTER(_enum),
+            POINTER(_error),
+        ],
+    ),
+    "CAENVME_BLTReadCycle": (
+        _error,
+        [_handle, c_uint32, c_void_p, c_int, _enum, _enum, POINTER(c_int)],
+    ),
+    "CAENVME_MBLTReadCycle": (
+        _error,
+        [_handle, c_uint32, c_void_p, c_int, _enum, POINTER(c_int)],
+    ),
+    "CAENVME_BLTWriteCycle": (
+        _error,
+        [_handle, c_uint32, c_void_p, c_int, _enum, _enum, POINTER(c_int)],
+    ),
+    "CAENVME_MBLTWriteCycle": (
+        _error,
+        [_handle, c_uint32, c_void_p, c_int, _enum, POINTER(c_int)],
+    ),
+    "CAENVME_FIFOBLTReadCycle": (
+        _error,
+        [_handle, c_uint32, c_void_p, c_int, _enum, _enum, POINTER(c_int)],
+    ),
+    "CAENVME_FIFOMBLTReadCycle": (
+        _error,
+        [_handle, c_uint32, c_void_p, c_int, _enum, POINTER(c_int)],
+    ),
+    "CAENVME_IRQEnable": (_error, [_handle, c_uint32]),
+    "CAENVME_IRQDisable": (_error, [_handle, c_uint32]),
+    "CAENVME_IRQCheck": (_error, [_handle, POINTER(c_ubyte)]),
+    "CAENVME_IRQWait": (_error, [_handle, c_uint32, c_uint32]),
+    "CAENVME_IACKCycle": (_error, [_handle, _enum, c_void_p, _enum]),
+    "CAENVME_SetPulserConf": (
+        _error,
+        [_handle, _enum, c_uint32, c_uint32, _enum, c_uint32, _enum, _enum],
+    ),
+    "CAENVME_GetPulserConf": (
+        _error,
+        [_handle, _enum] + [POINTER(c_uint32)] * 6,
+    ),
+    "CAENVME_SetScalerConf": (
+        _error,
+        [_handle, c_short, c_short, _enum, _enum, _enum],
+    ),
+    "CAENVME_GetScalerConf": (
+        _error,
+        [_handle, POINTER(c_short), POINTER(c_short)] + [POINTER(c_uint32)] * 3,
+    ),
+    "CAENVME_SetOutputConf": (_error, [_handle, _enum, _enum, _enum, _enum]),
+    "CAENVME_GetOutputConf": (
+        _error,
+        [_handle, _enum] + [POINTER(c_uint32)] * 3,
+    ),
+    "CAENVME_SetInputConf": (_error, [_handle, _enum, _enum, _enum]),
+    "CAENVME_GetInputConf": (
+        _error,
+        [_handle, _enum] + [POINTER(c_uint32)] * 3,
+    ),
+    "CAENVME_ReadRegister": (_error, [_handle, _enum, POINTER(c_uint32)]),
+    "CAENVME_WriteRegister": (_error, [_handle, _enum, c_uint32]),
+    "CAENVME_SetOutputRegister": (_error, [_handle, c_short]),
+    "CAENVME_ClearOutputRegister": (_error, [_handle, c_short]),
+    "CAENVME_PulseOutputRegister": (_error, [_handle, c_short]),
+    "CAENVME_ReadDisplay": (_error, [_handle, c_void_p]),
+    "CAENVME_SystemReset": (_error, [_handle]),
+    "CAENVME_ResetScalerCount": (_error, [_handle]),
+    "CAENVME_EnableScalerGate": (_error, [_handle]),
+    "CAENVME_DisableScalerGate": (_error, [_handle]),
+    "CAENVME_StartPulser": (_error, [_handle, _enum]),
+    "CAENVME_StopPulser": (_error, [_handle, _enum]),
+}
+
+# Hot path functions the controllers call through function pointers without
+# argument types, their arguments are passed as ints or ctypes objects already and
+# the per-call conversion of the declared prototypes only adds overhead
+UNCHECKED = (
+    "CAENVME_ReadCycle",
+    "CAENVME_WriteCycle",
+    "CAENVME_MultiRead",
+    "CAENVME_MultiWrite",
+    "CAENVME_BLTReadCycle",
+    "CAENVME_MBLTReadCycle",
+)
+
+
+def deref(argument):
+    """ Get the ctypes object behind a byref() argument """
+    return getattr(argument, "_obj", argument)
+
+
+def as_int(argument):
+    """ Get the integer value of a plain or ctypes (byref) argument """
+    argument = deref(argument)
+    return int(getattr(argument, "value", argument))
+
+
+def declare_prototypes(library):
+    """
+    Declare the argument and return types of the CAENVME functions of a library.
+
+    Functions missing in the library (e.g. older releases) are skipped.
+
+    Args:
+        library (CDLL): The loaded CAEN VME library.
+
+    Returns:
+        CDLL: The library.
+    """
+    for name, (restype, argtypes) in PROTOTYPES.items():
+        function = getattr(library, name, None)
+        if function is None:
+            continue
+        function.restype = restype
+        function.argtypes = argtypes
+    return library
+
+
+def unchecked_functions(library):
+    """
+    Get the `UNCHECKED` functions of a library without their declared prototypes.
+
+    Args:
+        library: Backend of a controller.
+
+    Returns:
+        dict: Functions by name, empty for backends that are no ctypes library.
+    """
+    if not isinstance(library, CDLL):
+        return {}
+    return {
+        name: library._FuncPtr((name, library))
+        for name in UNCHECKED
+        if hasattr(library, name)
+    }
@@ -1,10 +1,31 @@
-from ctypes import cdll, c_short, c_int32, c_uint32, c_char, byref, create_string_buffer, string_at
-from time import time
+from ctypes import (
+    cdll,
+    c_short,
+    c_ubyte,
+    c_int,
+    c_uint32,
+    c_char,
+    byref,
+    create_string_buffer,
+    string_at,
+)
+from enum import Enum
+from functools import wraps
+from weakref import WeakSet
 from .exceptions import check_error
+from ._batch import VMEBatch
+from ._bindings import declare_prototypes, unchecked_functions
+from ._hooks import HookedBackend
+from ._locks import LinkLockView
+from ._metrics import VMEMetrics
+from ._profiler import VMEProfiler
+from ._registry import _generations, handle_registry
+from .trace import TraceRecorder
 from ._vmetypes import (
     AddressModifier,
     DataWidth,
     BoardTypes,
+    IRQLevels,
     TimeUnits,
     IOSources,
     Polarity,
@@ -13,93 +34,788 @@ from ._vmetypes import (
 )
 
 
-try:
-    lib_vme = cdll.LoadLibrary("libCAENVME.so")
-except OSError:
-    pass
+_library = None
+
+
+def load_library(path="libCAENVME.so"):
+    """
+    Load the CAEN VME library used as the default backend of the controllers.
+
+    Args:
+        path (str): Name or path of the shared library.
+
+    Returns:
+        CDLL: The loaded library.
+    """
+    global _library
+    if _library is None:
+        try:
+            _library = declare_prototypes(cdll.LoadLibrary(path))
+        except OSError as e:
+            raise OSError(
+                f"Could not load {path}, install the CAEN VME library or pass a "
+                "backend such as pyvme.simulation.SimulatedCrate to the controller"
+            ) from e
+    return _library
 
 
 def locking(func):
+    @wraps(func)
     def inner(self, *args, **kwargs):
-        start = time()
-        while self._busy:
-            if time() - start > 5:
-                raise TimeoutError("Thread locked for over 5 seconds.")
-        self._busy = True
+        lock = self._lock
+        lock.acquire()
         try:
-            result = func(self, *args, **kwargs)
-        except Exception as e:
-            self._busy = False
-            raise e
-        self._busy = False
-        return result
+            return func(self, *args, **kwargs)
+        finally:
+            lock.release()
 
     return inner
 
 
+def _transfer_buffer(buffer, size, writable=True):
+    """
+    Wrap a buffer object as a ctypes char array without copying.
+
+    Args:
+        buffer: Any object supporting the buffer protocol (bytearray, memoryview,
+            NumPy array, ...).
+        size (int): Number of bytes to expose, defaults to the full buffer.
+        writable (bool): If False, read-only buffers are accepted by copying them.
+    """
+    view = memoryview(buffer).cast("B")
+    if size is None:
+        size = view.nbytes
+    if not 0 < size <= view.nbytes:
+        raise ValueError(
+            f"Transfer size {size} does not fit buffer of {view.nbytes} bytes"
+        )
+    if view.readonly:
+        if writable:
+            raise TypeError("Block reads need a writable buffer")
+        return (c_char * size).from_buffer_copy(view)
+    return (c_char * size).from_buffer(view)
+
+
+def _transferred(error, count, partial):
+    """
+    Get the number of bytes of a block read, tolerating a bus error if partial.
+
+    Modules end a block transfer with a bus error once their buffer is empty, the
+    bytes read up to then are valid.
+    """
+    if not (partial and error == -1):
+        check_error(error)
+    return count.value
+
+
+def _irq_mask(levels):
+    """
+    Combine one or several IRQ levels to a bit mask.
+    """
+    if isinstance(levels, IRQLevels):
+        return levels.value
+    mask = 0
+    for level in levels:
+        mask |= level.value
+    return mask
+
+
+def _cycle_codes(values, num_cycles):
+    """
+    Build a ctypes array of enum codes for a multi-cycle access.
+
+    Args:
+        values: A single enum member used for all cycles or one per cycle.
+        num_cycles (int): Number of cycles.
+    """
+    if isinstance(values, Enum):
+        return (c_int * num_cycles)(*([values.value] * num_cycles))
+    values = list(values)
+    if len(values) != num_cycles:
+        raise ValueError("Need exactly one entry per cycle")
+    return (c_int * num_cycles)(*(value.value for value in values))
+
+
 class VMEController:
-    def __init__(self, controller_board_type, link=0, board=0):
-        self.handle = c_int32()
-        check_error(
-            lib_vme.CAENVME_Init(
-                controller_board_type.value, link, board, byref(self.handle)
-            )
+    def __init__(
+        self, controller_board_type, link=0, board=0, lock_timeout=5.0, backend=None
+    ):
+        """
+        Controllers for the same link and board share one driver handle and its lock
+        (see `HandleRegistry`). Close them with `close` or by using the controller
+        as context manager.
+
+        Args:
+            controller_board_type (BoardTypes): Type of the VME bridge.
+            link (int): Link number.
+            board (int): Board number on the link.
+            lock_timeout (float): Maximum time in seconds to wait for the link lock.
+            backend: Object providing the CAENVME_* entry points, defaults to the
+                CAEN VME library (see `load_library`).
+        """
+        self.backend = load_library() if backend is None else backend
+        self._shared = handle_registry.acquire(
+            self.backend, controller_board_type, link, board
         )
-        self._busy = False
+        self.handle = self._shared.handle
+        self.board_type = controller_board_type
+        self.link = link
+        self.board = board
+        # The link lock is shared with the other controllers of the link, the
+        # timeout is not
+        self._lock = LinkLockView(self._shared.lock, lock_timeout)
+        # Optional IdentityCache to persist module identities across processes
+        self.identity_cache = None
+        # Modules created on this controller, used to attribute addresses
+        self.modules = WeakSet()
+        self.metrics = None
+        self._metrics_hook = None
+        self.trace = None
+        self.profiler = None
+        # Preallocated output arguments and bound driver functions for the hot path,
+        # only used while holding the lock.
+        self._data = c_uint32()
+        self._data_ref = byref(self._data)
+        self._bind_backend()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """ Release the driver handle, it is closed once no controller uses it """
+        shared = self.__dict__.pop("_shared", None)
+        if shared is not None:
+            handle_registry.release(shared)
+
+    @property
+    def closed(self):
+        return "_shared" not in self.__dict__
+
+    @property
+    def generation(self):
+        """ Counter bumped whenever cached module state (e.g. identities) is invalid """
+        return self._shared.generation
 
     @property
     def busy(self):
-        return self._busy
+        return self._lock.locked
 
-    def __del__(self):
-        lib_vme.CAENVME_End(self.handle)
+    @property
+    def lock_timeout(self):
+        return self._lock.timeout
+
+    @lock_timeout.setter
+    def lock_timeout(self, timeout):
+        self._lock.timeout = timeout
+
+    @property
+    def lock_stats(self):
+        """
+        Contention statistics of the link lock.
+
+        Returns:
+            dict: Number of (contended) acquisitions and total/max wait and hold
+            times in seconds.
+        """
+        return self._lock.stats
+
+    def reset_lock_stats(self):
+        """ Reset the link lock statistics """
+        self._lock.reset_stats()
+
+    @property
+    def hooks(self):
+        """ Hooks called after every driver call (see `add_hook`) """
+        backend = self.backend
+        return backend.hooks if isinstance(backend, HookedBackend) else ()
+
+    def add_hook(self, hook):
+        """
+        Call a function after every driver call of this controller.
+
+        The hook is called as hook(operation, args, code, start, end), see
+        `HookedBackend`. Without hooks the driver is called directly.
+        """
+        with self._lock:
+            hooks = self.hooks + (hook,)
+            self.backend = HookedBackend(self._shared.backend, hooks)
+            self._bind_backend()
+
+    def remove_hook(self, hook):
+        with self._lock:
+            hooks = tuple(h for h in self.hooks if h != hook)
+            if hooks:
+                self.backend = HookedBackend(self._shared.backend, hooks)
+            else:
+                self.backend = self._shared.backend
+            self._bind_backend()
+
+    def _bind_backend(self):
+        backend = self.backend
+        functions = unchecked_functions(backend)
+        for attribute, name in (
+            ("_read_cycle", "CAENVME_ReadCycle"),
+            ("_write_cycle", "CAENVME_WriteCycle"),
+            ("_multi_read", "CAENVME_MultiRead"),
+            ("_multi_write", "CAENVME_MultiWrite"),
+            ("_blt_read_cycle", "CAENVME_BLTReadCycle"),
+            ("_mblt_read_cycle", "CAENVME_MBLTReadCycle"),
+        ):
+            function = functions.get(name)
+            if function is None:
+                function = getattr(backend, name, None)
+            setattr(self, attribute, function)
+
+    def enable_metrics(self, metrics=None):
+        """
+        Record call counts, latencies and errors of this controller.
+
+        Args:
+            metrics (VMEMetrics): Metrics to record into, e.g. shared by several
+                controllers. A new one is created by default.
+
+        Returns:
+            VMEMetrics: The metrics.
+        """
+        self.disable_metrics()
+        self.metrics = VMEMetrics() if metrics is None else metrics
+        self._metrics_hook = self.metrics.hook(self)
+        self.add_hook(self._metrics_hook)
+        return self.metrics
+
+    def disable_metrics(self):
+        """ Stop recording metrics, the recorded values are kept """
+        if self._metrics_hook is not None:
+            self.remove_hook(self._metrics_hook)
+            self._metrics_hook = None
+
+    def enable_trace(self, path, capacity=None, append=False):
+        """
+        Record every cycle of this controller to a binary trace file.
+
+        Args:
+            path (str): Trace file, a memory-mapped ring (see `pyvme.trace`).
+            capacity (int): Number of records kept, the oldest are overwritten.
+            append (bool): Continue an existing trace file.
+
+        Returns:
+            TraceRecorder: The recorder.
+        """
+        self.disable_trace()
+        if capacity is None:
+            capacity = TraceRecorder.CAPACITY
+        self.trace = TraceRecorder(path, capacity, append)
+        self.add_hook(self.trace.hook)
+        return self.trace
+
+    def disable_trace(self):
+        """ Stop recording and close the trace file """
+        if self.trace is not None:
+            self.remove_hook(self.trace.hook)
+            self.trace.close()
+            self.trace = None
+
+    def enable_profiling(self, profiler=None):
+        """
+        Break down the time of the accesses of this controller by phase and caller.
+
+        Args:
+            profiler (VMEProfiler): Profiler to record into, e.g. shared by several
+                controllers. A new one is created by default.
+
+        Returns:
+            VMEProfiler: The profiler.
+        """
+        self.disable_profiling()
+        self.profiler = VMEProfiler() if profiler is None else profiler
+        self.profiler.attach(self)
+        return self.profiler
+
+    def disable_profiling(self):
+        """ Stop profiling, the recorded times are kept in the profiler """
+        if self.profiler is not None:
+            self.profiler.detach(self)
+            self.profiler = None
+
+    def invalidate_caches(self):
+        """ Invalidate the cached state of all modules, e.g. after a crate reset """
+        self._shared.generation = next(_generations)
+
+    def batch(self, max_cycles=VMEBatch.MAX_CYCLES, raise_errors=False):
+        """
+        Create a batch that queues cycles and flushes them in multi-cycle calls.
+
+        Example:
+            with controller.batch() as batch:
+                voltage = batch.module(hv).read(0x80)
+            print(voltage.result())
+
+        Args:
+            max_cycles (int): Maximum number of cycles per driver call.
+            raise_errors (bool): Raise a `BatchError` on flush if any cycle failed.
+
+        Returns:
+            VMEBatch: The batch.
+        """
+        return VMEBatch(self, max_cycles, raise_errors)
 
     @locking
-    def read(self, address, width=DataWidth.D16):
-        data = c_uint32()
+    def read(
+        self,
+        address,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
         check_error(
-            lib_vme.CAENVME_ReadCycle(
-                self.handle,
-                address,
-                byref(data),
-                AddressModifier.A24_NON_PRIVILEGED_DATA.value,
-                width.value,
+            self._read_cycle(
+                self.handle, address, self._data_ref, modifier._value_, width._value_
             )
         )
-        return data.value
+        return self._data.value
 
     @locking
-    def read_string(self, address_start, address_end):
+    def raw_read(self, address, modifier_code, width_code):
+        """
+        Read a single value using the integer codes of modifier and data width.
+
+        Used by modules that precompute the codes of their address space.
+        """
+        check_error(
+            self._read_cycle(
+                self.handle, address, self._data_ref, modifier_code, width_code
+            )
+        )
+        return self._data.value
+
+    @locking
+    def read_string(
+        self,
+        address_start,
+        address_end,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
         buffer = []
         for address in range(address_start, address_end + 0x02, 2):
-            data = self.read(address)
+            data = self.read(address, DataWidth.D16, modifier)
             buffer.append(chr(data >> 8))
             buffer.append(chr(data & 0xFF))
         return "".join(buffer).strip()
 
     @locking
-    def write(self, address, data, width=DataWidth.D16):
-        data_ = c_uint32(data)
+    def write(
+        self,
+        address,
+        data,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        self._data.value = data
         check_error(
-            lib_vme.CAENVME_WriteCycle(
+            self._write_cycle(
+                self.handle, address, self._data_ref, modifier._value_, width._value_
+            )
+        )
+
+    @locking
+    def raw_write(self, address, data, modifier_code, width_code):
+        """
+        Write a single value using the integer codes of modifier and data width.
+        """
+        self._data.value = data
+        check_error(
+            self._write_cycle(
+                self.handle, address, self._data_ref, modifier_code, width_code
+            )
+        )
+
+    @locking
+    def read_many(
+        self,
+        addresses,
+        widths=DataWidth.D16,
+        modifiers=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        """
+        Read several addresses with a single multi-cycle driver call.
+
+        Errors are reported per cycle instead of raising on the first failure, use
+        `check_error` on the individual codes if needed.
+
+        Args:
+            addresses (list): VME addresses to read.
+            widths (DataWidth or list): Data width for all or for each cycle.
+            modifiers (AddressModifier or list): Address modifier for all or for
+                each cycle.
+
+        Returns:
+            tuple: List of read values and list of error codes (0 means success).
+        """
+        addresses = list(addresses)
+        num_cycles = len(addresses)
+        if num_cycles == 0:
+            return [], []
+        data = (c_uint32 * num_cycles)()
+        errors = (c_int * num_cycles)()
+        self._multi_read(
+            self.handle,
+            (c_uint32 * num_cycles)(*addresses),
+            data,
+            num_cycles,
+            _cycle_codes(modifiers, num_cycles),
+            _cycle_codes(widths, num_cycles),
+            errors,
+        )
+        return list(data), list(errors)
+
+    @locking
+    def write_many(
+        self,
+        addresses,
+        data,
+        widths=DataWidth.D16,
+        modifiers=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        """
+        Write several addresses with a single multi-cycle driver call.
+
+        Args:
+            addresses (list): VME addresses to write.
+            data (list): Values to write, one per address.
+            widths (DataWidth or list): Data width for all or for each cycle.
+            modifiers (AddressModifier or list): Address modifier for all or for
+                each cycle.
+
+        Returns:
+            list: Error codes of the single cycles (0 means success).
+        """
+        addresses = list(addresses)
+        data = list(data)
+        num_cycles = len(addresses)
+        if len(data) != num_cycles:
+            raise ValueError("Need exactly one data word per address")
+        if num_cycles == 0:
+            return []
+        errors = (c_int * num_cycles)()
+        self._multi_write(
+            self.handle,
+            (c_uint32 * num_cycles)(*addresses),
+            (c_uint32 * num_cycles)(*data),
+            num_cycles,
+            _cycle_codes(modifiers, num_cycles),
+            _cycle_codes(widths, num_cycles),
+            errors,
+        )
+        return list(errors)
+
+    @locking
+    def blt_read(
+        self,
+        address,
+        buffer,
+        size=None,
+        width=DataWidth.D32,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK,
+        partial=False,
+    ):
+        """
+        Read a block of data with a single BLT cycle into a caller-supplied buffer.
+
+        Args:
+            address (int): VME start address.
+            buffer: Writable buffer (bytearray, memoryview, NumPy array, ...) that
+                receives the data in place.
+            size (int): Number of bytes to transfer, defaults to the buffer size.
+            width (DataWidth): Data width of the single transfers.
+            modifier (AddressModifier): Block transfer address modifier.
+            partial (bool): Return the bytes read up to a bus error terminating the
+                transfer instead of raising `BusError`.
+
+        Returns:
+            int: Number of bytes transferred.
+        """
+        target = _transfer_buffer(buffer, size)
+        count = c_int()
+        error = self._blt_read_cycle(
+            self.handle,
+            address,
+            target,
+            len(target),
+            modifier.value,
+            width.value,
+            byref(count),
+        )
+        return _transferred(error, count, partial)
+
+    @locking
+    def mblt_read(
+        self,
+        address,
+        buffer,
+        size=None,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK_64,
+        partial=False,
+    ):
+        """
+        Read a block of data with a single 64-bit MBLT cycle.
+
+        Args:
+            address (int): VME start address.
+            buffer: Writable buffer that receives the data in place.
+            size (int): Number of bytes to transfer, defaults to the buffer size.
+            modifier (AddressModifier): MBLT address modifier.
+            partial (bool): Return the bytes read up to a bus error terminating the
+                transfer instead of raising `BusError`.
+
+        Returns:
+            int: Number of bytes transferred.
+        """
+        target = _transfer_buffer(buffer, size)
+        count = c_int()
+        error = self._mblt_read_cycle(
+            self.handle,
+            address,
+            target,
+            len(target),
+            modifier.value,
+            byref(count),
+        )
+        return _transferred(error, count, partial)
+
+    @locking
+    def fifo_blt_read(
+        self,
+        address,
+        buffer,
+        size=None,
+        width=DataWidth.D32,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK,
+        partial=True,
+    ):
+        """
+        Read a block of data from a single (FIFO) address with a BLT cycle.
+
+        The address is not incremented during the transfer. A FIFO of unknown depth
+        is read by requesting more data than expected, the module ends the transfer
+        with a bus error once it is empty.
+
+        Args:
+            address (int): VME address of the FIFO.
+            buffer: Writable buffer that receives the data in place.
+            size (int): Maximum number of bytes to transfer, defaults to the buffer
+                size.
+            width (DataWidth): Data width of the single transfers.
+            modifier (AddressModifier): Block transfer address modifier.
+            partial (bool): Return the bytes read up to a bus error terminating the
+                transfer instead of raising `BusError`.
+
+        Returns:
+            int: Number of bytes transferred, less than requested if the FIFO ran
+            empty.
+        """
+        target = _transfer_buffer(buffer, size)
+        count = c_int()
+        error = self.backend.CAENVME_FIFOBLTReadCycle(
+            self.handle,
+            address,
+            target,
+            len(target),
+            modifier.value,
+            width.value,
+            byref(count),
+        )
+        return _transferred(error, count, partial)
+
+    @locking
+    def fifo_mblt_read(
+        self,
+        address,
+        buffer,
+        size=None,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK_64,
+        partial=True,
+    ):
+        """
+        Read a block of data from a single (FIFO) address with a 64-bit MBLT cycle.
+
+        See `fifo_blt_read`.
+
+        Returns:
+            int: Number of bytes transferred, less than requested if the FIFO ran
+            empty.
+        """
+        target = _transfer_buffer(buffer, size)
+        count = c_int()
+        error = self.backend.CAENVME_FIFOMBLTReadCycle(
+            self.handle,
+            address,
+            target,
+            len(target),
+            modifier.value,
+            byref(count),
+        )
+        return _transferred(error, count, partial)
+
+    @locking
+    def blt_write(
+        self,
+        address,
+        buffer,
+        size=None,
+        width=DataWidth.D32,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK,
+    ):
+        """
+        Write a block of data with a single BLT cycle.
+
+        Args:
+            address (int): VME start address.
+            buffer: Buffer holding the data to write.
+            size (int): Number of bytes to transfer, defaults to the buffer size.
+            width (DataWidth): Data width of the single transfers.
+            modifier (AddressModifier): Block transfer address modifier.
+
+        Returns:
+            int: Number of bytes transferred.
+        """
+        source = _transfer_buffer(buffer, size, writable=False)
+        count = c_int()
+        check_error(
+            self.backend.CAENVME_BLTWriteCycle(
                 self.handle,
                 address,
-                byref(data_),
-                AddressModifier.A24_NON_PRIVILEGED_DATA.value,
+                source,
+                len(source),
+                modifier.value,
                 width.value,
+                byref(count),
+            )
+        )
+        return count.value
+
+    @locking
+    def mblt_write(
+        self,
+        address,
+        buffer,
+        size=None,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK_64,
+    ):
+        """
+        Write a block of data with a single 64-bit MBLT cycle.
+
+        Args:
+            address (int): VME start address.
+            buffer: Buffer holding the data to write.
+            size (int): Number of bytes to transfer, defaults to the buffer size.
+            modifier (AddressModifier): MBLT address modifier.
+
+        Returns:
+            int: Number of bytes transferred.
+        """
+        source = _transfer_buffer(buffer, size, writable=False)
+        count = c_int()
+        check_error(
+            self.backend.CAENVME_MBLTWriteCycle(
+                self.handle,
+                address,
+                source,
+                len(source),
+                modifier.value,
+                byref(count),
+            )
+        )
+        return count.value
+
+    @locking
+    def irq_enable(self, levels):
+        """
+        Enable the interrupt lines on the bridge.
+
+        Args:
+            levels (IRQLevels or list): Interrupt levels to enable.
+        """
+        check_error(self.backend.CAENVME_IRQEnable(self.handle, _irq_mask(levels)))
+
+    @locking
+    def irq_disable(self, levels):
+        """
+        Disable the interrupt lines on the bridge.
+
+        Args:
+            levels (IRQLevels or list): Interrupt levels to disable.
+        """
+        check_error(self.backend.CAENVME_IRQDisable(self.handle, _irq_mask(levels)))
+
+    @locking
+    def irq_check(self):
+        """
+        Get the currently active interrupt levels.
+
+        Returns:
+            list: Active IRQLevels.
+        """
+        mask = c_ubyte()
+        check_error(self.backend.CAENVME_IRQCheck(self.handle, byref(mask)))
+        return [level for level in IRQLevels if mask.value & level.value]
+
+    def wait_irq(self, levels, timeout):
+        """
+        Block until one of the interrupt levels is active.
+
+        The controller lock is not held while waiting, other threads can keep using
+        the link. The GIL is released during the driver call.
+
+        Args:
+            levels (IRQLevels or list): Interrupt levels to wait for.
+            timeout (float): Timeout in seconds.
+
+        Returns:
+            bool: True if an interrupt is active, False on timeout.
+        """
+        error = self.backend.CAENVME_IRQWait(
+            self.handle, _irq_mask(levels), int(timeout * 1000)
+        )
+        if error == -5:
+            return False
+        check_error(error)
+        return True
+
+    @locking
+    def iack(self, level, width=DataWidth.D16):
+        """
+        Run an interrupt acknowledge cycle and get the interrupt vector.
+
+        Args:
+            level (IRQLevels): Interrupt level to acknowledge.
+            width (DataWidth): Data width of the vector.
+
+        Returns:
+            int: The interrupt vector.
+        """
+        vector = c_uint32()
+        check_error(
+            self.backend.CAENVME_IACKCycle(
+                self.handle, level.value, byref(vector), width.value
             )
         )
+        return vector.value
 
 
 class V2718(VMEController):
-    def __init__(self, link=0, board=0):
-        super().__init__(BoardTypes.V2718, link, board)
+    def __init__(self, link=0, board=0, lock_timeout=5.0, backend=None):
+        super().__init__(BoardTypes.V2718, link, board, lock_timeout, backend)
 
     @property
     def firmware_release(self):
-        release = c_char()
-        lib_vme.CAENVME_BoardFWRelease(self.handle, byref(release))
-        return release
+        release = create_string_buffer(32)
+        check_error(self.backend.CAENVME_BoardFWRelease(self.handle, release))
+        return release.value.decode()
 
     @locking
     def set_pulser_configuration(
@@ -120,7 +836,7 @@ class V2718(VMEController):
         if not 0 <= pulser <= 1:
             raise ValueError("Only pulsers 0 or 1 are available")
         check_error(
-            lib_vme.CAENVME_SetPulserConf(
+            self.backend.CAENVME_SetPulserConf(
                 self.handle,
                 pulser,
                 period,
@@ -150,7 +866,7 @@ class V2718(VMEController):
         reset_signal = c_uint32()
 
         check_error(
-            lib_vme.CAENVME_GetPulserConf(
+            self.backend.CAENVME_GetPulserConf(
                 self.handle,
                 pulser,
                 byref(period),
@@ -185,7 +901,7 @@ class V2718(VMEController):
             reset_signal (IOSources): Input for the reset.
         """
         check_error(
-            lib_vme.CAENVME_SetScalerConf(
+            self.backend.CAENVME_SetScalerConf(
                 self.handle,
                 limit,
                 auto_reset,
@@ -210,7 +926,7 @@ class V2718(VMEController):
         reset_signal = c_uint32()
 
         check_error(
-            lib_vme.CAENVME_GetScalerConf(
+            self.backend.CAENVME_GetScalerConf(
                 self.handle,
                 byref(limit),
                 byref(auto_reset),
@@ -243,7 +959,7 @@ class V2718(VMEController):
         if not 0 <= output_channel <= 4:
             raise IndexError("Only channels between 0 and 4 are available.")
         check_error(
-            lib_vme.CAENVME_SetOutputConf(
+            self.backend.CAENVME_SetOutputConf(
                 self.handle,
                 output_channel,
                 polarity.value,
@@ -268,7 +984,7 @@ class V2718(VMEController):
         source_signal = c_uint32()
 
         check_error(
-            lib_vme.CAENVME_GetOutputConf(
+            self.backend.CAENVME_GetOutputConf(
                 self.handle,
                 output_channel,
                 byref(polarity),
@@ -296,7 +1012,7 @@ class V2718(VMEController):
         if not 0 <= input_channel <= 1:
             raise IndexError("Only channels between 0 and 1 are available.")
         check_error(
-            lib_vme.CAENVME_SetInputConf(
+            self.backend.CAENVME_SetInputConf(
                 self.handle, input_channel, polarity.value, led_polarity.value
             )
         )
@@ -317,7 +1033,7 @@ class V2718(VMEController):
         source_signal = c_uint32()
 
         check_error(
-            lib_vme.CAENVME_GetInputConf(
+            self.backend.CAENVME_GetInputConf(
                 self.handle,
                 input_channel,
                 byref(polarity),
@@ -341,7 +1057,7 @@ class V2718(VMEController):
         """
         data = c_uint32()
         check_error(
-            lib_vme.CAENVME_ReadRegister(self.handle, register.value, byref(data))
+            self.backend.CAENVME_ReadRegister(self.handle, register.value, byref(data))
         )
         return data.value
 
@@ -353,7 +1069,7 @@ class V2718(VMEController):
         Args:
             mask (int): Mask (see OutputRegisterBits)
         """
-        check_error(lib_vme.CAENVME_SetOutputRegister(self.handle, mask))
+        check_error(self.backend.CAENVME_SetOutputRegister(self.handle, mask))
 
     @locking
     def clear_output_register(self, mask):
@@ -363,7 +1079,7 @@ class V2718(VMEController):
         Args:
             mask (int): Mask (see OutputRegisterBits)
         """
-        check_error(lib_vme.CAENVME_ClearOutputRegister(self.handle, mask))
+        check_error(self.backend.CAENVME_ClearOutputRegister(self.handle, mask))
 
     @locking
     def pulse_output_register(self, mask):
@@ -373,7 +1089,7 @@ class V2718(VMEController):
         Args:
             mask (int): Mask (see OutputRegisterBits)
         """
-        check_error(lib_vme.CAENVME_PulseOutputRegister(self.handle, mask))
+        check_error(self.backend.CAENVME_PulseOutputRegister(self.handle, mask))
 
     @locking
     def read_display(self):
@@ -384,28 +1100,29 @@ class V2718(VMEController):
             Display: Front panel display info
         """
         display = Display()
-        check_error(lib_vme.CAENVME_ReadDisplay(self.handle, byref(display)))
+        check_error(self.backend.CAENVME_ReadDisplay(self.handle, byref(display)))
         return display
 
     @locking
     def reset_system(self):
         """ Reset the system """
-        check_error(lib_vme.CAENVME_SystemReset(self.handle))
+        check_error(self.backend.CAENVME_SystemReset(self.handle))
+        self.invalidate_caches()
 
     @locking
     def reset_scaler_count(self):
         """ Reset the scaler count """
-        check_error(lib_vme.CAENVME_ResetScalerCount(self.handle))
+        check_error(self.backend.CAENVME_ResetScalerCount(self.handle))
 
     @locking
     def enable_scaler_gate(self):
         """ Enable the scaler gate """
-        check_error(lib_vme.CAENVME_EnableScalerGate(self.handle))
+        check_error(self.backend.CAENVME_EnableScalerGate(self.handle))
 
     @locking
     def disable_scaler_gate(self):
         """ Disable the scaler gate """
-        check_error(lib_vme.CAENVME_DisableScalerGate(self.handle))
+        check_error(self.backend.CAENVME_DisableScalerGate(self.handle))
 
     @locking
     def get_scaler_count(self):
@@ -427,7 +1144,7 @@ class V2718(VMEController):
         """
         if not 0 <= pulser <= 1:
             raise ValueError("Only pulsers 0 or 1 are available")
-        check_error(lib_vme.CAENVME_StartPulser(self.handle, pulser))
+        check_error(self.backend.CAENVME_StartPulser(self.handle, pulser))
 
     @locking
     def stop_pulser(self, pulser):
@@ -439,4 +1156,4 @@ class V2718(VMEController):
         """
         if not 0 <= pulser <= 1:
             raise ValueError("Only pulsers 0 or 1 are available")
-        check_error(lib_vme.CAENVME_StopPulser(self.handle, pulser))
+        check_error(self.backend.CAENVME_StopPulser(self.handle, pulser))
@@ -0,0 +1,41 @@
+from time import perf_counter
+
+
+class HookedBackend:
+    """
+    Backend proxy calling hooks after every CAENVME_* call.
+
+    Hooks are called as hook(operation, args, code, start, end) with the name of
+    the entry point without the "CAENVME_" prefix, the raw call arguments, the
+    returned error code and the `perf_counter` times around the call. They run in
+    the calling thread, while the controller lock is held for locked operations.
+
+    The proxy is only installed while a controller has hooks (see
+    `VMEController.add_hook`), so the hot path is untouched otherwise.
+
+    Args:
+        backend: The wrapped backend.
+        hooks (tuple): Hooks to call.
+    """
+
+    def __init__(self, backend, hooks=()):
+        self.backend = backend
+        self.hooks = tuple(hooks)
+
+    def __getattr__(self, name):
+        func = getattr(self.backend, name)
+        if not name.startswith("CAENVME_"):
+            return func
+        operation = name[len("CAENVME_") :]
+
+        def call(*args):
+            start = perf_counter()
+            code = func(*args)
+            end = perf_counter()
+            for hook in self.hooks:
+                hook(operation, args, code, start, end)
+            return code
+
+        # Cache the wrapper, __getattr__ is only called for missing attributes
+        setattr(self, name, call)
+        return call
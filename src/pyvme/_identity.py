@@ -0,0 +1,61 @@
+import json
+import os
+from threading import Lock
+
+
+def save_json(path, data):
+    """ Atomically replace a JSON file, creating its directory if needed """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+class IdentityCache:
+    """
+    Persistent store for the identity (model, serial, firmware, ...) of modules.
+
+    Entries are keyed by module class, base address and serial number, so a
+    restarted process only needs to read the serial number of a module to recover
+    its identity.
+
+    Args:
+        path (str): JSON file the cache is stored in.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self._lock = Lock()
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def key(module, serial_number):
+        return f"{type(module).__name__}@0x{module.base_address:08X}/{serial_number}"
+
+    def get(self, module, serial_number):
+        """
+        Returns:
+            dict: The stored identity or None if unknown.
+        """
+        with self._lock:
+            return self._entries.get(self.key(module, serial_number))
+
+    def put(self, module, serial_number, identity):
+        with self._lock:
+            self._entries[self.key(module, serial_number)] = identity
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+    def _save(self):
+        save_json(self.path, self._entries)
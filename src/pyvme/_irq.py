@@ -0,0 +1,135 @@
+import logging
+from threading import Event, Lock, Thread
+from ._vmetypes import DataWidth, IRQLevels
+
+
+logger = logging.getLogger(__name__)
+
+
+class IRQDispatcher:
+    """
+    Thread waiting for VME interrupts and routing their vectors to handlers.
+
+    Handlers are called from the dispatcher thread as handler(module, level, vector).
+    Exceptions of handlers are logged. An error of the interrupt cycles themselves
+    ends the thread, it is kept in `error` and raised by `stop` and `join`.
+
+    Example:
+        with IRQDispatcher(controller, [IRQLevels.IRQ_3]) as dispatcher:
+            dispatcher.register(0x55, on_data_ready, module=adc)
+            ...
+
+    Args:
+        controller (VMEController): Controller to receive the interrupts from.
+        levels (IRQLevels or list): Interrupt levels to serve.
+        width (DataWidth): Data width of the interrupt acknowledge cycles.
+        poll_timeout (float): Timeout of the single waits in seconds, bounds the time
+            needed to stop the dispatcher.
+    """
+
+    def __init__(self, controller, levels, width=DataWidth.D16, poll_timeout=0.1):
+        self.controller = controller
+        self.levels = [levels] if isinstance(levels, IRQLevels) else list(levels)
+        self.width = width
+        self.poll_timeout = poll_timeout
+        self.unhandled = 0
+        self.error = None
+        self._error_raised = False
+        self._handlers = {}
+        self._handlers_lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.stop()
+
+    def register(self, vector, handler, module=None):
+        """
+        Register a handler for an interrupt vector.
+
+        Args:
+            vector (int): Interrupt vector (status/ID) of the module.
+            handler (callable): Called as handler(module, level, vector).
+            module (VMEModule): Module the vector belongs to.
+        """
+        with self._handlers_lock:
+            self._handlers[vector] = (handler, module)
+
+    def unregister(self, vector):
+        with self._handlers_lock:
+            self._handlers.pop(vector, None)
+
+    def start(self):
+        """ Enable the interrupt levels and start the dispatcher thread """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self.error = None
+        self._error_raised = False
+        self.controller.irq_enable(self.levels)
+        self._thread = Thread(target=self._run, name="pyvme-irq", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """
+        Stop the dispatcher thread and disable the interrupt levels.
+
+        Raises:
+            Exception: The error that ended the dispatcher thread, if any.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.controller.irq_disable(self.levels)
+        self._raise_error()
+
+    def join(self, timeout=None):
+        """
+        Wait for the dispatcher thread to end, e.g. after an error.
+
+        Raises:
+            Exception: The error that ended the dispatcher thread, if any.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._raise_error()
+
+    def _raise_error(self):
+        """ Raise the error of the thread once, it stays available in `error` """
+        if self.error is not None and not self._error_raised:
+            self._error_raised = True
+            raise self.error
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                if not self.controller.wait_irq(self.levels, self.poll_timeout):
+                    continue
+                for level in self.controller.irq_check():
+                    if level in self.levels:
+                        self._dispatch(level, self.controller.iack(level, self.width))
+        except Exception as e:
+            logger.exception("Interrupt dispatcher stopped")
+            self.error = e
+
+    def _dispatch(self, level, vector):
+        with self._handlers_lock:
+            handler, module = self._handlers.get(vector, (None, None))
+        if handler is None:
+            self.unhandled += 1
+            logger.warning("Unhandled interrupt vector 0x%X on %s", vector, level)
+            return
+        try:
+            handler(module, level, vector)
+        except Exception:
+            logger.exception("Interrupt handler for vector 0x%X failed", vector)
@@ -0,0 +1,130 @@
+from threading import RLock
+from time import perf_counter
+
+
+_OWN_TIMEOUT = object()
+
+class LinkLock:
+    """
+    Reentrant lock serializing the access to one VME link with contention metrics.
+
+    Args:
+        timeout (float): Maximum time in seconds to wait for the lock, None waits
+            forever.
+    """
+
+    def __init__(self, timeout=5.0):
+        self.timeout = timeout
+        self._lock = RLock()
+        self._depth = 0
+        self._acquired_at = 0.0
+        self.reset_stats()
+
+    @property
+    def locked(self):
+        return self._depth > 0
+
+    def acquire(self, timeout=_OWN_TIMEOUT):
+        """
+        Args:
+            timeout (float): Maximum time in seconds to wait, defaults to the
+                timeout of the lock, None waits forever.
+        """
+        if timeout is _OWN_TIMEOUT:
+            timeout = self.timeout
+        if self._lock.acquire(blocking=False):
+            wait = 0.0
+        else:
+            start = perf_counter()
+            if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+                raise TimeoutError(f"VME link locked for over {timeout} seconds.")
+            wait = perf_counter() - start
+        self._depth += 1
+        if self._depth == 1:
+            self._acquired_at = perf_counter()
+            self._acquisitions += 1
+            if wait:
+                self._contended += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            hold = perf_counter() - self._acquired_at
+            self._hold_total += hold
+            self._hold_max = max(self._hold_max, hold)
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.release()
+
+    def reset_stats(self):
+        """ Reset the contention statistics """
+        self._acquisitions = 0
+        self._contended = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._hold_total = 0.0
+        self._hold_max = 0.0
+
+    @property
+    def stats(self):
+        """
+        Contention statistics of the lock.
+
+        Returns:
+            dict: Number of (contended) acquisitions and total/max wait and hold
+            times in seconds.
+        """
+        return dict(
+            acquisitions=self._acquisitions,
+            contended=self._contended,
+            wait_total=self._wait_total,
+            wait_max=self._wait_max,
+            hold_total=self._hold_total,
+            hold_max=self._hold_max,
+        )
+
+
+class LinkLockView:
+    """
+    Access to a `LinkLock` shared by several controllers with an own timeout.
+
+    Args:
+        lock (LinkLock): The shared lock.
+        timeout (float): Maximum time in seconds to wait for the lock, None waits
+            forever.
+    """
+
+    def __init__(self, lock, timeout=5.0):
+        self.lock = lock
+        self.timeout = timeout
+
+    @property
+    def locked(self):
+        return self.lock.locked
+
+    def acquire(self):
+        self.lock.acquire(self.timeout)
+
+    def release(self):
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.release()
+
+    def reset_stats(self):
+        self.lock.reset_stats()
+
+    @property
+    def stats(self):
+        return self.lock.stats
@@ -0,0 +1,254 @@
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from ._bindings import deref
+from .exceptions import error_from_code
+
+
+# Upper bounds of the latency histogram buckets in seconds, 1 us to 8 s
+BUCKETS = tuple(1e-6 * 2 ** k for k in range(24))
+
+_SINGLE = {"ReadCycle", "WriteCycle"}
+_MULTI = {"MultiRead", "MultiWrite"}
+_BLOCK = {
+    "BLTReadCycle",
+    "BLTWriteCycle",
+    "MBLTReadCycle",
+    "MBLTWriteCycle",
+    "FIFOBLTReadCycle",
+    "FIFOMBLTReadCycle",
+}
+# Return codes the controller does not treat as errors, e.g. IRQWait timeouts
+_EXPECTED = {("IRQWait", -5)}
+
+
+class _Series:
+    __slots__ = ("calls", "cycles", "bytes", "time_total", "time_max", "buckets")
+
+    def __init__(self, num_buckets):
+        self.calls = 0
+        self.cycles = 0
+        self.bytes = 0
+        self.time_total = 0.0
+        self.time_max = 0.0
+        self.buckets = [0] * (num_buckets + 1)
+
+
+class VMEMetrics:
+    """
+    Call counts, latency histograms and error counts of VME controllers.
+
+    Calls are recorded per link, operation (driver entry point), module and
+    register offset. Multi-cycle calls are attributed to the module of their first
+    address, block transfers to their start address. Enable the recording with
+    `VMEController.enable_metrics`.
+
+    Example:
+        metrics = controller.enable_metrics()
+        metrics.serve(9464)  # Prometheus endpoint on http://127.0.0.1:9464/metrics
+
+    Args:
+        buckets (tuple): Upper bounds of the latency histogram buckets in seconds.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = Lock()
+        self._server = None
+        self.reset()
+
+    def reset(self):
+        """ Clear all recorded values """
+        with self._lock:
+            self._series = {}
+            self._errors = {}
+
+    def hook(self, controller):
+        """
+        Create the hook recording the driver calls of a controller.
+
+        Returns:
+            function: Hook for `VMEController.add_hook`.
+        """
+        link = f"{controller.board_type.name}/{controller.link}/{controller.board}"
+        modules = controller.modules
+        # Module and offset labels by address, rebuilt when modules come and go
+        locations = {}
+        num_modules = [len(modules)]
+
+        def locate(address):
+            if num_modules[0] != len(modules) or len(locations) > 4096:
+                locations.clear()
+                num_modules[0] = len(modules)
+            location = locations.get(address)
+            if location is None:
+                location = ("", f"0x{address:X}")
+                for module in list(modules):
+                    offset = address - module.base_address
+                    if 0 <= offset < module.window_size:
+                        name = f"{type(module).__name__}@0x{module.base_address:X}"
+                        location = (name, f"0x{offset:X}")
+                        break
+                locations[address] = location
+            return location
+
+        def hook(operation, args, code, start, end):
+            cycles = 1
+            size = 0
+            module = offset = ""
+            if operation in _SINGLE:
+                module, offset = locate(args[1])
+            elif operation in _MULTI:
+                cycles = args[3]
+                module, offset = locate(args[1][0])
+                errors = args[6]
+                for i in range(cycles):
+                    if errors[i]:
+                        self.record_error(errors[i])
+            elif operation in _BLOCK:
+                module, offset = locate(args[1])
+                size = deref(args[-1]).value
+            self.record(link, operation, module, offset, end - start, cycles, size)
+            if code and operation not in _MULTI and (operation, code) not in _EXPECTED:
+                self.record_error(code)
+
+        return hook
+
+    def record(self, link, operation, module, offset, duration, cycles=1, size=0):
+        """ Record a driver call """
+        key = (link, operation, module, offset)
+        bucket = bisect_left(self.buckets, duration)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.calls += 1
+            series.cycles += cycles
+            series.bytes += size
+            series.time_total += duration
+            if duration > series.time_max:
+                series.time_max = duration
+            series.buckets[bucket] += 1
+
+    def record_error(self, code):
+        """ Count a failed call or cycle by the class of its exception """
+        name = type(error_from_code(code)).__name__
+        with self._lock:
+            self._errors[name] = self._errors.get(name, 0) + 1
+
+    def stats(self):
+        """
+        Get the recorded values.
+
+        Returns:
+            dict: "series" with a dict per link, operation, module and offset
+            holding the number of calls, cycles and block transfer bytes, the
+            total/max time in seconds and the (non-cumulative) bucket counts, and
+            "errors" with the error counts by exception class.
+        """
+        with self._lock:
+            series = [
+                dict(
+                    link=link,
+                    operation=operation,
+                    module=module,
+                    offset=offset,
+                    calls=values.calls,
+                    cycles=values.cycles,
+                    bytes=values.bytes,
+                    time_total=values.time_total,
+                    time_max=values.time_max,
+                    buckets=list(values.buckets),
+                )
+                for (link, operation, module, offset), values in self._series.items()
+            ]
+            return dict(series=series, errors=dict(self._errors))
+
+    def prometheus(self):
+        """
+        Format the recorded values in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics.
+        """
+        stats = self.stats()
+        lines = [
+            "# HELP pyvme_call_duration_seconds Duration of the VME driver calls.",
+            "# TYPE pyvme_call_duration_seconds histogram",
+        ]
+        cycles = []
+        sizes = []
+        for series in stats["series"]:
+            labels = (
+                f'link="{series["link"]}",operation="{series["operation"]}",'
+                f'module="{series["module"]}",offset="{series["offset"]}"'
+            )
+            cumulative = 0
+            bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, series["buckets"]):
+                cumulative += count
+                lines.append(
+                    f'pyvme_call_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(
+                f"pyvme_call_duration_seconds_sum{{{labels}}} {series['time_total']}"
+            )
+            lines.append(f"pyvme_call_duration_seconds_count{{{labels}}} {cumulative}")
+            cycles.append(f"pyvme_cycles_total{{{labels}}} {series['cycles']}")
+            if series["bytes"]:
+                sizes.append(f"pyvme_block_bytes_total{{{labels}}} {series['bytes']}")
+        lines.append("# HELP pyvme_cycles_total Number of VME cycles.")
+        lines.append("# TYPE pyvme_cycles_total counter")
+        lines.extend(cycles)
+        lines.append("# HELP pyvme_block_bytes_total Bytes moved by block transfers.")
+        lines.append("# TYPE pyvme_block_bytes_total counter")
+        lines.extend(sizes)
+        lines.append("# HELP pyvme_errors_total Failed calls and cycles by exception.")
+        lines.append("# TYPE pyvme_errors_total counter")
+        for name, count in sorted(stats["errors"].items()):
+            lines.append(f'pyvme_errors_total{{exception="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """
+        Serve the metrics over HTTP in the Prometheus text format from a thread.
+
+        Args:
+            port (int): TCP port, 0 picks a free one.
+            host (str): Address to bind, only local by default.
+
+        Returns:
+            ThreadingHTTPServer: The server, see `server_address` for the port.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.stop_server()
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        Thread(
+            target=self._server.serve_forever, name="pyvme-metrics", daemon=True
+        ).start()
+        return self._server
+
+    def stop_server(self):
+        """ Stop the HTTP endpoint """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
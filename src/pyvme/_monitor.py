@@ -0,0 +1,308 @@
+from threading import Event, Lock, Thread
+from time import perf_counter
+from .modules._V6533 import V6533ChannelStatus
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Channel states polled at the fast interval
+FAST_STATES = (
+    V6533ChannelStatus.RAMP_UP,
+    V6533ChannelStatus.RAMP_DOWN,
+    V6533ChannelStatus.OVER_CURRENT,
+    V6533ChannelStatus.OVER_VOLTAGE,
+    V6533ChannelStatus.UNDER_VOLTAGE,
+    V6533ChannelStatus.MAXV,
+    V6533ChannelStatus.MAXI,
+    V6533ChannelStatus.TRIP,
+    V6533ChannelStatus.OVER_POWER,
+    V6533ChannelStatus.OVER_TEMPERATURE,
+    V6533ChannelStatus.INTERLOCK,
+)
+# Snapshot fields kept in the history
+FIELDS = (
+    "voltage",
+    "measured_voltage",
+    "measured_current",
+    "status",
+    "enabled",
+    "temperature",
+)
+# Minimum change of a field reported to subscribers, other fields on any change
+TOLERANCES = {"measured_voltage": 0.5, "measured_current": 0.05}
+
+
+class _History:
+    """
+    Fixed-size ring of snapshots, one row per poll and one column per channel.
+    """
+
+    def __init__(self, capacity, num_channels, dtypes):
+        self.capacity = capacity
+        self.count = 0
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.columns = {
+            name: np.zeros((capacity, num_channels), dtype=dtype)
+            for name, dtype in dtypes.items()
+        }
+
+    def append(self, snapshot):
+        row = self.count % self.capacity
+        self.timestamps[row] = snapshot.timestamp
+        for name, column in self.columns.items():
+            column[row] = snapshot.columns[name]
+        self.count += 1
+
+    def _order(self, array):
+        """ Copy of the used rows, oldest first """
+        if self.count <= self.capacity:
+            return array[: self.count].copy()
+        row = self.count % self.capacity
+        return np.concatenate((array[row:], array[:row]))
+
+    def channel(self, channel, fields):
+        series = {"timestamp": self._order(self.timestamps)}
+        for name in fields:
+            series[name] = self._order(self.columns[name][:, channel])
+        return series
+
+
+class HVMonitor:
+    """
+    Background monitoring of a V6533 with a poll rate adapted to the channel states.
+
+    Every poll reads all channels with one `V6533.snapshot` and appends the values
+    to a fixed-size ring buffer per channel. While a channel is ramping or in an
+    alarm state (see `intervals`), and for `hold` seconds afterwards, the board is
+    polled every `fast_interval` seconds, otherwise every `slow_interval`.
+
+    Subscribers are called from the monitor thread with the changes since the
+    values last reported, numeric fields only once they moved by more than their
+    tolerance.
+
+    Example:
+        with HVMonitor(hv) as monitor:
+            monitor.subscribe(lambda timestamp, changes: print(changes))
+            hv.channels[0].voltage = 1500
+            monitor.poll_now()
+            sleep(60)
+            history = monitor.history(0)
+
+    Args:
+        module (V6533): Module to monitor.
+        fast_interval (float): Poll interval in seconds while ramping or in alarm.
+        slow_interval (float): Poll interval in seconds while stable.
+        intervals (dict): Poll interval by `V6533ChannelStatus`, overriding the
+            defaults. The shortest interval of all channels is used.
+        hold (float): Time in seconds to keep the fast interval after all channels
+            left the fast states, to resolve the settling at the end of a ramp.
+        capacity (int): Number of polls kept in the history.
+        fields (tuple): `V6533Snapshot` fields kept in the history.
+        tolerances (dict): Minimum change by field reported to subscribers.
+    """
+
+    def __init__(
+        self,
+        module,
+        fast_interval=0.2,
+        slow_interval=5.0,
+        intervals=None,
+        hold=2.0,
+        capacity=4096,
+        fields=FIELDS,
+        tolerances=None,
+    ):
+        if np is None:
+            raise ImportError("HVMonitor requires numpy")
+        self.module = module
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.intervals = {status: fast_interval for status in FAST_STATES}
+        if intervals:
+            self.intervals.update(
+                (V6533ChannelStatus(status), interval)
+                for status, interval in intervals.items()
+            )
+        # Interval by raw status register value
+        self._intervals = {
+            status.value: interval for status, interval in self.intervals.items()
+        }
+        self.hold = hold
+        self.fields = tuple(fields)
+        self.tolerances = dict(TOLERANCES if tolerances is None else tolerances)
+        self.interval = slow_interval
+        self.latest = None
+        self.error = None
+        self._history = None
+        self._capacity = capacity
+        self._published = None
+        self._subscribers = []
+        self._lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
+        self._fast_until = 0.0
+        self._thread = Thread(target=self._run, name="pyvme-monitor", daemon=True)
+        self._polls = 0
+        self._fast_polls = 0
+        self._errors = 0
+        self._notifications = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.stop()
+
+    def start(self):
+        """ Start the monitor thread """
+        self._thread.start()
+
+    def stop(self):
+        """ Stop the monitor thread """
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def poll_now(self):
+        """ Poll immediately, e.g. after changing a set value """
+        self._wake.set()
+
+    @property
+    def stats(self):
+        """
+        Monitor statistics.
+
+        Returns:
+            dict: Number of polls, polls at an interval shorter than the slow one,
+            failed polls (see `error` for the last exception), subscriber calls and
+            the current poll interval in seconds.
+        """
+        return dict(
+            polls=self._polls,
+            fast_polls=self._fast_polls,
+            errors=self._errors,
+            notifications=self._notifications,
+            interval=self.interval,
+        )
+
+    def subscribe(self, callback):
+        """
+        Register a function called with the timestamp and the changes of every
+        poll that changed a value, as {channel: {field: value}}.
+
+        The current state of all channels is passed once right away if available.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            if self._published is None:
+                return
+            timestamp = self.latest.timestamp
+            state = {}
+            for name, column in self._published.items():
+                for channel, value in enumerate(column.tolist()):
+                    state.setdefault(channel, {})[name] = value
+        callback(timestamp, state)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def history(self, channel, fields=None):
+        """
+        Get the recorded values of a channel.
+
+        Returns:
+            dict: "timestamp" and the requested fields (default all recorded ones)
+            as NumPy arrays, oldest first.
+        """
+        with self._lock:
+            if self._history is None:
+                return {
+                    name: np.empty(0)
+                    for name in ("timestamp",) + tuple(fields or self.fields)
+                }
+            return self._history.channel(
+                channel, self.fields if fields is None else fields
+            )
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            start = perf_counter()
+            try:
+                snapshot = self.module.snapshot()
+            except Exception as e:
+                self.error = e
+                self._errors += 1
+            else:
+                self._record(snapshot)
+                self.interval = self._next_interval(snapshot, perf_counter())
+            self._polls += 1
+            if self.interval < self.slow_interval:
+                self._fast_polls += 1
+            self._wake.wait(max(self.interval - (perf_counter() - start), 0.0))
+
+    def _next_interval(self, snapshot, now):
+        interval = self.slow_interval
+        for status in set(snapshot.status.tolist()):
+            interval = min(interval, self._intervals.get(status, self.slow_interval))
+        if interval < self.slow_interval:
+            self._fast_until = now + self.hold
+        elif now < self._fast_until:
+            interval = self.fast_interval
+        return interval
+
+    def _record(self, snapshot):
+        with self._lock:
+            if self._history is None:
+                self._history = _History(
+                    self._capacity,
+                    len(snapshot),
+                    {name: snapshot.columns[name].dtype for name in self.fields},
+                )
+            self._history.append(snapshot)
+            self.latest = snapshot
+            changes = self._changes(snapshot)
+            subscribers = list(self._subscribers)
+        if not changes:
+            return
+        for callback in subscribers:
+            self._notifications += 1
+            try:
+                callback(snapshot.timestamp, changes)
+            except Exception as e:
+                self.error = e
+                self._errors += 1
+
+    def _changes(self, snapshot):
+        """ Changes against the reported values, called with the lock held """
+        columns = {name: snapshot.columns[name] for name in self.fields}
+        if self._published is None:
+            self._published = {name: column.copy() for name, column in columns.items()}
+            changed = {name: np.ones(len(snapshot), bool) for name in columns}
+        else:
+            changed = {}
+            for name, column in columns.items():
+                published = self._published[name]
+                tolerance = self.tolerances.get(name)
+                if tolerance:
+                    mask = np.abs(column - published) > tolerance
+                else:
+                    mask = column != published
+                if mask.any():
+                    published[mask] = column[mask]
+                    changed[name] = mask
+        changes = {}
+        for name, mask in changed.items():
+            for channel in np.flatnonzero(mask).tolist():
+                changes.setdefault(channel, {})[name] = columns[name][channel].item()
+        return changes
@@ -0,0 +1,126 @@
+from ._controllers import VMEController
+from ._vmetypes import AddressModifier, DataWidth
+from ._worker import LinkWorker
+
+
+class ControllerPool:
+    """
+    Controllers of several links with a dedicated worker thread per link.
+
+    Operations submitted for different links run in parallel, the GIL is released
+    while the driver calls are executed.
+
+    Example:
+        pool = ControllerPool()
+        pool.add(BoardTypes.A3818, link=0)
+        pool.add(BoardTypes.A3818, link=1)
+        snapshots = pool.map(lambda controller: V6533(controller, 0x100000).snapshot())
+
+    Args:
+        backend: Backend passed to the controllers (see `VMEController`).
+        lock_timeout (float): Lock timeout of the controllers.
+    """
+
+    def __init__(self, backend=None, lock_timeout=5.0):
+        self.backend = backend
+        self.lock_timeout = lock_timeout
+        self._controllers = {}
+        self._workers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._controllers)
+
+    def __getitem__(self, key):
+        return self._controllers[key]
+
+    def keys(self):
+        return list(self._controllers)
+
+    def add(self, board_type, link=0, board=0):
+        """
+        Open a link and start its worker.
+
+        Returns:
+            VMEController: The controller of the link.
+        """
+        key = (board_type, link, board)
+        if key not in self._controllers:
+            controller = VMEController(
+                board_type, link, board, self.lock_timeout, self.backend
+            )
+            self._controllers[key] = controller
+            self._workers[key] = LinkWorker(controller)
+        return self._controllers[key]
+
+    def worker(self, key):
+        return self._workers[key]
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Execute func(controller, *args, **kwargs) in the worker of a link.
+
+        Returns:
+            Future: Resolves to the return value of func.
+        """
+        return self._workers[key].submit(func, self._controllers[key], *args, **kwargs)
+
+    def read(
+        self,
+        key,
+        address,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        """
+        Queue a read cycle on a link, coalesced with other queued cycles.
+
+        Returns:
+            Future: Resolves to the read value.
+        """
+        return self._workers[key].read(address, width, modifier)
+
+    def write(
+        self,
+        key,
+        address,
+        data,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        """
+        Queue a write cycle on a link, coalesced with other queued cycles.
+
+        Returns:
+            Future: Resolves to None once written.
+        """
+        return self._workers[key].write(address, data, width, modifier)
+
+    def map(self, func, keys=None):
+        """
+        Execute func(controller) on several links in parallel and wait for them.
+
+        Args:
+            func (callable): Function called with the controller of each link.
+            keys (list): Links to use, defaults to all.
+
+        Returns:
+            dict: Return values by link key.
+        """
+        keys = self.keys() if keys is None else keys
+        futures = {key: self.submit(key, func) for key in keys}
+        return {key: future.result() for key, future in futures.items()}
+
+    def close(self):
+        """ Stop all workers and close the controllers """
+        for worker in self._workers.values():
+            worker.stop()
+        for controller in self._controllers.values():
+            controller.close()
+        self._workers = {}
+        self._controllers = {}
@@ -0,0 +1,273 @@
+import os
+import sys
+import threading
+from threading import Lock
+from time import perf_counter
+
+
+PHASES = ("python", "lock", "marshalling", "driver")
+# Controller methods timed by the profiler
+PROFILED_METHODS = (
+    "read",
+    "raw_read",
+    "read_string",
+    "write",
+    "raw_write",
+    "read_many",
+    "write_many",
+    "blt_read",
+    "mblt_read",
+    "blt_write",
+    "mblt_write",
+    "fifo_blt_read",
+    "fifo_mblt_read",
+    "irq_check",
+    "iack",
+)
+
+_PACKAGE = os.path.dirname(os.path.abspath(__file__))
+# Files whose frames are not shown in the call stacks
+_INTERNAL = {
+    os.path.join(_PACKAGE, name)
+    for name in ("_controllers.py", "_batch.py", "_hooks.py", "_profiler.py", "vme.py")
+}
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    if code.co_varnames[:1] == ("self",) and "self" in frame.f_locals:
+        return f"{type(frame.f_locals['self']).__name__}.{code.co_name}"
+    name = getattr(code, "co_qualname", code.co_name)
+    if "." in name:
+        return name
+    return f"{frame.f_globals.get('__name__', '?')}.{name}"
+
+
+def _hidden(code):
+    """ Check if frames of a code object are left out of the call stacks """
+    return code.co_filename in _INTERNAL or (
+        code.co_name.startswith("<") and code.co_name != "<module>"
+    )
+
+
+class _State(threading.local):
+    def __init__(self):
+        self.active = False
+        self.lock_depth = 0
+        self.lock_wait = 0.0
+        self.acquired = 0.0
+        self.inside = 0.0
+        self.driver = 0.0
+
+
+class _ProfiledLock:
+    """ Link lock proxy measuring the wait and hold time of profiled calls """
+
+    def __init__(self, lock, state):
+        self.lock = lock
+        self._state = state
+
+    def __getattr__(self, name):
+        return getattr(self.lock, name)
+
+    @property
+    def timeout(self):
+        return self.lock.timeout
+
+    @timeout.setter
+    def timeout(self, timeout):
+        self.lock.timeout = timeout
+
+    def acquire(self):
+        state = self._state
+        if not state.active:
+            return self.lock.acquire()
+        if state.lock_depth == 0:
+            start = perf_counter()
+            self.lock.acquire()
+            state.acquired = perf_counter()
+            state.lock_wait += state.acquired - start
+        else:
+            self.lock.acquire()
+        state.lock_depth += 1
+
+    def release(self):
+        state = self._state
+        if state.active:
+            state.lock_depth -= 1
+            if state.lock_depth == 0:
+                state.inside += perf_counter() - state.acquired
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.release()
+
+
+class VMEProfiler:
+    """
+    Break down the time of VME accesses into phases and attribute it to callers.
+
+    Every profiled controller call is split into the time waiting for the link
+    lock (lock), building the ctypes arguments and converting the results while
+    holding the lock (marshalling), the driver call including the ctypes call
+    overhead and the bus transfer (driver) and the remaining Python overhead
+    (python). Only the attached controllers are instrumented, through wrappers of
+    their methods, their lock and a driver hook (see `VMEController.add_hook`),
+    calls of all threads are recorded.
+
+    Times are attributed to the call stack of the caller, e.g.
+    `HVChannel.measured_current`, with the frames of the pyvme internals left out.
+    The summary is available as rows (`stats`, `print_stats`) or in the collapsed
+    stack format of flame graph tools (`collapsed`).
+
+    Example:
+        profiler = controller.enable_profiling()
+        poll()
+        controller.disable_profiling()
+        profiler.print_stats()
+
+    Args:
+        depth (int): Maximum number of caller frames kept per stack.
+    """
+
+    def __init__(self, depth=8):
+        self.depth = depth
+        self._state = _State()
+        self._lock = Lock()
+        self._controllers = {}
+        self.reset()
+
+    def reset(self):
+        """ Clear the recorded times """
+        with self._lock:
+            self._entries = {}
+
+    def attach(self, controller):
+        """ Start profiling the calls of a controller """
+        if id(controller) in self._controllers:
+            return
+        for name in PROFILED_METHODS:
+            setattr(controller, name, self._wrap(controller, name))
+        controller._lock = _ProfiledLock(controller._lock, self._state)
+        controller.add_hook(self._driver_hook)
+        self._controllers[id(controller)] = controller
+
+    def detach(self, controller):
+        """ Stop profiling the calls of a controller """
+        if self._controllers.pop(id(controller), None) is None:
+            return
+        controller.remove_hook(self._driver_hook)
+        controller._lock = controller._lock.lock
+        for name in PROFILED_METHODS:
+            controller.__dict__.pop(name, None)
+
+    def _driver_hook(self, operation, args, code, start, end):
+        state = self._state
+        if state.active:
+            state.driver += end - start
+
+    def _wrap(self, controller, name):
+        method = getattr(controller, name)
+        label = f"{type(controller).__name__}.{name}"
+        state = self._state
+
+        def profiled(*args, **kwargs):
+            if state.active:
+                return method(*args, **kwargs)
+            state.active = True
+            state.lock_depth = 0
+            state.lock_wait = state.inside = state.driver = 0.0
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                total = perf_counter() - start
+                state.active = False
+                self._add(
+                    self._stack(sys._getframe(1)) + (label,),
+                    python=total - state.lock_wait - state.inside,
+                    lock=state.lock_wait,
+                    marshalling=state.inside - state.driver,
+                    driver=state.driver,
+                )
+
+        return profiled
+
+    def _stack(self, frame):
+        names = []
+        while frame is not None and len(names) < self.depth:
+            if not _hidden(frame.f_code):
+                names.append(_frame_name(frame))
+            frame = frame.f_back
+        return tuple(reversed(names))
+
+    def _add(self, stack, **phases):
+        with self._lock:
+            entry = self._entries.get(stack)
+            if entry is None:
+                entry = self._entries[stack] = [0, 0.0, 0.0, 0.0, 0.0]
+            entry[0] += 1
+            for i, phase in enumerate(PHASES):
+                entry[1 + i] += phases[phase]
+
+    def stats(self):
+        """
+        Summary by attributed function, the innermost caller of the controller.
+
+        Returns:
+            list: Dicts with the function name, the number of its controller calls
+            and the total and per phase time in seconds, sorted by total time.
+        """
+        rows = {}
+        with self._lock:
+            entries = list(self._entries.items())
+        for stack, (vme_calls, *times) in entries:
+            function = stack[-2] if len(stack) > 1 else stack[-1]
+            row = rows.get(function)
+            if row is None:
+                row = rows[function] = dict(function=function, vme_calls=0)
+                row.update((phase, 0.0) for phase in PHASES)
+            row["vme_calls"] += vme_calls
+            for phase, time in zip(PHASES, times):
+                row[phase] += time
+        for row in rows.values():
+            row["total"] = sum(row[phase] for phase in PHASES)
+        return sorted(rows.values(), key=lambda row: row["total"], reverse=True)
+
+    def print_stats(self, file=None, limit=None):
+        """ Print the summary as a table similar to the pstats output """
+        file = sys.stdout if file is None else file
+        print(
+            f"{'vme_calls':>10} {'total':>10} {'python':>10} "
+            f"{'lock':>10} {'marshal':>10} {'driver':>10}  function",
+            file=file,
+        )
+        for row in self.stats()[:limit]:
+            print(
+                f"{row['vme_calls']:>10} {row['total']:>10.6f} "
+                f"{row['python']:>10.6f} {row['lock']:>10.6f} "
+                f"{row['marshalling']:>10.6f} {row['driver']:>10.6f}  "
+                f"{row['function']}",
+                file=file,
+            )
+
+    def collapsed(self):
+        """
+        Format the times in the collapsed stack format of flame graph tools.
+
+        Returns:
+            str: One line per stack and phase with the time in microseconds.
+        """
+        lines = []
+        with self._lock:
+            entries = list(self._entries.items())
+        for stack, (_, *times) in entries:
+            for phase, time in zip(PHASES, times):
+                microseconds = round(time * 1e6)
+                if microseconds > 0:
+                    lines.append(f"{';'.join(stack + (phase,))} {microseconds}")
+        return "\n".join(lines) + "\n"
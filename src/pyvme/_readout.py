@@ -0,0 +1,278 @@
+import glob
+import mmap
+import os
+import struct
+from queue import Empty, Queue
+from threading import Event, Thread
+from time import perf_counter, time
+
+
+# Header of every buffer in the output files: size, sequence number, timestamp
+RECORD = struct.Struct("<QQd")
+
+
+class _ChunkedFile:
+    """
+    Output split into memory-mapped files of a fixed maximum size.
+
+    The files are named <path>.000000, <path>.000001, ... and truncated to the
+    used size once full.
+    """
+
+    def __init__(self, path, chunk_size):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.chunks = 0
+        self._file = None
+        self._map = None
+        self._position = 0
+
+    def _open(self):
+        name = f"{self.path}.{self.chunks:06d}"
+        self.chunks += 1
+        self._file = open(name, "w+b")
+        self._file.truncate(self.chunk_size)
+        self._map = mmap.mmap(self._file.fileno(), self.chunk_size)
+        self._position = 0
+
+    def write(self, buffer, size, sequence, timestamp):
+        if self._map is not None:
+            if self._position + RECORD.size + size > self.chunk_size:
+                self.close()
+        if self._map is None:
+            self._open()
+        position = self._position
+        RECORD.pack_into(self._map, position, size, sequence, timestamp)
+        position += RECORD.size
+        self._map[position : position + size] = memoryview(buffer)[:size]
+        self._position = position + size
+
+    def close(self):
+        if self._map is None:
+            return
+        self._map.close()
+        self._file.truncate(self._position)
+        self._file.close()
+        self._map = None
+        self._file = None
+
+
+def read_records(path):
+    """
+    Iterate over the buffers written by a `ReadoutPipeline`.
+
+    Args:
+        path (str): Output path passed to the pipeline.
+
+    Yields:
+        tuple: Sequence number, timestamp and data (bytes) of every buffer.
+    """
+    for name in sorted(glob.glob(f"{glob.escape(path)}.[0-9]*")):
+        with open(name, "rb") as f:
+            content = f.read()
+        position = 0
+        while position + RECORD.size <= len(content):
+            size, sequence, timestamp = RECORD.unpack_from(content, position)
+            position += RECORD.size
+            yield sequence, timestamp, content[position : position + size]
+            position += size
+
+
+class ReadoutPipeline:
+    """
+    Continuous block readout into memory-mapped files.
+
+    A reader thread fills a pool of preallocated buffers with `read` and a writer
+    thread appends the filled buffers to chunked output files (see
+    `read_records`) before returning them to the pool. The buffers are passed
+    between the threads without copies, the bus is not stalled by disk I/O as
+    long as free buffers are available. If the writer falls behind, the reader
+    either waits for a free buffer (backpressure) or, with `drop` enabled, keeps
+    reading into a scratch buffer and drops the data.
+
+    Example:
+        pipeline = ReadoutPipeline(
+            lambda buffer: module.drain_fifo(0x1000, buffer), "/data/run42"
+        )
+        with pipeline:
+            sleep(60)
+        print(pipeline.stats)
+
+    Args:
+        read (callable): Called with a buffer to fill, returns the number of bytes
+            read. Zero means no data was available.
+        path (str): Prefix of the output files.
+        buffer_size (int): Size of the buffers in bytes.
+        num_buffers (int): Number of buffers in the pool.
+        chunk_size (int): Maximum size of an output file in bytes.
+        drop (bool): Drop data instead of waiting if no buffer is free.
+        wait (callable): Called before every read, e.g. to wait for an interrupt,
+            the read is skipped if it returns False.
+        idle_sleep (float): Time in seconds to sleep after a read without data.
+    """
+
+    def __init__(
+        self,
+        read,
+        path,
+        buffer_size=1 << 20,
+        num_buffers=8,
+        chunk_size=1 << 28,
+        drop=False,
+        wait=None,
+        idle_sleep=0.001,
+    ):
+        if chunk_size < buffer_size + RECORD.size:
+            raise ValueError("The chunk size must hold at least one buffer")
+        self.read = read
+        self.path = path
+        self.drop = drop
+        self.wait = wait
+        self.idle_sleep = idle_sleep
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._output = _ChunkedFile(path, chunk_size)
+        self._free = Queue()
+        for _ in range(num_buffers):
+            self._free.put(bytearray(buffer_size))
+        self._full = Queue()
+        self._scratch = bytearray(buffer_size) if drop else None
+        self._stop = Event()
+        self._reader = Thread(target=self._read_loop, name="pyvme-readout", daemon=True)
+        self._writer = Thread(target=self._write_loop, name="pyvme-writer", daemon=True)
+        self.error = None
+        self._buffers_read = 0
+        self._bytes_read = 0
+        self._buffers_written = 0
+        self._bytes_written = 0
+        self._dropped = 0
+        self._dropped_bytes = 0
+        self._empty_reads = 0
+        self._errors = 0
+        self._backpressure = 0
+        self._backpressure_time = 0.0
+        self._queue_max = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.stop()
+
+    def start(self):
+        """ Start the reader and writer threads """
+        self._writer.start()
+        self._reader.start()
+
+    def stop(self):
+        """ Stop reading, write the pending buffers and close the output """
+        self._stop.set()
+        if self._reader.is_alive():
+            self._reader.join()
+        if self._writer.is_alive():
+            self._writer.join()
+
+    @property
+    def running(self):
+        return self._reader.is_alive()
+
+    @property
+    def stats(self):
+        """
+        Readout statistics.
+
+        Returns:
+            dict: Number of buffers and bytes read, written and dropped, reads
+            without data, failed reads (see `error` for the last exception), how
+            often and how long in seconds the reader waited for a free buffer,
+            the current and maximum number of buffers waiting to be written and
+            the number of output files.
+        """
+        return dict(
+            buffers_read=self._buffers_read,
+            bytes_read=self._bytes_read,
+            buffers_written=self._buffers_written,
+            bytes_written=self._bytes_written,
+            dropped=self._dropped,
+            dropped_bytes=self._dropped_bytes,
+            empty_reads=self._empty_reads,
+            errors=self._errors,
+            backpressure=self._backpressure,
+            backpressure_time=self._backpressure_time,
+            queued=self._full.qsize(),
+            queued_max=self._queue_max,
+            files=self._output.chunks,
+        )
+
+    def _next_buffer(self):
+        """ Get a free buffer, None to drop the data or if stopped """
+        try:
+            return self._free.get_nowait()
+        except Empty:
+            if self.drop:
+                return None
+        self._backpressure += 1
+        start = perf_counter()
+        buffer = None
+        while buffer is None and not self._stop.is_set():
+            try:
+                buffer = self._free.get(timeout=0.1)
+            except Empty:
+                pass
+        self._backpressure_time += perf_counter() - start
+        return buffer
+
+    def _read_loop(self):
+        sequence = 0
+        try:
+            while not self._stop.is_set():
+                if self.wait is not None and not self.wait():
+                    continue
+                buffer = self._next_buffer()
+                if buffer is None and not self.drop:
+                    break
+                try:
+                    size = self.read(self._scratch if buffer is None else buffer)
+                except Exception as e:
+                    self.error = e
+                    self._errors += 1
+                    size = 0
+                if not size:
+                    if buffer is not None:
+                        self._free.put(buffer)
+                    self._empty_reads += 1
+                    if self.idle_sleep:
+                        self._stop.wait(self.idle_sleep)
+                    continue
+                sequence += 1
+                self._buffers_read += 1
+                self._bytes_read += size
+                if buffer is None:
+                    self._dropped += 1
+                    self._dropped_bytes += size
+                    continue
+                self._full.put((buffer, size, sequence, time()))
+                self._queue_max = max(self._queue_max, self._full.qsize())
+        finally:
+            self._full.put(None)
+
+    def _write_loop(self):
+        try:
+            while True:
+                item = self._full.get()
+                if item is None:
+                    break
+                buffer, size, sequence, timestamp = item
+                self._output.write(buffer, size, sequence, timestamp)
+                self._buffers_written += 1
+                self._bytes_written += size
+                self._free.put(buffer)
+        except Exception as e:
+            # Output failures end the readout
+            self.error = e
+            self._errors += 1
+            self._stop.set()
+        finally:
+            self._output.close()
@@ -0,0 +1,121 @@
+from ctypes import byref, c_int32
+from itertools import count
+from threading import Lock, RLock
+from .exceptions import check_error
+from ._locks import LinkLock
+
+
+_generations = count(1)
+
+
+class SharedHandle:
+    """
+    CAENVME handle of one link/board shared by all controllers using it.
+
+    Attributes:
+        handle (c_int32): The driver handle.
+        lock (LinkLock): Lock serializing the access to the handle, every
+            controller waits for it with its own timeout (see `LinkLockView`).
+        generation (int): Bumped whenever cached module state becomes invalid,
+            unique across re-initializations of the handle.
+        references (int): Number of open users of the handle.
+    """
+
+    def __init__(self, key, backend, handle):
+        self.key = key
+        self.backend = backend
+        self.handle = handle
+        self.lock = LinkLock()
+        self.generation = next(_generations)
+        self.references = 0
+
+
+class HandleRegistry:
+    """
+    Process-wide registry handing out reference counted CAENVME handles.
+
+    Controllers for the same backend, board type, link and board share one handle
+    (and its lock), the handle is closed with CAENVME_End when the last user
+    releases it.
+    """
+
+    def __init__(self):
+        # Reentrant, a controller collected while the lock is held releases its
+        # handle from __del__ in the same thread
+        self._lock = RLock()
+        self._handles = {}
+        self._init_locks = {}
+        self._prewarmed = []
+
+    def acquire(self, backend, board_type, link, board):
+        """
+        Get the shared handle of a link, initializing it if needed.
+
+        Returns:
+            SharedHandle: The handle, release it with `release`.
+        """
+        key = (backend, board_type, link, board)
+        with self._lock:
+            shared = self._handles.get(key)
+            if shared is not None:
+                shared.references += 1
+                return shared
+            init_lock = self._init_locks.setdefault(key, Lock())
+        # Only the initialization of the same link is serialized, the registry lock
+        # is not held during the driver call which may block for a while
+        with init_lock:
+            with self._lock:
+                shared = self._handles.get(key)
+                if shared is not None:
+                    shared.references += 1
+                    return shared
+            handle = c_int32()
+            check_error(
+                backend.CAENVME_Init(board_type.value, link, board, byref(handle))
+            )
+            shared = SharedHandle(key, backend, handle)
+            shared.references = 1
+            with self._lock:
+                self._handles[key] = shared
+                self._init_locks.pop(key, None)
+            return shared
+
+    def release(self, shared):
+        """ Drop a reference to a handle, closing it if it was the last one """
+        with self._lock:
+            shared.references -= 1
+            if shared.references > 0:
+                return
+            del self._handles[shared.key]
+        shared.backend.CAENVME_End(shared.handle)
+
+    def prewarm(self, links, backend):
+        """
+        Initialize handles ahead of time so the first controller does not pay the
+        initialization latency. The handles stay open until `release_prewarmed`.
+
+        Args:
+            links (list): (BoardTypes, link, board) tuples to open.
+            backend: Backend providing the CAENVME_* entry points.
+        """
+        for board_type, link, board in links:
+            self._prewarmed.append(self.acquire(backend, board_type, link, board))
+
+    def release_prewarmed(self):
+        """ Release the references held for prewarmed handles """
+        prewarmed, self._prewarmed = self._prewarmed, []
+        for shared in prewarmed:
+            self.release(shared)
+
+    @property
+    def open_handles(self):
+        """
+        Returns:
+            dict: Number of references by (backend, board type, link, board).
+        """
+        with self._lock:
+            handles = dict(self._handles)
+        return {key: shared.references for key, shared in handles.items()}
+
+
+handle_registry = HandleRegistry()
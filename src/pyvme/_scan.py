@@ -0,0 +1,277 @@
+import json
+import os
+from threading import Lock
+from ._identity import save_json
+from ._vmetypes import AddressModifier, DataWidth
+from .modules import V895, V2495, V6533
+
+
+# Size of the CR/CSR space of one slot, the space of slot n starts at n << 19
+SLOT_SIZE = 0x80000
+# Byte offsets in the configuration ROM, values are stored in every fourth byte
+_SIGNATURE = (0x1F, 0x23)
+_MANUFACTURER_ID = (0x27, 0x2B, 0x2F)
+_BOARD_ID = (0x33, 0x37, 0x3B, 0x3F)
+_REVISION = (0x43, 0x47, 0x4B, 0x4F)
+_ROM_FIELDS = _SIGNATURE[1:] + _MANUFACTURER_ID + _BOARD_ID + _REVISION
+
+
+def _join(data):
+    """ Combine the bytes of a ROM field, most significant first """
+    value = 0
+    for byte in data:
+        value = (value << 8) | (byte & 0xFF)
+    return value
+
+
+def _probe_register(module_class):
+    """ Offset read to detect a module at a base address """
+    if module_class.PROBE_REGISTER is not None:
+        return module_class.PROBE_REGISTER
+    register = module_class.IDENTITY.get(module_class.SERIAL_NUMBER, 0)
+    return register[0] if isinstance(register, tuple) else register
+
+
+class ScanResult:
+    """
+    Module found by a crate scan.
+
+    Attributes:
+        module_class (type): pyvme module class, None if the IDs are unknown.
+        slot (int): Slot of the module, None if found by probing an address.
+        address (int): Base address of the module, None if only found in CR/CSR
+            space. CAEN modules usually take it from rotary switches.
+        manufacturer_id (int): Manufacturer ID from the configuration ROM.
+        board_id (int): Board ID from the configuration ROM.
+        revision (int): Revision ID from the configuration ROM.
+    """
+
+    def __init__(
+        self,
+        module_class,
+        slot=None,
+        address=None,
+        manufacturer_id=None,
+        board_id=None,
+        revision=None,
+    ):
+        self.module_class = module_class
+        self.slot = slot
+        self.address = address
+        self.manufacturer_id = manufacturer_id
+        self.board_id = board_id
+        self.revision = revision
+
+    def __repr__(self):
+        name = None if self.module_class is None else self.module_class.__name__
+        address = None if self.address is None else f"0x{self.address:08X}"
+        return f"ScanResult({name}, slot={self.slot}, address={address})"
+
+    def create(self, controller, address=None, **kwargs):
+        """
+        Create the module object for the found module.
+
+        Args:
+            controller (VMEController): Controller of the crate.
+            address (int): Base address, required if it was not found by the scan.
+
+        Returns:
+            VMEModule: The module.
+        """
+        address = self.address if address is None else address
+        if self.module_class is None or address is None:
+            raise ValueError(f"Cannot create a module for {self!r}")
+        return self.module_class(controller, address, **kwargs)
+
+    def to_dict(self):
+        module_class = self.module_class
+        return dict(
+            module_class=None if module_class is None else module_class.__name__,
+            slot=self.slot,
+            address=self.address,
+            manufacturer_id=self.manufacturer_id,
+            board_id=self.board_id,
+            revision=self.revision,
+        )
+
+    @classmethod
+    def from_dict(cls, data, classes):
+        """
+        Args:
+            data (dict): Result as returned by `to_dict`.
+            classes (dict): Module classes by name.
+        """
+        data = dict(data)
+        data["module_class"] = classes.get(data["module_class"])
+        return cls(**data)
+
+
+class CrateScanner:
+    """
+    Discover the modules of a crate.
+
+    Modules with a VME64 configuration ROM are found in CR/CSR space and mapped to
+    the module classes by their `MANUFACTURER_ID` and `BOARD_ID`. Modules without
+    one can be found by probing candidate base addresses. All slots or candidates
+    are read with a single multi-cycle call each, bus errors of empty slots are
+    only reported as error codes.
+
+    Example:
+        scanner = CrateScanner(controller, cache_path="~/.cache/pyvme/scan.json")
+        results = scanner.scan(candidates=[(V895, 0x200000)])
+
+    Args:
+        controller (VMEController): Controller of the crate.
+        classes (list): Module classes to identify, defaults to the pyvme modules.
+        cache_path (str): JSON file the scan results are stored in, keyed by
+            bridge type, link and board. Scans found there are not repeated unless
+            the slots, candidates or module classes differ.
+    """
+
+    def __init__(self, controller, classes=None, cache_path=None):
+        self.controller = controller
+        if classes is None:
+            classes = [V6533, V895, V2495]
+        self.classes = {module_class.__name__: module_class for module_class in classes}
+        self._by_id = {
+            (module_class.MANUFACTURER_ID, module_class.BOARD_ID): module_class
+            for module_class in classes
+            if module_class.BOARD_ID is not None
+        }
+        self.cache_path = None if cache_path is None else os.path.expanduser(cache_path)
+        self._lock = Lock()
+
+    @property
+    def key(self):
+        """ Key of the scanned crate in the cache """
+        controller = self.controller
+        return f"{controller.board_type.name}/{controller.link}/{controller.board}"
+
+    def scan(self, slots=range(1, 22), candidates=(), refresh=False):
+        """
+        Scan the crate, or return the cached result of an earlier scan.
+
+        Args:
+            slots (iterable): Slots to scan in CR/CSR space.
+            candidates (iterable): (module class, base address) pairs to probe.
+            refresh (bool): Scan even if a cached result exists.
+
+        Returns:
+            list: `ScanResult` of every found module.
+        """
+        slots, candidates = list(slots), list(candidates)
+        parameters = self._parameters(slots, candidates)
+        if not refresh:
+            cached = self._load().get(self.key)
+            if isinstance(cached, dict) and all(
+                cached.get(name) == value for name, value in parameters.items()
+            ):
+                return [
+                    ScanResult.from_dict(data, self.classes)
+                    for data in cached["results"]
+                ]
+        results = self.scan_cr_csr(slots) + self.probe(candidates)
+        if self.cache_path is not None:
+            with self._lock:
+                entries = self._load()
+                entries[self.key] = dict(
+                    parameters, results=[result.to_dict() for result in results]
+                )
+                save_json(self.cache_path, entries)
+        return results
+
+    def _parameters(self, slots, candidates):
+        """ Scan parameters stored with a cached result, as JSON values """
+        return {
+            "slots": slots,
+            "candidates": [[cls.__name__, address] for cls, address in candidates],
+            "classes": sorted(self.classes),
+        }
+
+    def scan_cr_csr(self, slots=range(1, 22)):
+        """
+        Identify the modules in the given slots by their configuration ROM.
+
+        Returns:
+            list: `ScanResult` of every slot with a configuration ROM.
+        """
+        slots = list(slots)
+        data, errors = self.controller.read_many(
+            [slot * SLOT_SIZE + _SIGNATURE[0] for slot in slots],
+            DataWidth.D8,
+            AddressModifier.CR_CSR,
+        )
+        occupied = [
+            slot
+            for slot, value, error in zip(slots, data, errors)
+            if error == 0 and value & 0xFF == ord("C")
+        ]
+        if not occupied:
+            return []
+
+        data, errors = self.controller.read_many(
+            [slot * SLOT_SIZE + offset for slot in occupied for offset in _ROM_FIELDS],
+            DataWidth.D8,
+            AddressModifier.CR_CSR,
+        )
+        results = []
+        size = len(_ROM_FIELDS)
+        for i, slot in enumerate(occupied):
+            fields = data[i * size : (i + 1) * size]
+            if any(errors[i * size : (i + 1) * size]) or fields[0] & 0xFF != ord("R"):
+                continue
+            manufacturer_id = _join(fields[1:4])
+            board_id = _join(fields[4:8])
+            results.append(
+                ScanResult(
+                    self._by_id.get((manufacturer_id, board_id)),
+                    slot=slot,
+                    manufacturer_id=manufacturer_id,
+                    board_id=board_id,
+                    revision=_join(fields[8:12]),
+                )
+            )
+        return results
+
+    def probe(self, candidates):
+        """
+        Probe candidate base addresses, e.g. the known A24 bases of modules
+        without configuration ROM.
+
+        Args:
+            candidates (iterable): (module class, base address) pairs.
+
+        Returns:
+            list: `ScanResult` of every candidate that responded.
+        """
+        candidates = list(candidates)
+        if not candidates:
+            return []
+        _, errors = self.controller.read_many(
+            [address + _probe_register(cls) for cls, address in candidates],
+            [cls.DATA_WIDTH for cls, _ in candidates],
+            [cls.ADDRESS_MODIFIER for cls, _ in candidates],
+        )
+        return [
+            ScanResult(cls, address=address)
+            for (cls, address), error in zip(candidates, errors)
+            if error == 0
+        ]
+
+    def clear_cache(self):
+        """ Forget the cached scan of this crate """
+        if self.cache_path is None:
+            return
+        with self._lock:
+            entries = self._load()
+            if entries.pop(self.key, None) is not None:
+                save_json(self.cache_path, entries)
+
+    def _load(self):
+        if self.cache_path is None:
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
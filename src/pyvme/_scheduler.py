@@ -0,0 +1,416 @@
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from enum import IntEnum
+from threading import Condition, Thread, get_ident
+from time import perf_counter
+from ._vmetypes import AddressModifier, DataWidth
+from ._worker import _chain
+
+
+_READ = 0
+_WRITE = 1
+_CALL = 2
+_BLOCK = 3
+
+
+class Priority(IntEnum):
+    """
+    Priority classes of scheduled requests, lower values are served first.
+
+    Attributes:
+        CRITICAL (int): Safety relevant accesses, e.g. status and trip reads.
+        NORMAL (int): Regular slow control.
+        BULK (int): Readout and other bulk transfers.
+    """
+
+    CRITICAL = 0
+    NORMAL = 1
+    BULK = 2
+
+
+class _Request:
+    __slots__ = ("kind", "arguments", "client", "future", "submitted", "started")
+
+    def __init__(self, kind, arguments, client):
+        self.kind = kind
+        self.arguments = arguments
+        self.client = client
+        self.future = Future()
+        self.submitted = perf_counter()
+        self.started = False
+
+
+class _BlockTransfer:
+    """ Block transfer executed in chunks by the scheduler """
+
+    __slots__ = ("method", "address", "view", "size", "options", "fifo", "done")
+
+    def __init__(self, method, address, buffer, size, options, fifo):
+        self.method = method
+        self.address = address
+        self.view = memoryview(buffer).cast("B")
+        self.size = self.view.nbytes if size is None else size
+        if not 0 < self.size <= self.view.nbytes:
+            raise ValueError(
+                f"Transfer size {self.size} does not fit buffer of "
+                f"{self.view.nbytes} bytes"
+            )
+        self.options = options
+        self.fifo = fifo
+        self.done = 0
+
+    def step(self, controller, chunk_size):
+        """
+        Transfer the next chunk.
+
+        Returns:
+            bool: True if the transfer is complete, either because all bytes were
+            transferred or the module ended the transfer early.
+        """
+        length = min(chunk_size, self.size - self.done)
+        address = self.address if self.fifo else self.address + self.done
+        count = getattr(controller, self.method)(
+            address, self.view[self.done : self.done + length], length, *self.options
+        )
+        self.done += count
+        return count < length or self.done >= self.size
+
+
+class LinkScheduler:
+    """
+    Thread serving the requests to one link by priority with per-client fairness.
+
+    Requests of a higher priority class are always served first. Within a class
+    the clients, by default the submitting threads, are served round-robin. Single
+    cycles are coalesced into multi-cycle calls (see `VMEBatch`) and block
+    transfers are split into chunks of `chunk_size` bytes, so a request of a higher
+    priority waits at most for one chunk or batch to finish.
+
+    Accesses bypassing the scheduler still go through the controller lock, but are
+    not ordered with the scheduled requests.
+
+    Example:
+        scheduler = LinkScheduler(controller)
+        readout = scheduler.mblt_read(0x200000, buffer, client="daq")
+        status = scheduler.submit(hv.snapshot, priority=Priority.CRITICAL)
+
+    Args:
+        controller (VMEController): Controller of the link.
+        max_cycles (int): Maximum number of cycles per multi-cycle call.
+        chunk_size (int): Maximum number of bytes per block transfer call, a
+            multiple of 8.
+    """
+
+    def __init__(self, controller, max_cycles=256, chunk_size=0x1000):
+        if chunk_size <= 0 or chunk_size % 8:
+            raise ValueError("The chunk size must be a positive multiple of 8")
+        self.controller = controller
+        self.max_cycles = max_cycles
+        self.chunk_size = chunk_size
+        self.driver_calls = 0
+        self.chunks = 0
+        self._condition = Condition()
+        self._queues = {priority: OrderedDict() for priority in Priority}
+        self._depth = {priority: 0 for priority in Priority}
+        self._running = True
+        self.reset_stats()
+        self._thread = Thread(target=self._run, name="pyvme-scheduler", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.stop()
+
+    @property
+    def depth(self):
+        """ Number of queued requests of all priorities """
+        return sum(self._depth.values())
+
+    def reset_stats(self):
+        """ Reset the queue depth and wait time statistics """
+        self._depth_max = {priority: 0 for priority in Priority}
+        self._requests = {priority: 0 for priority in Priority}
+        self._wait_total = {priority: 0.0 for priority in Priority}
+        self._wait_max = {priority: 0.0 for priority in Priority}
+
+    @property
+    def stats(self):
+        """
+        Queue statistics by priority class.
+
+        Returns:
+            dict: Per priority name the current and maximum queue depth, the number
+            of started requests and the total/max time in seconds they waited
+            between submission and the start of their execution.
+        """
+        return {
+            priority.name: dict(
+                depth=self._depth[priority],
+                depth_max=self._depth_max[priority],
+                requests=self._requests[priority],
+                wait_total=self._wait_total[priority],
+                wait_max=self._wait_max[priority],
+            )
+            for priority in Priority
+        }
+
+    def read(
+        self,
+        address,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+        priority=Priority.NORMAL,
+        client=None,
+    ):
+        """
+        Queue a read cycle.
+
+        Returns:
+            Future: Resolves to the read value.
+        """
+        return self._put(_READ, (address, width, modifier), priority, client)
+
+    def write(
+        self,
+        address,
+        data,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+        priority=Priority.NORMAL,
+        client=None,
+    ):
+        """
+        Queue a write cycle.
+
+        Returns:
+            Future: Resolves to None once written.
+        """
+        return self._put(_WRITE, (address, data, width, modifier), priority, client)
+
+    def submit(self, func, *args, priority=Priority.NORMAL, client=None, **kwargs):
+        """
+        Execute a function in the scheduler thread, e.g. a module method.
+
+        The function is executed as a whole and is not preempted.
+
+        Returns:
+            Future: Resolves to the return value of the function.
+        """
+        return self._put(_CALL, (func, args, kwargs), priority, client)
+
+    def blt_read(
+        self,
+        address,
+        buffer,
+        size=None,
+        width=DataWidth.D32,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK,
+        fifo=False,
+        priority=Priority.BULK,
+        client=None,
+    ):
+        """
+        Queue a chunked BLT read into a caller-supplied buffer.
+
+        Args:
+            fifo (bool): Read a FIFO at a single address (see
+                `VMEController.fifo_blt_read`), the transfer ends once it is empty.
+
+        Returns:
+            Future: Resolves to the number of bytes transferred.
+        """
+        method = "fifo_blt_read" if fifo else "blt_read"
+        transfer = _BlockTransfer(
+            method, address, buffer, size, (width, modifier), fifo
+        )
+        return self._put(_BLOCK, transfer, priority, client)
+
+    def mblt_read(
+        self,
+        address,
+        buffer,
+        size=None,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK_64,
+        fifo=False,
+        priority=Priority.BULK,
+        client=None,
+    ):
+        """
+        Queue a chunked MBLT read into a caller-supplied buffer.
+
+        Returns:
+            Future: Resolves to the number of bytes transferred.
+        """
+        method = "fifo_mblt_read" if fifo else "mblt_read"
+        transfer = _BlockTransfer(method, address, buffer, size, (modifier,), fifo)
+        return self._put(_BLOCK, transfer, priority, client)
+
+    def blt_write(
+        self,
+        address,
+        buffer,
+        size=None,
+        width=DataWidth.D32,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK,
+        priority=Priority.BULK,
+        client=None,
+    ):
+        """
+        Queue a chunked BLT write.
+
+        Returns:
+            Future: Resolves to the number of bytes transferred.
+        """
+        transfer = _BlockTransfer(
+            "blt_write", address, buffer, size, (width, modifier), False
+        )
+        return self._put(_BLOCK, transfer, priority, client)
+
+    def mblt_write(
+        self,
+        address,
+        buffer,
+        size=None,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_BLOCK_64,
+        priority=Priority.BULK,
+        client=None,
+    ):
+        """
+        Queue a chunked MBLT write.
+
+        Returns:
+            Future: Resolves to the number of bytes transferred.
+        """
+        transfer = _BlockTransfer(
+            "mblt_write", address, buffer, size, (modifier,), False
+        )
+        return self._put(_BLOCK, transfer, priority, client)
+
+    def stop(self):
+        """ Execute the queued requests and stop the scheduler thread """
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
+
+    def _put(self, kind, arguments, priority, client):
+        priority = Priority(priority)
+        request = _Request(kind, arguments, get_ident() if client is None else client)
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("The scheduler is stopped")
+            clients = self._queues[priority]
+            pending = clients.get(request.client)
+            if pending is None:
+                pending = clients[request.client] = deque()
+            pending.append(request)
+            self._depth[priority] += 1
+            self._depth_max[priority] = max(
+                self._depth_max[priority], self._depth[priority]
+            )
+            self._condition.notify()
+        return request.future
+
+    def _select(self):
+        """
+        Take the next requests to execute, called with the condition held.
+
+        Returns:
+            tuple: The priority, the single cycles and calls removed from the queue
+            and the block transfer to continue, which stays queued until finished.
+        """
+        priority = next(priority for priority in Priority if self._queues[priority])
+        clients = self._queues[priority]
+        requests = []
+        while clients and len(requests) < self.max_cycles:
+            client, pending = next(iter(clients.items()))
+            request = pending[0]
+            if request.kind == _BLOCK:
+                if requests:
+                    break
+                clients.move_to_end(client)
+                return priority, requests, request
+            if request.kind == _CALL and requests:
+                break
+            pending.popleft()
+            self._depth[priority] -= 1
+            requests.append(request)
+            if pending:
+                clients.move_to_end(client)
+            else:
+                del clients[client]
+            if request.kind == _CALL:
+                break
+        return priority, requests, None
+
+    def _start(self, priority, request):
+        """ Mark a request as running and record its wait time """
+        if not request.future.set_running_or_notify_cancel():
+            return False
+        request.started = True
+        wait = perf_counter() - request.submitted
+        self._requests[priority] += 1
+        self._wait_total[priority] += wait
+        self._wait_max[priority] = max(self._wait_max[priority], wait)
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self.depth:
+                    self._condition.wait()
+                if not self.depth:
+                    return
+                priority, requests, block = self._select()
+            if block is not None:
+                self._step(priority, block)
+            else:
+                self._execute(priority, requests)
+
+    def _execute(self, priority, requests):
+        batch = self.controller.batch(self.max_cycles)
+        for request in requests:
+            if not self._start(priority, request):
+                continue
+            if request.kind == _CALL:
+                func, args, kwargs = request.arguments
+                self.driver_calls += 1
+                try:
+                    request.future.set_result(func(*args, **kwargs))
+                except Exception as e:
+                    request.future.set_exception(e)
+                continue
+            method = batch.read if request.kind == _READ else batch.write
+            method(*request.arguments).add_done_callback(
+                lambda f, future=request.future: _chain(f, future)
+            )
+        if len(batch):
+            try:
+                self.driver_calls += batch.flush()
+            except Exception:
+                # The exception is set on the futures of the affected cycles
+                pass
+
+    def _step(self, priority, request):
+        finished = True
+        if request.started or self._start(priority, request):
+            transfer = request.arguments
+            self.driver_calls += 1
+            self.chunks += 1
+            try:
+                finished = transfer.step(self.controller, self.chunk_size)
+            except Exception as e:
+                request.future.set_exception(e)
+            else:
+                if finished:
+                    request.future.set_result(transfer.done)
+        if finished:
+            with self._condition:
+                clients = self._queues[priority]
+                pending = clients[request.client]
+                pending.popleft()
+                self._depth[priority] -= 1
+                if not pending:
+                    del clients[request.client]
@@ -0,0 +1,162 @@
+from concurrent.futures import Future
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread
+from ._vmetypes import AddressModifier, DataWidth
+
+
+_READ = 0
+_WRITE = 1
+_CALL = 2
+_STOP = 3
+
+
+def _chain(source, target):
+    """ Forward the outcome of one future to another """
+    if target.cancelled():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class LinkWorker:
+    """
+    Thread serializing the hardware access to one link.
+
+    Single cycles queued while the link is busy are coalesced into multi-cycle calls
+    (see `VMEBatch`), other operations are executed in submission order.
+
+    Args:
+        controller (VMEController): Controller of the link.
+        max_cycles (int): Maximum number of cycles per multi-cycle call.
+    """
+
+    def __init__(self, controller, max_cycles=256):
+        self.controller = controller
+        self.max_cycles = max_cycles
+        self.driver_calls = 0
+        self.cycles = 0
+        self._queue = SimpleQueue()
+        self._lock = Lock()
+        self._stopped = False
+        self._thread = Thread(target=self._run, name="pyvme-link", daemon=True)
+        self._thread.start()
+
+    def read(
+        self,
+        address,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        """
+        Queue a read cycle.
+
+        Returns:
+            Future: Resolves to the read value.
+        """
+        return self._put(_READ, (address, width, modifier))
+
+    def write(
+        self,
+        address,
+        data,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        """
+        Queue a write cycle.
+
+        Returns:
+            Future: Resolves to None once written.
+        """
+        return self._put(_WRITE, (address, data, width, modifier))
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Execute a function in the worker thread.
+
+        Returns:
+            Future: Resolves to the return value of the function.
+        """
+        return self._put(_CALL, (func, args, kwargs))
+
+    def stop(self):
+        """
+        Execute the queued operations and stop the worker thread.
+
+        Operations submitted afterwards fail with RuntimeError.
+        """
+        with self._lock:
+            if not self._stopped:
+                self._stopped = True
+                self._queue.put((_STOP, None, None))
+        self._thread.join()
+
+    def _put(self, kind, arguments):
+        future = Future()
+        with self._lock:
+            if not self._stopped:
+                self._queue.put((kind, arguments, future))
+                return future
+        future.set_exception(RuntimeError("worker stopped"))
+        return future
+
+    def _fail(self, items):
+        """ Fail the futures of operations left after the stop request """
+        for _, _, future in items:
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("worker stopped"))
+
+    def _run(self):
+        running = True
+        while running:
+            items = [self._queue.get()]
+            try:
+                while True:
+                    items.append(self._queue.get_nowait())
+            except Empty:
+                pass
+
+            batch = self.controller.batch(self.max_cycles)
+            for i, (kind, arguments, future) in enumerate(items):
+                if kind == _READ:
+                    batch.read(*arguments).add_done_callback(
+                        lambda f, future=future: _chain(f, future)
+                    )
+                elif kind == _WRITE:
+                    batch.write(*arguments).add_done_callback(
+                        lambda f, future=future: _chain(f, future)
+                    )
+                else:
+                    self._flush(batch)
+                    if kind == _STOP:
+                        running = False
+                        self._fail(items[i + 1 :])
+                        break
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    func, args, kwargs = arguments
+                    self.driver_calls += 1
+                    try:
+                        future.set_result(func(*args, **kwargs))
+                    except Exception as e:
+                        future.set_exception(e)
+            self._flush(batch)
+        try:
+            while True:
+                self._fail([self._queue.get_nowait()])
+        except Empty:
+            pass
+
+    def _flush(self, batch):
+        if not len(batch):
+            return
+        self.cycles += len(batch)
+        try:
+            self.driver_calls += batch.flush()
+        except Exception:
+            # The exception is set on the futures of the affected cycles
+            pass
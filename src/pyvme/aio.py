@@ -0,0 +1,175 @@
+"""
+asyncio front-end for the VME controllers and modules.
+
+All hardware access of a controller is serialized by a dedicated worker thread, so
+the event loop is never blocked. Single cycles awaited concurrently are coalesced
+into multi-cycle driver calls while the link is busy.
+
+Example:
+    controller = AsyncVMEController(V2718())
+    hv = AsyncV6533(V6533(controller.controller, 0x100000), controller)
+    voltages = await asyncio.gather(*(hv.read(0x80 * i + 0x88) for i in range(6)))
+"""
+import asyncio
+from ._vmetypes import AddressModifier, DataWidth
+from ._worker import LinkWorker
+
+
+class AsyncVMEController:
+    """
+    Awaitable wrapper around a `VMEController`.
+
+    Args:
+        controller (VMEController): The controller to wrap.
+        max_cycles (int): Maximum number of coalesced cycles per driver call.
+    """
+
+    def __init__(self, controller, max_cycles=256):
+        self.controller = controller
+        self.worker = LinkWorker(controller, max_cycles)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type_, value, traceback):
+        await self.close()
+
+    async def close(self):
+        """ Finish the queued operations and stop the worker thread """
+        await asyncio.get_running_loop().run_in_executor(None, self.worker.stop)
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Execute a blocking function (e.g. a module method) in the link worker.
+        """
+        return await asyncio.wrap_future(self.worker.submit(func, *args, **kwargs))
+
+    async def read(
+        self,
+        address,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        return await asyncio.wrap_future(self.worker.read(address, width, modifier))
+
+    async def write(
+        self,
+        address,
+        data,
+        width=DataWidth.D16,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+    ):
+        await asyncio.wrap_future(self.worker.write(address, data, width, modifier))
+
+    async def read_many(self, *args, **kwargs):
+        return await self.run(self.controller.read_many, *args, **kwargs)
+
+    async def write_many(self, *args, **kwargs):
+        return await self.run(self.controller.write_many, *args, **kwargs)
+
+    async def blt_read(self, *args, **kwargs):
+        return await self.run(self.controller.blt_read, *args, **kwargs)
+
+    async def mblt_read(self, *args, **kwargs):
+        return await self.run(self.controller.mblt_read, *args, **kwargs)
+
+    async def fifo_blt_read(self, *args, **kwargs):
+        return await self.run(self.controller.fifo_blt_read, *args, **kwargs)
+
+    async def fifo_mblt_read(self, *args, **kwargs):
+        return await self.run(self.controller.fifo_mblt_read, *args, **kwargs)
+
+    async def blt_write(self, *args, **kwargs):
+        return await self.run(self.controller.blt_write, *args, **kwargs)
+
+    async def mblt_write(self, *args, **kwargs):
+        return await self.run(self.controller.mblt_write, *args, **kwargs)
+
+
+class AsyncVMEModule:
+    """
+    Awaitable wrapper around a `VMEModule` sharing the worker of its controller.
+
+    Args:
+        module (VMEModule): The module to wrap.
+        controller (AsyncVMEController): Async controller of the module's link.
+    """
+
+    def __init__(self, module, controller):
+        self.module = module
+        self.controller = controller
+
+    async def run(self, func, *args, **kwargs):
+        return await self.controller.run(func, *args, **kwargs)
+
+    async def read(self, address, width=None):
+        self.module._check_range(address)
+        return await self.controller.read(
+            self.module.base_address + address,
+            self.module.width if width is None else width,
+            self.module.modifier,
+        )
+
+    async def write(self, address, data, width=None):
+        self.module._check_range(address)
+        await self.controller.write(
+            self.module.base_address + address,
+            data,
+            self.module.width if width is None else width,
+            self.module.modifier,
+        )
+        self.module.shadow[address] = data
+
+    async def read_many(self, *args, **kwargs):
+        return await self.run(self.module.read_many, *args, **kwargs)
+
+    async def write_many(self, *args, **kwargs):
+        return await self.run(self.module.write_many, *args, **kwargs)
+
+    async def blt_read(self, *args, **kwargs):
+        return await self.run(self.module.blt_read, *args, **kwargs)
+
+    async def mblt_read(self, *args, **kwargs):
+        return await self.run(self.module.mblt_read, *args, **kwargs)
+
+    async def fifo_blt_read(self, *args, **kwargs):
+        return await self.run(self.module.fifo_blt_read, *args, **kwargs)
+
+    async def fifo_mblt_read(self, *args, **kwargs):
+        return await self.run(self.module.fifo_mblt_read, *args, **kwargs)
+
+    async def drain_fifo(self, *args, **kwargs):
+        return await self.run(self.module.drain_fifo, *args, **kwargs)
+
+    async def blt_write(self, *args, **kwargs):
+        return await self.run(self.module.blt_write, *args, **kwargs)
+
+    async def mblt_write(self, *args, **kwargs):
+        return await self.run(self.module.mblt_write, *args, **kwargs)
+
+    async def identity(self):
+        return await self.run(lambda: self.module.identity)
+
+
+class AsyncV6533(AsyncVMEModule):
+    """ Awaitable wrapper around a `V6533` """
+
+    async def snapshot(self):
+        return await self.run(self.module.snapshot)
+
+
+class AsyncV895(AsyncVMEModule):
+    """ Awaitable wrapper around a `V895` """
+
+    async def apply(self, config, resync=False):
+        return await self.run(self.module.apply, config, resync)
+
+
+class AsyncV2495(AsyncVMEModule):
+    """ Awaitable wrapper around a `V2495` """
+
+    async def read_scalers(self, out=None, latch=True):
+        return await self.run(self.module.read_scalers, out, latch)
+
+    async def read_fifo(self, *args, **kwargs):
+        return await self.run(self.module.read_fifo, *args, **kwargs)
@@ -0,0 +1,660 @@
+"""
+Local VME access broker sharing the bridges between several processes.
+
+The broker owns the controllers and serves single, multi-cycle and block transfers
+over a Unix domain socket. Single cycles of concurrent clients are coalesced into
+multi-cycle driver calls by the per-link worker, large block transfer payloads are
+exchanged through shared memory.
+
+Run the broker with:
+    python -m pyvme.broker /run/pyvme.sock
+
+and use `BrokerController` as drop-in replacement for `VMEController`:
+    controller = BrokerController("/run/pyvme.sock", BoardTypes.V2718)
+
+Protocol (little endian): requests are a header (opcode u8, payload length u32)
+followed by the payload, responses a header (error code i32, payload length u32)
+followed by the payload. See the OP_* constants for the payload layouts.
+"""
+import argparse
+import os
+import socket
+import socketserver
+import struct
+from contextlib import contextmanager
+from ctypes import byref, c_int, memmove, string_at
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock, RLock, Thread
+from ._bindings import as_int as _int, deref as _deref
+from ._controllers import VMEController, _transfer_buffer, load_library
+from ._vmetypes import AddressModifier, BoardTypes, DataWidth
+from ._worker import LinkWorker
+from .exceptions import code_from_error
+
+
+# Request payloads / response payloads
+OP_OPEN = 1  # board type i32, link i32, board i32 / token u32
+OP_CLOSE = 2  # token u32 / -
+OP_READ = 3  # token u32, address u32, modifier u8, width u8 / data u32
+OP_WRITE = 4  # token u32, address u32, data u32, modifier u8, width u8 / -
+OP_MULTI_READ = 5  # token u32, n u32, n x (address u32, modifier u8, width u8) /
+# n x (data u32, error i32)
+OP_MULTI_WRITE = 6  # token u32, n u32, n x (address, data u32, modifier, width u8) /
+# n x error i32
+OP_BLOCK_READ = 7  # token u32, address u32, size u32, modifier u8, width u8, mode u8,
+# shared memory name / count u32, data (if no shared memory), also sent with the
+# error code of a transfer ended early
+OP_BLOCK_WRITE = 8  # token u32, address u32, size u32, modifier u8, width u8,
+# mode u8, name length u16, shared memory name, data (if no shared memory) / count u32
+
+MODE_BLT = 0
+MODE_MBLT = 1
+MODE_FIFO_BLT = 2
+MODE_FIFO_MBLT = 3
+
+# Block payloads from this size on are exchanged through shared memory
+SHARED_MEMORY_THRESHOLD = 64 * 1024
+
+_REQUEST = struct.Struct("<BI")
+_RESPONSE = struct.Struct("<iI")
+_OPEN = struct.Struct("<iii")
+_TOKEN = struct.Struct("<I")
+_READ = struct.Struct("<IIBB")
+_WRITE = struct.Struct("<IIIBB")
+_MULTI = struct.Struct("<II")
+_MULTI_READ_CYCLE = struct.Struct("<IBB")
+_MULTI_READ_RESULT = struct.Struct("<Ii")
+_MULTI_WRITE_CYCLE = struct.Struct("<IIBB")
+_ERROR = struct.Struct("<i")
+_BLOCK = struct.Struct("<IIIBBB")
+_NAME_LENGTH = struct.Struct("<H")
+
+SUCCESS = 0
+BUS_ERROR = -1
+INVALID_PARAMETER = -4
+
+
+def _receive(connection, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def _attach(name):
+    """
+    Attach to a shared memory segment owned by a client.
+    """
+    segment = SharedMemory(name)
+    # The segment is owned (and unlinked) by the client, do not let the resource
+    # tracker of this process remove it
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class _BrokerHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.tokens = set()
+        self.segments = {}
+
+    def handle(self):
+        broker = self.server.broker
+        while True:
+            try:
+                opcode, length = _REQUEST.unpack(_receive(self.request, _REQUEST.size))
+                payload = _receive(self.request, length)
+            except ConnectionError:
+                return
+            try:
+                code, response = broker._execute(self, opcode, payload)
+            except Exception as e:
+                code, response = code_from_error(e), b""
+            self.request.sendall(_RESPONSE.pack(code, len(response)) + response)
+
+    def finish(self):
+        for token in self.tokens:
+            self.server.broker._close(token)
+        for segment in self.segments.values():
+            segment.close()
+
+
+class _BrokerServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class VMEBroker:
+    """
+    Broker owning the VME controllers and serving clients over a Unix socket.
+
+    Args:
+        path (str): Path of the Unix domain socket.
+        backend: Backend of the controllers, defaults to the CAEN VME library.
+    """
+
+    def __init__(self, path, backend=None):
+        self.path = path
+        self.backend = load_library() if backend is None else backend
+        self._lock = Lock()
+        self._links = {}
+        self._tokens = {}
+        self._next_token = 0
+        if os.path.exists(path):
+            os.unlink(path)
+        self._server = _BrokerServer(path, _BrokerHandler)
+        self._server.broker = self
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        """ Serve the clients in a background thread """
+        self._thread = Thread(
+            target=self.serve_forever, name="pyvme-broker", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        """ Stop serving and close all controllers """
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        with self._lock:
+            for controller, worker, _ in self._links.values():
+                worker.stop()
+                controller.close()
+            self._links = {}
+            self._tokens = {}
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _open(self, board_type, link, board):
+        key = (BoardTypes(board_type), link, board)
+        with self._lock:
+            if key not in self._links:
+                controller = VMEController(*key, backend=self.backend)
+                self._links[key] = [controller, LinkWorker(controller), 0]
+            self._links[key][2] += 1
+            self._next_token += 1
+            self._tokens[self._next_token] = key
+            return self._next_token
+
+    def _close(self, token):
+        with self._lock:
+            key = self._tokens.pop(token, None)
+            if key is None:
+                return INVALID_PARAMETER
+            self._links[key][2] -= 1
+            if self._links[key][2] > 0:
+                return SUCCESS
+            controller, worker, _ = self._links.pop(key)
+        worker.stop()
+        controller.close()
+        return SUCCESS
+
+    def _link(self, token):
+        with self._lock:
+            return self._links[self._tokens[token]]
+
+    def _execute(self, client, opcode, payload):
+        if opcode == OP_OPEN:
+            token = self._open(*_OPEN.unpack(payload))
+            client.tokens.add(token)
+            return SUCCESS, _TOKEN.pack(token)
+        if opcode == OP_CLOSE:
+            (token,) = _TOKEN.unpack(payload)
+            client.tokens.discard(token)
+            return self._close(token), b""
+
+        (token,) = _TOKEN.unpack_from(payload)
+        try:
+            controller, worker, _ = self._link(token)
+        except KeyError:
+            return INVALID_PARAMETER, b""
+
+        if opcode == OP_READ:
+            _, address, modifier, width = _READ.unpack(payload)
+            future = worker.read(address, DataWidth(width), AddressModifier(modifier))
+            return SUCCESS, _TOKEN.pack(future.result())
+        if opcode == OP_WRITE:
+            _, address, data, modifier, width = _WRITE.unpack(payload)
+            worker.write(
+                address, data, DataWidth(width), AddressModifier(modifier)
+            ).result()
+            return SUCCESS, b""
+        if opcode == OP_MULTI_READ:
+            cycles = _MULTI_READ_CYCLE.iter_unpack(payload[_MULTI.size :])
+            addresses, modifiers, widths = zip(*cycles)
+            data, errors = worker.submit(
+                controller.read_many,
+                addresses,
+                [DataWidth(width) for width in widths],
+                [AddressModifier(modifier) for modifier in modifiers],
+            ).result()
+            return SUCCESS, b"".join(map(_MULTI_READ_RESULT.pack, data, errors))
+        if opcode == OP_MULTI_WRITE:
+            cycles = _MULTI_WRITE_CYCLE.iter_unpack(payload[_MULTI.size :])
+            addresses, data, modifiers, widths = zip(*cycles)
+            errors = worker.submit(
+                controller.write_many,
+                addresses,
+                data,
+                [DataWidth(width) for width in widths],
+                [AddressModifier(modifier) for modifier in modifiers],
+            ).result()
+            return SUCCESS, b"".join(map(_ERROR.pack, errors))
+        if opcode == OP_BLOCK_READ:
+            _, address, size, modifier, width, mode = _BLOCK.unpack_from(payload)
+            name = payload[_BLOCK.size :].decode()
+            buffer = self._segment(client, token, name).buf if name else bytearray(size)
+            code, count = worker.submit(
+                self._block,
+                controller,
+                False,
+                mode,
+                address,
+                buffer,
+                size,
+                modifier,
+                width,
+            ).result()
+            # Transfers ended early by a bus error still return the data read
+            return code, _TOKEN.pack(count) + (b"" if name else bytes(buffer[:count]))
+        if opcode == OP_BLOCK_WRITE:
+            _, address, size, modifier, width, mode = _BLOCK.unpack_from(payload)
+            (length,) = _NAME_LENGTH.unpack_from(payload, _BLOCK.size)
+            start = _BLOCK.size + _NAME_LENGTH.size
+            name = payload[start : start + length].decode()
+            buffer = (
+                self._segment(client, token, name).buf
+                if name
+                else payload[start + length :]
+            )
+            code, count = worker.submit(
+                self._block,
+                controller,
+                True,
+                mode,
+                address,
+                buffer,
+                size,
+                modifier,
+                width,
+            ).result()
+            return code, _TOKEN.pack(count)
+        return INVALID_PARAMETER, b""
+
+    @staticmethod
+    def _segment(client, token, name):
+        """
+        Shared memory segment of a handle, reattached when the client replaced it.
+        """
+        segment = client.segments.get(token)
+        if segment is None or segment.name != name:
+            if segment is not None:
+                segment.close()
+            segment = client.segments[token] = _attach(name)
+        return segment
+
+    @staticmethod
+    def _block(controller, write, mode, address, buffer, size, modifier, width):
+        """
+        Run a block transfer, returning the driver return code and the byte count.
+
+        The entry points are called directly, the `VMEController` methods raise on
+        errors or drop the return code of a transfer ended early.
+        """
+        backend = controller.backend
+        if write:
+            function = (
+                backend.CAENVME_MBLTWriteCycle
+                if mode == MODE_MBLT
+                else backend.CAENVME_BLTWriteCycle
+            )
+        else:
+            function = {
+                MODE_BLT: backend.CAENVME_BLTReadCycle,
+                MODE_MBLT: backend.CAENVME_MBLTReadCycle,
+                MODE_FIFO_BLT: backend.CAENVME_FIFOBLTReadCycle,
+                MODE_FIFO_MBLT: backend.CAENVME_FIFOMBLTReadCycle,
+            }[mode]
+        if mode in (MODE_MBLT, MODE_FIFO_MBLT):
+            options = (modifier,)
+        else:
+            options = (modifier, width)
+        target = _transfer_buffer(buffer, size, writable=not write)
+        count = c_int()
+        with controller._lock:
+            code = function(
+                controller.handle, address, target, len(target), *options, byref(count)
+            )
+        return code, count.value
+
+
+class _Connection:
+    """
+    Broker connection carrying the requests of a single handle.
+
+    Args:
+        path (str): Path of the broker socket.
+    """
+
+    def __init__(self, path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+        self.lock = Lock()
+        # Shared memory segment, reused by the block transfers of the handle one at
+        # a time
+        self.segment = None
+        self.segment_lock = Lock()
+
+    def close(self):
+        self.socket.close()
+        with self.segment_lock:
+            segment, self.segment = self.segment, None
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+
+    def request(self, opcode, payload):
+        with self.lock:
+            self.socket.sendall(_REQUEST.pack(opcode, len(payload)) + payload)
+            code, length = _RESPONSE.unpack(_receive(self.socket, _RESPONSE.size))
+            return code, _receive(self.socket, length)
+
+    @contextmanager
+    def shared_memory(self, size):
+        """
+        Hold the shared memory segment for one block transfer.
+
+        Yields:
+            SharedMemory: Segment of at least `size` bytes, None below
+            `SHARED_MEMORY_THRESHOLD`.
+        """
+        if size < SHARED_MEMORY_THRESHOLD:
+            yield None
+            return
+        with self.segment_lock:
+            if self.segment is None or self.segment.size < size:
+                segment, self.segment = self.segment, None
+                if segment is not None:
+                    segment.close()
+                    segment.unlink()
+                self.segment = SharedMemory(create=True, size=size)
+            yield self.segment
+
+
+class BrokerBackend:
+    """
+    Backend forwarding the CAENVME_* entry points to a `VMEBroker`.
+
+    Every handle gets its own connection, the broker serves connections in separate
+    threads so that the transfers of different links do not wait for each other.
+
+    Args:
+        path (str): Path of the broker socket.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        self._connections = {}
+
+    @property
+    def connected(self):
+        """ Whether a handle is open through this backend """
+        with self._lock:
+            return bool(self._connections)
+
+    def close(self):
+        """ Close the connections of all handles """
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for connection in connections.values():
+            connection.close()
+
+    def _connection(self, handle):
+        with self._lock:
+            return self._connections.get(_int(handle))
+
+    def _request(self, handle, opcode, payload):
+        connection = self._connection(handle)
+        if connection is None:
+            return INVALID_PARAMETER, b""
+        return connection.request(opcode, payload)
+
+    def CAENVME_Init(self, board_type, link, board, handle):
+        connection = _Connection(self.path)
+        code, payload = connection.request(
+            OP_OPEN, _OPEN.pack(_int(board_type), _int(link), _int(board))
+        )
+        if code != SUCCESS:
+            connection.close()
+            return code
+        (token,) = _TOKEN.unpack(payload)
+        with self._lock:
+            self._connections[token] = connection
+        _deref(handle).value = token
+        return code
+
+    def CAENVME_End(self, handle):
+        with self._lock:
+            connection = self._connections.pop(_int(handle), None)
+        if connection is None:
+            return INVALID_PARAMETER
+        try:
+            return connection.request(OP_CLOSE, _TOKEN.pack(_int(handle)))[0]
+        finally:
+            connection.close()
+
+    def CAENVME_ReadCycle(self, handle, address, data, modifier, width):
+        code, payload = self._request(
+            handle, OP_READ, _READ.pack(_int(handle), address, modifier, width)
+        )
+        if code == SUCCESS:
+            (_deref(data).value,) = _TOKEN.unpack(payload)
+        return code
+
+    def CAENVME_WriteCycle(self, handle, address, data, modifier, width):
+        return self._request(
+            handle,
+            OP_WRITE,
+            _WRITE.pack(_int(handle), address, _int(data), modifier, width),
+        )[0]
+
+    def CAENVME_MultiRead(
+        self, handle, addresses, data, num_cycles, modifiers, widths, errors
+    ):
+        payload = _MULTI.pack(_int(handle), num_cycles) + b"".join(
+            _MULTI_READ_CYCLE.pack(addresses[i], modifiers[i], widths[i])
+            for i in range(num_cycles)
+        )
+        code, payload = self._request(handle, OP_MULTI_READ, payload)
+        if code != SUCCESS:
+            return code
+        result = SUCCESS
+        for i, (value, error) in enumerate(_MULTI_READ_RESULT.iter_unpack(payload)):
+            data[i] = value
+            errors[i] = error
+            result = result or error
+        return result
+
+    def CAENVME_MultiWrite(
+        self, handle, addresses, data, num_cycles, modifiers, widths, errors
+    ):
+        payload = _MULTI.pack(_int(handle), num_cycles) + b"".join(
+            _MULTI_WRITE_CYCLE.pack(addresses[i], data[i], modifiers[i], widths[i])
+            for i in range(num_cycles)
+        )
+        code, payload = self._request(handle, OP_MULTI_WRITE, payload)
+        if code != SUCCESS:
+            return code
+        result = SUCCESS
+        for i, (error,) in enumerate(_ERROR.iter_unpack(payload)):
+            errors[i] = error
+            result = result or error
+        return result
+
+    def _block_read(self, handle, address, buffer, size, modifier, width, count, mode):
+        handle, size = _int(handle), _int(size)
+        connection = self._connection(handle)
+        if connection is None:
+            return INVALID_PARAMETER
+        with connection.shared_memory(size) as segment:
+            name = segment.name.encode() if segment is not None else b""
+            code, payload = connection.request(
+                OP_BLOCK_READ,
+                _BLOCK.pack(handle, address, size, modifier, width, mode) + name,
+            )
+            if payload:
+                (transferred,) = _TOKEN.unpack_from(payload)
+                source = segment.buf if segment is not None else payload[_TOKEN.size :]
+                memmove(buffer, bytes(source[:transferred]), transferred)
+                _deref(count).value = transferred
+        return code
+
+    def _block_write(self, handle, address, buffer, size, modifier, width, count, mode):
+        handle, size = _int(handle), _int(size)
+        connection = self._connection(handle)
+        if connection is None:
+            return INVALID_PARAMETER
+        data = string_at(buffer, size)
+        with connection.shared_memory(size) as segment:
+            if segment is not None:
+                segment.buf[:size] = data
+                name, data = segment.name.encode(), b""
+            else:
+                name = b""
+            code, payload = connection.request(
+                OP_BLOCK_WRITE,
+                _BLOCK.pack(handle, address, size, modifier, width, mode)
+                + _NAME_LENGTH.pack(len(name))
+                + name
+                + data,
+            )
+        if payload:
+            (_deref(count).value,) = _TOKEN.unpack(payload)
+        return code
+
+    def CAENVME_BLTReadCycle(
+        self, handle, address, buffer, size, modifier, width, count
+    ):
+        return self._block_read(
+            handle, address, buffer, size, modifier, width, count, MODE_BLT
+        )
+
+    def CAENVME_MBLTReadCycle(self, handle, address, buffer, size, modifier, count):
+        return self._block_read(
+            handle, address, buffer, size, modifier, 0, count, MODE_MBLT
+        )
+
+    def CAENVME_FIFOBLTReadCycle(
+        self, handle, address, buffer, size, modifier, width, count
+    ):
+        return self._block_read(
+            handle, address, buffer, size, modifier, width, count, MODE_FIFO_BLT
+        )
+
+    def CAENVME_FIFOMBLTReadCycle(self, handle, address, buffer, size, modifier, count):
+        return self._block_read(
+            handle, address, buffer, size, modifier, 0, count, MODE_FIFO_MBLT
+        )
+
+    def CAENVME_BLTWriteCycle(
+        self, handle, address, buffer, size, modifier, width, count
+    ):
+        return self._block_write(
+            handle, address, buffer, size, modifier, width, count, MODE_BLT
+        )
+
+    def CAENVME_MBLTWriteCycle(self, handle, address, buffer, size, modifier, count):
+        return self._block_write(
+            handle, address, buffer, size, modifier, 0, count, MODE_MBLT
+        )
+
+
+# Backends by broker socket path, shared by the controllers of a process and
+# dropped once the last handle of a backend is closed
+_backends = {}
+# Reentrant, a controller may be closed by the garbage collector while held
+_backends_lock = RLock()
+
+
+def _release_backend(path):
+    with _backends_lock:
+        backend = _backends.get(path)
+        if backend is None or backend.connected:
+            return
+        del _backends[path]
+    backend.close()
+
+
+class BrokerController(VMEController):
+    """
+    Drop-in replacement for `VMEController` accessing the bridge through a broker.
+
+    Args:
+        path (str): Path of the broker socket.
+        controller_board_type (BoardTypes): Type of the VME bridge.
+        link (int): Link number.
+        board (int): Board number on the link.
+        lock_timeout (float): Maximum time in seconds to wait for the link lock.
+    """
+
+    def __init__(
+        self,
+        path,
+        controller_board_type=BoardTypes.V2718,
+        link=0,
+        board=0,
+        lock_timeout=5.0,
+    ):
+        self._broker_path = path
+        with _backends_lock:
+            if path not in _backends:
+                _backends[path] = BrokerBackend(path)
+            backend = _backends[path]
+        try:
+            super().__init__(controller_board_type, link, board, lock_timeout, backend)
+        except Exception:
+            _release_backend(path)
+            raise
+
+    def close(self):
+        """ Release the driver handle, the cached backend is dropped with the last one """
+        super().close()
+        path = self.__dict__.get("_broker_path")
+        if path is not None:
+            _release_backend(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Share VME bridges between processes")
+    parser.add_argument("path", help="Path of the Unix domain socket")
+    parser.add_argument("--library", default="libCAENVME.so")
+    args = parser.parse_args(argv)
+
+    broker = VMEBroker(args.path, load_library(args.library))
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -14,19 +14,66 @@ class InvalidParameterError(Exception):
     pass
 
 
-def check_error(error_code):
+class BatchError(Exception):
     """
-    Check the error code of a VME communication and raise the appropriate exception.
+    Cycles of a batch failed.
+
+    Attributes:
+        errors (dict): Exception of every failed cycle by address.
+        results (dict): Results of the cycles that succeeded by address, if known.
+    """
+
+    def __init__(self, errors, results=None):
+        self.errors = dict(errors)
+        self.results = {} if results is None else dict(results)
+        failed = ", ".join(
+            f"0x{address:X} ({type(error).__name__})"
+            for address, error in sorted(self.errors.items())
+        )
+        super().__init__(f"{len(self.errors)} cycles failed: {failed}")
+
+
+def error_from_code(error_code):
+    """
+    Get the exception matching the error code of a VME communication.
+
+    Returns:
+        Exception: Exception instance or None if the code signals success.
     """
     if error_code == 0:
-        return
+        return None
     if error_code == -1:
-        raise BusError()
+        return BusError()
     if error_code == -2:
-        raise CommunicationError()
+        return CommunicationError()
     if error_code == -3:
-        raise GenericError()
+        return GenericError()
     if error_code == -4:
-        raise InvalidParameterError()
+        return InvalidParameterError()
     if error_code == -5:
-        raise TimeoutError()
+        return TimeoutError()
+    return GenericError(error_code)
+
+
+def code_from_error(error):
+    """
+    Get the error code matching an exception raised for a VME communication.
+    """
+    if isinstance(error, BusError):
+        return -1
+    if isinstance(error, CommunicationError):
+        return -2
+    if isinstance(error, InvalidParameterError):
+        return -4
+    if isinstance(error, TimeoutError):
+        return -5
+    return -3
+
+
+def check_error(error_code):
+    """
+    Check the error code of a VME communication and raise the appropriate exception.
+    """
+    if error_code == 0:
+        return
+    raise error_from_code(error_code)
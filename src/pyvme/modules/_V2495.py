@@ -1,8 +1,289 @@
-from time import sleep
+from time import perf_counter, sleep, time
 from enum import Enum
-from ..vme import VMEModule
+from .._vmetypes import AddressModifier, DataWidth
+from ..exceptions import check_error
+from ..vme import CAEN_MANUFACTURER_ID, VMEModule
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class V2495(VMEModule):
-    def __init__(self, controller, address):
-        super().__init__(controller, address)
+    """
+    V2495 programmable logic unit.
+
+    The main FPGA registers and the configuration ROM are at fixed offsets, the
+    user FPGA registers are mapped to `USER_WINDOW`. The offsets of the gate and
+    delay generator and the scaler blocks follow the CAEN demo firmware, override
+    them in a subclass for other firmware.
+    """
+
+    ADDRESS_MODIFIER = AddressModifier.A32_NON_PRIVILEGED_DATA
+    DATA_WIDTH = DataWidth.D32
+    MANUFACTURER_ID = CAEN_MANUFACTURER_ID
+    BOARD_ID = 2495
+
+    # Main FPGA registers (16 bit)
+    CONTROL = 0x8000
+    STATUS = 0x8002
+    INTERRUPT_LEVEL = 0x8004
+    INTERRUPT_ID = 0x8006
+    GEO_ADDRESS = 0x8008
+    MODULE_RESET = 0x800A
+    IDENTITY = {
+        "firmware_release": 0x800C,
+        "board_version": 0x8130,
+        "serial_number_high": 0x8180,
+        "serial_number_low": 0x8184,
+    }
+    # The serial number is split over two registers, no identity cache lookup
+    SERIAL_NUMBER = None
+    # Firmware release, the offsets below the main FPGA registers depend on the
+    # user firmware
+    PROBE_REGISTER = 0x800C
+
+    # Offsets [start, end) of the user FPGA registers
+    USER_WINDOW = (0x1000, 0x8000)
+
+    # Gate and delay generator: delay and width per channel in steps of GATE_STEP ns
+    NUM_GATES = 32
+    GATE_DELAY = 0x1400
+    GATE_WIDTH = 0x1500
+    GATE_STEP = 10
+    GATE_MAX = 0xFFFF
+
+    # Scalers: 32-bit counters, latched into consecutive registers for readout
+    NUM_SCALERS = 32
+    SCALER_ENABLE = 0x1000
+    SCALER_RESET = 0x1004
+    SCALER_LATCH = 0x1008
+    SCALER_COUNTS = 0x1100
+
+    # Event FIFO of the user firmware
+    FIFO = 0x2000
+
+    def __init__(self, controller, address, **kwargs):
+        super().__init__(controller, address, **kwargs)
+
+    @property
+    def firmware_release(self):
+        release = self.identity["firmware_release"]
+        return (release >> 8, release & 0xFF)
+
+    @property
+    def board_version(self):
+        return self.identity["board_version"] & 0xFF
+
+    @property
+    def serial_number(self):
+        identity = self.identity
+        return (identity["serial_number_high"] & 0xFF) << 8 | (
+            identity["serial_number_low"] & 0xFF
+        )
+
+    @property
+    def geo_address(self):
+        return self.read(self.GEO_ADDRESS, DataWidth.D16) & 0x1F
+
+    @property
+    def control(self):
+        return self.read(self.CONTROL, DataWidth.D16)
+
+    @control.setter
+    def control(self, value):
+        self.write(self.CONTROL, int(value), DataWidth.D16)
+
+    @property
+    def status(self):
+        return self.read(self.STATUS, DataWidth.D16)
+
+    @property
+    def interrupt_level(self):
+        return self.read(self.INTERRUPT_LEVEL, DataWidth.D16) & 0x07
+
+    @interrupt_level.setter
+    def interrupt_level(self, level):
+        level = int(level)
+        if not 0 <= level <= 7:
+            raise ValueError("Interrupt level needs to be between 0 and 7")
+        self.write(self.INTERRUPT_LEVEL, level, DataWidth.D16)
+
+    @property
+    def interrupt_id(self):
+        return self.read(self.INTERRUPT_ID, DataWidth.D16)
+
+    @interrupt_id.setter
+    def interrupt_id(self, vector):
+        self.write(self.INTERRUPT_ID, int(vector) & 0xFF, DataWidth.D16)
+
+    def reset(self):
+        """ Reset the module, the shadow registers are cleared """
+        self.write(self.MODULE_RESET, 1, DataWidth.D16)
+        self.clear_shadow()
+
+    def _check_user(self, offset):
+        start, end = self.USER_WINDOW
+        if not 0 <= offset < end - start:
+            raise ValueError(
+                f"Offset 0x{offset:X} outside of the user FPGA window "
+                f"(size 0x{end - start:X})"
+            )
+        return start + offset
+
+    def user_read(self, offset):
+        """ Read a 32-bit register of the user FPGA, relative to `USER_WINDOW` """
+        return self.read(self._check_user(offset))
+
+    def user_write(self, offset, value):
+        """ Write a 32-bit register of the user FPGA, relative to `USER_WINDOW` """
+        self.write(self._check_user(offset), value)
+
+    def _gate_registers(self, channel, delay, width):
+        channel = int(channel)
+        if not 0 <= channel < self.NUM_GATES:
+            raise ValueError(f"Channel needs to be between 0 and {self.NUM_GATES - 1}")
+        limit = self.GATE_MAX * self.GATE_STEP
+        registers = []
+        for name, offset, value in (
+            ("Delay", self.GATE_DELAY, delay),
+            ("Width", self.GATE_WIDTH, width),
+        ):
+            steps = int(round(float(value) / self.GATE_STEP))
+            if not 0 <= steps <= self.GATE_MAX:
+                raise ValueError(f"{name} out of range, allowed 0-{limit} ns")
+            registers.append((offset + 0x04 * channel, steps))
+        return registers
+
+    def gate(self, channel):
+        """
+        Get the delay and width of a gate and delay generator channel.
+
+        Returns:
+            tuple: Delay and width in ns.
+        """
+        channel = int(channel)
+        if not 0 <= channel < self.NUM_GATES:
+            raise ValueError(f"Channel needs to be between 0 and {self.NUM_GATES - 1}")
+        data, errors = self.read_many(
+            [self.GATE_DELAY + 0x04 * channel, self.GATE_WIDTH + 0x04 * channel]
+        )
+        for error in errors:
+            check_error(error)
+        return (data[0] * self.GATE_STEP, data[1] * self.GATE_STEP)
+
+    def set_gate(self, channel, delay, width):
+        """
+        Set the delay and width of a gate and delay generator channel.
+
+        Args:
+            channel (int): Channel 0 to NUM_GATES - 1.
+            delay (float): Delay in ns, rounded to GATE_STEP.
+            width (float): Gate width in ns, rounded to GATE_STEP.
+
+        Raises:
+            BatchError: If the delay or width could not be written.
+        """
+        with self.batch(raise_errors=True) as batch:
+            for offset, value in self._gate_registers(channel, delay, width):
+                batch.write(offset, value)
+
+    def set_gates(self, gates, resync=False):
+        """
+        Set several gate and delay generator channels, only writing the registers
+        that changed (see `VMEModule.apply_registers`).
+
+        Args:
+            gates (dict or list): (delay, width) in ns by channel, a list sets the
+                channels starting from 0.
+            resync (bool): Write everything regardless of the shadow registers.
+
+        Returns:
+            dict: The register values actually written by offset.
+
+        Raises:
+            BatchError: If any write failed, with the exceptions by offset in
+                `errors` and the register values written anyway in `results`.
+        """
+        if not isinstance(gates, dict):
+            gates = dict(enumerate(gates))
+        registers = {}
+        for channel, (delay, width) in gates.items():
+            registers.update(self._gate_registers(channel, delay, width))
+        return self.apply_registers(registers, resync)
+
+    def enable_scalers(self, enabled=True):
+        self.write(self.SCALER_ENABLE, int(bool(enabled)))
+
+    def disable_scalers(self):
+        self.enable_scalers(False)
+
+    def reset_scalers(self):
+        """ Clear all counters """
+        self.write(self.SCALER_RESET, 1)
+
+    def read_scalers(self, out=None, latch=True):
+        """
+        Read all scalers with a single block transfer.
+
+        The counters are latched first, so all values belong to the same moment,
+        and then transferred into the array without intermediate copies. Counters
+        wrap around at 2**32, compute differences in uint32 arithmetic.
+
+        Args:
+            out (numpy.ndarray): Contiguous uint32 array of NUM_SCALERS entries to
+                fill, e.g. a row of a preallocated sample array.
+            latch (bool): Latch the counters before the readout.
+
+        Returns:
+            tuple: Timestamp of the latch (seconds since the epoch) and the counts
+            (numpy.ndarray of uint32).
+        """
+        if np is None:
+            raise ImportError("V2495.read_scalers requires numpy")
+        if out is None:
+            out = np.empty(self.NUM_SCALERS, dtype=np.uint32)
+        elif out.dtype != np.uint32 or out.shape != (self.NUM_SCALERS,):
+            raise ValueError(f"out needs to be a uint32 array of {self.NUM_SCALERS}")
+        timestamp = time()
+        if latch:
+            self.write(self.SCALER_LATCH, 1)
+        self.blt_read(self.SCALER_COUNTS, out, 4 * self.NUM_SCALERS)
+        return timestamp, out
+
+    def sample_scalers(self, num_samples, period=0.0):
+        """
+        Read the scalers repeatedly at a fixed period.
+
+        Args:
+            num_samples (int): Number of readouts.
+            period (float): Time between the readouts in seconds, 0 reads as fast
+                as possible.
+
+        Returns:
+            tuple: Timestamps (numpy.ndarray of float64, one per sample) and counts
+            (numpy.ndarray of uint32, num_samples x NUM_SCALERS).
+        """
+        if np is None:
+            raise ImportError("V2495.sample_scalers requires numpy")
+        timestamps = np.empty(num_samples, dtype=np.float64)
+        counts = np.empty((num_samples, self.NUM_SCALERS), dtype=np.uint32)
+        start = perf_counter()
+        for i in range(num_samples):
+            if period:
+                delay = start + i * period - perf_counter()
+                if delay > 0:
+                    sleep(delay)
+            timestamps[i], _ = self.read_scalers(counts[i])
+        return timestamps, counts
+
+    def read_fifo(self, buffer, size=None, mblt=True):
+        """
+        Read the event FIFO of the user firmware until it is empty or the buffer
+        is full (see `VMEModule.drain_fifo`).
+
+        Returns:
+            int: Number of bytes read.
+        """
+        return self.drain_fifo(self.FIFO, buffer, size, mblt)
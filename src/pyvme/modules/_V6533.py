@@ -1,6 +1,12 @@
-from time import sleep
+from time import sleep, time
 from enum import Enum
-from ..vme import VMEModule
+from ..exceptions import check_error
+from ..vme import CAEN_MANUFACTURER_ID, VMEModule
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class V6533BoardStatus(Enum):
@@ -153,11 +159,94 @@ class HVChannel:
         self.enabled = False
 
 
+class V6533Snapshot:
+    """
+    State of all channels of a V6533 at one point in time.
+
+    Every field is a NumPy array with one entry per channel, voltages are in V,
+    currents in uA and times in s.
+
+    Attributes:
+        timestamp (float): Time of the readout (seconds since the epoch).
+    """
+
+    # Field -> (channel register offset, scale, dtype); None scale keeps raw value
+    FIELDS = {
+        "voltage": (0x80, 0.1, "f8"),
+        "current_limit": (0x84, 0.05, "f8"),
+        "measured_voltage": (0x88, 0.1, "f8"),
+        "measured_current_high": (0x8C, 0.05, "f8"),
+        "enabled": (0x90, None, "?"),
+        "status": (0x94, None, "u2"),
+        "trip_time": (0x98, 0.1, "f8"),
+        "voltage_limit": (0x9C, 0.1, "f8"),
+        "ramp_down_rate": (0xA0, None, "u2"),
+        "ramp_up_rate": (0xA4, None, "u2"),
+        "power_down_mode": (0xA8, None, "?"),
+        "polarity": (0xAC, None, "i1"),
+        "temperature": (0xB0, None, "u2"),
+        "imon_range": (0xB4, None, "?"),
+        "measured_current_low": (0xB8, 0.005, "f8"),
+    }
+
+    def __init__(self, timestamp, columns):
+        self.timestamp = timestamp
+        self.columns = columns
+        for name, column in columns.items():
+            setattr(self, name, column)
+
+    @classmethod
+    def from_registers(cls, timestamp, data, num_channels):
+        """
+        Build a snapshot from the register values in channel-major order of FIELDS.
+        """
+        raw = np.asarray(data, dtype=np.int64).reshape(num_channels, len(cls.FIELDS))
+        columns = {}
+        for i, (name, (_, scale, dtype)) in enumerate(cls.FIELDS.items()):
+            column = raw[:, i] * scale if scale is not None else raw[:, i]
+            columns[name] = column.astype(dtype)
+        columns["polarity"] = np.where(columns["polarity"] != 0, 1, -1).astype("i1")
+        columns["measured_current"] = np.where(
+            columns["imon_range"],
+            columns["measured_current_low"],
+            columns["measured_current_high"],
+        )
+        return cls(timestamp, columns)
+
+    def __len__(self):
+        return len(self.status)
+
+    @property
+    def statuses(self):
+        """ Status of the channels as V6533ChannelStatus """
+        return [V6533ChannelStatus(int(status)) for status in self.status]
+
+    def channel(self, channel):
+        """
+        Get the values of a single channel.
+
+        Returns:
+            dict: Values by field name.
+        """
+        return {name: column[channel].item() for name, column in self.columns.items()}
+
+
 class V6533(VMEModule):
     NUM_CHANNELS = 6
-
-    def __init__(self, controller, address):
-        super().__init__(controller, address)
+    IDENTITY = {
+        "firmware_release": 0x005C,
+        "num_channels": 0x8100,
+        "description": (0x8102, 0x8114),
+        "model": (0x8116, 0x811C),
+        "serial_number": 0x811E,
+        "fpga_firmware_release": 0x8120,
+    }
+    PROBE_REGISTER = 0x811E
+    MANUFACTURER_ID = CAEN_MANUFACTURER_ID
+    BOARD_ID = 6533
+
+    def __init__(self, controller, address, **kwargs):
+        super().__init__(controller, address, **kwargs)
         self.channels = [HVChannel(self, i) for i in range(self.NUM_CHANNELS)]
 
     @property
@@ -175,26 +264,48 @@ class V6533(VMEModule):
 
     @property
     def firmware_release(self):
-        release = self.read(0x005C)
+        release = self.identity["firmware_release"]
         return (release >> 8, release & 0xFF)
 
     @property
     def num_channels(self):
-        return self.read(0x8100)
+        return self.identity["num_channels"]
 
     @property
     def description(self):
-        return self.read_string(0x8102, 0x8114)
+        return self.identity["description"]
 
     @property
     def model(self):
-        return self.read_string(0x8116, 0x811C)
+        return self.identity["model"]
 
     @property
     def serial_number(self):
-        return self.read(0x811E)
+        return self.identity["serial_number"]
 
     @property
     def fpga_firmware_release(self):
-        release = self.read(0x8120)
+        release = self.identity["fpga_firmware_release"]
         return (release >> 8, release & 0xFF)
+
+    def snapshot(self):
+        """
+        Read all channel registers of all channels with a single multi-cycle access.
+
+        Unlike `HVChannel.measured_current` no settling delay is added.
+
+        Returns:
+            V6533Snapshot: The state of all channels.
+        """
+        if np is None:
+            raise ImportError("V6533.snapshot requires numpy")
+        addresses = [
+            HVChannel.CHANNEL_OFFSET * channel + offset
+            for channel in range(self.NUM_CHANNELS)
+            for offset, _, _ in V6533Snapshot.FIELDS.values()
+        ]
+        timestamp = time()
+        data, errors = self.read_many(addresses)
+        for error in errors:
+            check_error(error)
+        return V6533Snapshot.from_registers(timestamp, data, self.NUM_CHANNELS)
@@ -5,53 +5,141 @@ from ..vme import VMEModule
 
 class V895(VMEModule):
     NUM_CHANNELS = 16
+    WINDOW_SIZE = 0x100
+    IDENTITY = {
+        "model": (0xFC, 0xFC),
+        "serial_number": 0xFE,
+    }
+    PROBE_REGISTER = 0xFE
 
-    def __init__(self, controller, address):
-        super().__init__(controller, address)
+    def __init__(self, controller, address, **kwargs):
+        super().__init__(controller, address, **kwargs)
 
-    def set_threshold(self, channel, value):
+    @staticmethod
+    def _threshold_register(channel, value):
         channel = int(channel)
         value = int(value)
         if not 0 <= channel < 16:
             raise ValueError("Channel needs to be between 0 and 15")
         if not 1 <= value <= 255:
             raise ValueError("Threshold out of range, allowed 1 to 255 (in mV)")
-        self.write(0x02 * channel, value)
+        return 0x02 * channel, value
 
-    def set_inhibit_pattern(self, pattern):
+    @staticmethod
+    def _inhibit_pattern_register(pattern):
         pattern = int(pattern)
         if not 0 <= pattern < 1 << 17:
             raise ValueError("Pattern out of range, allowed are only 16 bit.")
-        self.write(0x4A, pattern)
-
-    def set_output_width(self, range_, value):
-        """
-        Set output width
+        return 0x4A, pattern
 
-        Args:
-            range_ (int): Range - can be 0 (for channels 0-7) or 1 (for channels 8-15)
-            value (int): Time 0-255 corresponds to 5ns-40ns (non-linear)
-        """
+    @staticmethod
+    def _output_width_register(range_, value):
         value = int(value)
         if not 0 <= value <= 255:
             raise ValueError("Output width out of range, allowed 0-255 (5ns-40ns)")
         if range_ == 0:
-            self.write(0x40, value)
+            return 0x40, value
         elif range_ == 1:
-            self.write(0x42, value)
+            return 0x42, value
         else:
             raise ValueError("Channel range needs to be 0 or 1")
 
-    def set_majority_threshold(self, threshold):
+    @staticmethod
+    def _majority_threshold_register(threshold):
         threshold = int(threshold)
         if not 0 <= threshold <= 20:
             raise ValueError("Threshold out of range, allowed 0-20")
-        self.write(0x48, int((threshold * 50 - 25) / 4))
+        return 0x48, int((threshold * 50 - 25) / 4)
+
+    def set_threshold(self, channel, value):
+        self.write(*self._threshold_register(channel, value))
+
+    def set_thresholds(self, values):
+        """
+        Set the thresholds of several channels with a single multi-cycle access.
+
+        Args:
+            values (dict or list): Thresholds (1-255 mV) by channel, a list sets the
+                channels starting from 0.
+
+        Raises:
+            BatchError: If any threshold could not be written.
+        """
+        if not isinstance(values, dict):
+            values = dict(enumerate(values))
+        with self.batch(raise_errors=True) as batch:
+            for channel, value in values.items():
+                batch.write(*self._threshold_register(channel, value))
+
+    def set_inhibit_pattern(self, pattern):
+        self.write(*self._inhibit_pattern_register(pattern))
+
+    def set_output_width(self, range_, value):
+        """
+        Set output width
+
+        Args:
+            range_ (int): Range - can be 0 (for channels 0-7) or 1 (for channels 8-15)
+            value (int): Time 0-255 corresponds to 5ns-40ns (non-linear)
+        """
+        self.write(*self._output_width_register(range_, value))
+
+    def set_majority_threshold(self, threshold):
+        self.write(*self._majority_threshold_register(threshold))
+
+    def apply(self, config, resync=False):
+        """
+        Apply a configuration, only writing the registers that changed since the last
+        write recorded in the shadow registers. All writes are issued as one batch.
+
+        Args:
+            config (dict): Configuration with any of the keys
+                thresholds (dict or list): Thresholds in mV by channel.
+                output_width (dict or list): Output width by range (0 or 1).
+                majority_threshold (int): Majority threshold.
+                inhibit_pattern (int): Inhibit pattern.
+            resync (bool): Write everything regardless of the shadow registers, e.g.
+                after a power cycle of the module.
+
+        Returns:
+            dict: The register values actually written by offset.
+
+        Raises:
+            BatchError: If any register could not be written, see
+                `VMEModule.apply_registers`.
+        """
+        unknown = set(config) - {
+            "thresholds",
+            "output_width",
+            "majority_threshold",
+            "inhibit_pattern",
+        }
+        if unknown:
+            raise ValueError(f"Unknown configuration keys: {', '.join(unknown)}")
+
+        registers = []
+        thresholds = config.get("thresholds", {})
+        if not isinstance(thresholds, dict):
+            thresholds = dict(enumerate(thresholds))
+        for channel, value in thresholds.items():
+            registers.append(self._threshold_register(channel, value))
+        output_width = config.get("output_width", {})
+        if not isinstance(output_width, dict):
+            output_width = dict(enumerate(output_width))
+        for range_, value in output_width.items():
+            registers.append(self._output_width_register(range_, value))
+        if "majority_threshold" in config:
+            registers.append(
+                self._majority_threshold_register(config["majority_threshold"])
+            )
+        if "inhibit_pattern" in config:
+            registers.append(self._inhibit_pattern_register(config["inhibit_pattern"]))
+        return self.apply_registers(dict(registers), resync)
 
     @property
     def model(self):
-        return self.read_string(0xFC, 0xFC)
+        return self.identity["model"]
 
     @property
     def serial_number(self):
-        return self.read(0xFE)
+        return self.identity["serial_number"]
@@ -1,3 +1,3 @@
-from ._V6533 import V6533
+from ._V6533 import V6533, V6533Snapshot
 from ._V895 import V895
 from ._V2495 import V2495
@@ -0,0 +1,713 @@
+"""
+Pure-Python simulation of a VME crate behind a CAEN bridge.
+
+`SimulatedCrate` implements the CAENVME_* entry points used by pyvme and can be
+passed as backend to any controller, e.g. `V2718(backend=SimulatedCrate())`. The
+register maps of the modules are pluggable, latency and bus errors can be injected
+to measure the Python side of pyvme without hardware.
+"""
+from ctypes import memmove, string_at
+from random import Random
+from collections import deque
+from threading import Condition, Lock
+from time import perf_counter, sleep
+from .exceptions import BusError
+from ._bindings import as_int as _int, deref as _deref
+from ._vmetypes import Registers
+
+
+SUCCESS = 0
+BUS_ERROR = -1
+INVALID_PARAMETER = -4
+TIMEOUT_ERROR = -5
+
+
+def _address_space(modifier):
+    """
+    Get the address space of an address modifier code.
+
+    Returns:
+        str: One of "A16", "A24", "A32" or "CR_CSR".
+    """
+    if modifier == 0x2F:
+        return "CR_CSR"
+    if modifier in (0x29, 0x2C, 0x2D):
+        return "A16"
+    if 0x32 <= modifier <= 0x3F:
+        return "A24"
+    return "A32"
+
+
+def string_registers(text, address_start, address_end):
+    """
+    Encode a string as 16-bit registers as read by `VMEController.read_string`.
+
+    Returns:
+        dict: Register values by address.
+    """
+    length = address_end + 2 - address_start
+    text = text.encode().ljust(length)[:length]
+    return {
+        address_start + i: (text[i] << 8) | text[i + 1] for i in range(0, length, 2)
+    }
+
+
+class SimulatedModule:
+    """
+    Register map of a simulated VME module.
+
+    Registers not contained in the map read as 0 and are created on write. Override
+    `read` and `write` to simulate behaviour beyond plain memory. Reading a FIFO
+    (see `FIFOS` and `push_fifo`) pops its oldest word.
+
+    Args:
+        registers (dict): Additional or overridden register values by offset.
+    """
+
+    SPACE = "A24"
+    SIZE = 0x10000
+    REGISTERS = {}
+    # Offsets of FIFOs, reading an empty FIFO ends in a bus error
+    FIFOS = ()
+    # Identification in the configuration ROM, None for modules without CR/CSR
+    MANUFACTURER_ID = None
+    BOARD_ID = None
+    REVISION = 0
+
+    def __init__(self, registers=None):
+        self._defaults = dict(self.REGISTERS)
+        if registers:
+            self._defaults.update(registers)
+        self.reset()
+
+    def reset(self):
+        """ Restore the power-up register values and empty the FIFOs """
+        self.registers = dict(self._defaults)
+        self.fifos = {offset: deque() for offset in self.FIFOS}
+
+    def push_fifo(self, offset, values):
+        """ Append words to the FIFO at an offset """
+        self.fifos.setdefault(offset, deque()).extend(values)
+
+    def read(self, offset, width):
+        fifo = self.fifos.get(offset)
+        if fifo is not None:
+            if not fifo:
+                raise BusError()
+            return fifo.popleft() & ((1 << (8 * (width & 0x0F))) - 1)
+        return self.registers.get(offset, 0) & ((1 << (8 * (width & 0x0F))) - 1)
+
+    def write(self, offset, data, width):
+        self.registers[offset] = data & ((1 << (8 * (width & 0x0F))) - 1)
+
+
+class SimulatedConfigurationROM(SimulatedModule):
+    """
+    CR/CSR space of a VME64 module with the identification fields of the ROM.
+
+    Args:
+        manufacturer_id (int): IEEE manufacturer ID (3 bytes).
+        board_id (int): Board ID (4 bytes).
+        revision (int): Revision ID (4 bytes).
+    """
+
+    SPACE = "CR_CSR"
+    SIZE = 0x80000
+
+    def __init__(self, manufacturer_id, board_id, revision=0):
+        registers = {0x1F: ord("C"), 0x23: ord("R")}
+        for start, value, length in (
+            (0x27, manufacturer_id, 3),
+            (0x33, board_id, 4),
+            (0x43, revision, 4),
+        ):
+            for i in range(length):
+                registers[start + 4 * i] = (value >> (8 * (length - 1 - i))) & 0xFF
+        super().__init__(registers)
+
+
+class SimulatedV6533(SimulatedModule):
+    """ Simulated V6533 6 channel HV power supply """
+
+    MANUFACTURER_ID = 0x0040E6
+    BOARD_ID = 6533
+    NUM_CHANNELS = 6
+    REGISTERS = {
+        0x0050: 6000,
+        0x0054: 3000,
+        0x0058: 0,
+        0x005C: 0x0104,
+        0x8100: NUM_CHANNELS,
+        **string_registers("6 Ch Neg. 6KV 3mA", 0x8102, 0x8114),
+        **string_registers("V6533N", 0x8116, 0x811C),
+        0x811E: 1234,
+        0x8120: 0x0102,
+        **{
+            0x80 * channel + offset: value
+            for channel in range(NUM_CHANNELS)
+            for offset, value in (
+                (0x80, 0),
+                (0x84, 0),
+                (0x88, 0),
+                (0x8C, 0),
+                (0x90, 0),
+                (0x94, 11),
+                (0x98, 10),
+                (0x9C, 60000),
+                (0xA0, 50),
+                (0xA4, 50),
+                (0xA8, 0),
+                (0xAC, 0),
+                (0xB0, 25),
+                (0xB4, 0),
+                (0xB8, 0),
+            )
+        },
+    }
+
+    def write(self, offset, data, width):
+        super().write(offset, data, width)
+        channel, register = divmod(offset - 0x80, 0x80)
+        if 0 <= channel < self.NUM_CHANNELS and register in (0x00, 0x10):
+            base = 0x80 * channel + 0x80
+            enabled = self.registers[base + 0x10] == 1
+            self.registers[base + 0x08] = self.registers[base] if enabled else 0
+            self.registers[base + 0x14] = 0 if enabled else 11
+
+
+class SimulatedV895(SimulatedModule):
+    """ Simulated V895 16 channel leading edge discriminator """
+
+    REGISTERS = {
+        **{0x02 * channel: 0 for channel in range(16)},
+        0x40: 0,
+        0x42: 0,
+        0x48: 0,
+        0x4A: 0,
+        0xFA: 0xFAF5,
+        0xFC: 0x0854,
+        0xFE: 42,
+    }
+
+
+class SimulatedV2495(SimulatedModule):
+    """
+    Simulated V2495 programmable logic unit with the scaler demo firmware.
+
+    While enabled, the scalers count at `rates` (Hz per channel). Writing the latch
+    register copies the counts into the scaler registers.
+
+    Args:
+        registers (dict): Additional or overridden register values by offset.
+        rates (list): Count rates in Hz by scaler.
+    """
+
+    SPACE = "A32"
+    MANUFACTURER_ID = 0x0040E6
+    BOARD_ID = 2495
+    NUM_SCALERS = 32
+    REGISTERS = {
+        0x8008: 5,
+        0x800C: 0x0103,
+        0x8130: 0x01,
+        0x8180: 0x01,
+        0x8184: 0x2C,
+    }
+    FIFOS = (0x2000,)
+
+    def __init__(self, registers=None, rates=None):
+        if rates is None:
+            rates = [1000.0 * (scaler + 1) for scaler in range(self.NUM_SCALERS)]
+        self.rates = list(rates)
+        super().__init__(registers)
+
+    def reset(self):
+        super().reset()
+        self.counts = [0.0] * self.NUM_SCALERS
+        self._updated = perf_counter()
+
+    def _count(self):
+        now = perf_counter()
+        if self.registers.get(0x1000):
+            elapsed = now - self._updated
+            self.counts = [
+                count + rate * elapsed for count, rate in zip(self.counts, self.rates)
+            ]
+        self._updated = now
+
+    def write(self, offset, data, width):
+        if offset == 0x1000:
+            self._count()
+        elif offset == 0x1004:
+            self._count()
+            self.counts = [0.0] * self.NUM_SCALERS
+            return
+        elif offset == 0x1008:
+            self._count()
+            for scaler, count in enumerate(self.counts):
+                self.registers[0x1100 + 4 * scaler] = int(count) & 0xFFFFFFFF
+            return
+        super().write(offset, data, width)
+
+
+class SimulatedCrate:
+    """
+    Simulated crate implementing the CAENVME_* entry points of libCAENVME.
+
+    Args:
+        call_latency (float): Latency in seconds added to every driver call.
+        cycle_latency (float): Latency in seconds added for every VME cycle.
+        bus_error_rate (float): Probability for a cycle to fail with a bus error.
+        seed (int): Seed for the bus error injection.
+    """
+
+    def __init__(self, call_latency=0.0, cycle_latency=0.0, bus_error_rate=0.0, seed=0):
+        self.call_latency = call_latency
+        self.cycle_latency = cycle_latency
+        self.bus_error_rate = bus_error_rate
+        self.bus_errors = set()
+        self.modules = []
+        self.registers = {}
+        self.configurations = {}
+        self.calls = 0
+        self.cycles = 0
+        self.bus_time = 0.0
+        self._random = Random(seed)
+        self._lock = Lock()
+        self._handles = {}
+        self._next_handle = 0
+        self._irq_mask = 0
+        self._irq_pending = {}
+        self._irq_condition = Condition(self._lock)
+
+    def add_module(self, base_address, module, slot=None):
+        """
+        Install a module in the crate.
+
+        Args:
+            base_address (int): Base address of the module in its address space.
+            module (SimulatedModule): The module.
+            slot (int): Slot of the module, if given the configuration ROM of
+                modules with a board ID is mapped to the CR/CSR space of the slot.
+
+        Returns:
+            SimulatedModule: The installed module.
+        """
+        self.modules.append((module.SPACE, base_address, module))
+        if slot is not None and module.BOARD_ID is not None:
+            rom = SimulatedConfigurationROM(
+                module.MANUFACTURER_ID, module.BOARD_ID, module.REVISION
+            )
+            self.modules.append((rom.SPACE, slot << 19, rom))
+        return module
+
+    def raise_irq(self, level, vector):
+        """
+        Assert an interrupt as a module would do.
+
+        Args:
+            level (IRQLevels): Interrupt level.
+            vector (int): Vector returned by the interrupt acknowledge cycle.
+        """
+        with self._irq_condition:
+            self._irq_pending.setdefault(level.value, deque()).append(vector)
+            self._irq_condition.notify_all()
+
+    def _pending_irqs(self):
+        return sum(level for level, vectors in self._irq_pending.items() if vectors)
+
+    def _find(self, modifier, address):
+        space = _address_space(modifier)
+        for module_space, base_address, module in self.modules:
+            if module_space == space and 0 <= address - base_address < module.SIZE:
+                return module, address - base_address
+        raise BusError()
+
+    def _delay(self, cycles):
+        delay = self.call_latency + cycles * self.cycle_latency
+        with self._lock:
+            self.calls += 1
+            self.cycles += cycles
+            self.bus_time += delay
+        if delay > 0:
+            sleep(delay)
+
+    def _cycle(self, address, modifier, width, data=None):
+        """
+        Execute a single cycle, returns the read data for reads (data is None).
+        """
+        if address in self.bus_errors or (
+            self.bus_error_rate and self._random.random() < self.bus_error_rate
+        ):
+            raise BusError()
+        module, offset = self._find(modifier, address)
+        if data is None:
+            return module.read(offset, width)
+        module.write(offset, data, width)
+
+    def _block(self, address, modifier, word, size, data=None, fifo=False):
+        """
+        Execute a block transfer in words of the given number of bytes.
+
+        64-bit (MBLT) words are transferred as two 32-bit register accesses, the
+        lower address first. Only complete words are transferred.
+
+        Returns:
+            tuple: The transferred bytes and the error code.
+        """
+        result = bytearray()
+        # Register accesses per word: (byte offset in the word, width)
+        parts = ((0, 4), (4, 4)) if word == 8 else ((0, word),)
+        try:
+            for position in range(0, size - size % word, word):
+                chunk = bytearray()
+                for part, width in parts:
+                    offset = address if fifo else address + position + part
+                    if data is None:
+                        value = self._cycle(offset, modifier, width)
+                        chunk += value.to_bytes(width, "little")
+                    else:
+                        start = position + part
+                        value = int.from_bytes(data[start : start + width], "little")
+                        self._cycle(offset, modifier, width, value)
+                        chunk += data[start : start + width]
+                result += chunk
+        except BusError:
+            return result, BUS_ERROR
+        return result, SUCCESS
+
+    def _handle(self, handle):
+        return _int(handle) in self._handles
+
+    def CAENVME_Init(self, board_type, link, board, handle):
+        with self._lock:
+            self._next_handle += 1
+            self._handles[self._next_handle] = (_int(board_type), link, board)
+            _deref(handle).value = self._next_handle
+        return SUCCESS
+
+    def CAENVME_End(self, handle):
+        with self._lock:
+            if self._handles.pop(_int(handle), None) is None:
+                return INVALID_PARAMETER
+        return SUCCESS
+
+    def CAENVME_ReadCycle(self, handle, address, data, modifier, width):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        self._delay(1)
+        try:
+            with self._lock:
+                value = self._cycle(_int(address), _int(modifier), _int(width))
+        except BusError:
+            return BUS_ERROR
+        _deref(data).value = value
+        return SUCCESS
+
+    def CAENVME_WriteCycle(self, handle, address, data, modifier, width):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        self._delay(1)
+        try:
+            with self._lock:
+                self._cycle(_int(address), _int(modifier), _int(width), _int(data))
+        except BusError:
+            return BUS_ERROR
+        return SUCCESS
+
+    def CAENVME_MultiRead(
+        self, handle, addresses, data, num_cycles, modifiers, widths, errors
+    ):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        num_cycles = _int(num_cycles)
+        self._delay(num_cycles)
+        result = SUCCESS
+        with self._lock:
+            for i in range(num_cycles):
+                try:
+                    data[i] = self._cycle(addresses[i], modifiers[i], widths[i])
+                    errors[i] = SUCCESS
+                except BusError:
+                    errors[i] = result = BUS_ERROR
+        return result
+
+    def CAENVME_MultiWrite(
+        self, handle, addresses, data, num_cycles, modifiers, widths, errors
+    ):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        num_cycles = _int(num_cycles)
+        self._delay(num_cycles)
+        result = SUCCESS
+        with self._lock:
+            for i in range(num_cycles):
+                try:
+                    self._cycle(addresses[i], modifiers[i], widths[i], data[i])
+                    errors[i] = SUCCESS
+                except BusError:
+                    errors[i] = result = BUS_ERROR
+        return result
+
+    def _block_read(self, handle, address, buffer, size, modifier, word, count, fifo):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        size = _int(size)
+        self._delay(max(size // word, 1))
+        with self._lock:
+            data, result = self._block(
+                _int(address), _int(modifier), word, size, fifo=fifo
+            )
+        memmove(buffer, bytes(data), len(data))
+        _deref(count).value = len(data)
+        return result
+
+    def _block_write(self, handle, address, buffer, size, modifier, word, count):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        size = _int(size)
+        self._delay(max(size // word, 1))
+        with self._lock:
+            data, result = self._block(
+                _int(address), _int(modifier), word, size, string_at(buffer, size)
+            )
+        _deref(count).value = len(data)
+        return result
+
+    def CAENVME_BLTReadCycle(
+        self, handle, address, buffer, size, modifier, width, count
+    ):
+        return self._block_read(
+            handle, address, buffer, size, modifier, _int(width) & 0x0F, count, False
+        )
+
+    def CAENVME_MBLTReadCycle(self, handle, address, buffer, size, modifier, count):
+        return self._block_read(
+            handle, address, buffer, size, modifier, 8, count, False
+        )
+
+    def CAENVME_FIFOBLTReadCycle(
+        self, handle, address, buffer, size, modifier, width, count
+    ):
+        return self._block_read(
+            handle, address, buffer, size, modifier, _int(width) & 0x0F, count, True
+        )
+
+    def CAENVME_FIFOMBLTReadCycle(self, handle, address, buffer, size, modifier, count):
+        return self._block_read(
+            handle, address, buffer, size, modifier, 8, count, True
+        )
+
+    def CAENVME_BLTWriteCycle(
+        self, handle, address, buffer, size, modifier, width, count
+    ):
+        return self._block_write(
+            handle, address, buffer, size, modifier, _int(width) & 0x0F, count
+        )
+
+    def CAENVME_MBLTWriteCycle(self, handle, address, buffer, size, modifier, count):
+        return self._block_write(handle, address, buffer, size, modifier, 8, count)
+
+    def CAENVME_BoardFWRelease(self, handle, release):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        memmove(release, b"0.0.sim\0", 8)
+        return SUCCESS
+
+    def CAENVME_ReadRegister(self, handle, register, data):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        self._delay(0)
+        _deref(data).value = self.registers.get(_int(register), 0)
+        return SUCCESS
+
+    def CAENVME_WriteRegister(self, handle, register, data):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        self._delay(0)
+        self.registers[_int(register)] = _int(data)
+        return SUCCESS
+
+    def CAENVME_SetOutputRegister(self, handle, mask):
+        output = self.registers.get(Registers.OUTPUT.value, 0)
+        return self.CAENVME_WriteRegister(
+            handle, Registers.OUTPUT.value, output | _int(mask)
+        )
+
+    def CAENVME_ClearOutputRegister(self, handle, mask):
+        output = self.registers.get(Registers.OUTPUT.value, 0)
+        return self.CAENVME_WriteRegister(
+            handle, Registers.OUTPUT.value, output & ~_int(mask)
+        )
+
+    def CAENVME_PulseOutputRegister(self, handle, mask):
+        return SUCCESS if self._handle(handle) else INVALID_PARAMETER
+
+    def CAENVME_ReadDisplay(self, handle, display):
+        return SUCCESS if self._handle(handle) else INVALID_PARAMETER
+
+    def CAENVME_SystemReset(self, handle):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        with self._lock:
+            for _, _, module in self.modules:
+                module.reset()
+        return SUCCESS
+
+    def CAENVME_ResetScalerCount(self, handle):
+        return self.CAENVME_WriteRegister(handle, Registers.SCALER_1.value, 0)
+
+    def CAENVME_EnableScalerGate(self, handle):
+        return SUCCESS if self._handle(handle) else INVALID_PARAMETER
+
+    def CAENVME_DisableScalerGate(self, handle):
+        return SUCCESS if self._handle(handle) else INVALID_PARAMETER
+
+    def CAENVME_StartPulser(self, handle, pulser):
+        return SUCCESS if self._handle(handle) else INVALID_PARAMETER
+
+    def CAENVME_StopPulser(self, handle, pulser):
+        return SUCCESS if self._handle(handle) else INVALID_PARAMETER
+
+    def CAENVME_IRQEnable(self, handle, mask):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        with self._lock:
+            self._irq_mask |= _int(mask)
+        return SUCCESS
+
+    def CAENVME_IRQDisable(self, handle, mask):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        with self._lock:
+            self._irq_mask &= ~_int(mask)
+        return SUCCESS
+
+    def CAENVME_IRQCheck(self, handle, mask):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        with self._lock:
+            _deref(mask).value = self._pending_irqs() & self._irq_mask
+        return SUCCESS
+
+    def CAENVME_IRQWait(self, handle, mask, timeout):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        mask = _int(mask)
+        with self._irq_condition:
+            if self._irq_condition.wait_for(
+                lambda: self._pending_irqs() & mask & self._irq_mask,
+                _int(timeout) / 1000,
+            ):
+                return SUCCESS
+        return TIMEOUT_ERROR
+
+    def CAENVME_IACKCycle(self, handle, level, vector, width):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        self._delay(1)
+        with self._lock:
+            vectors = self._irq_pending.get(_int(level))
+            if not vectors:
+                return BUS_ERROR
+            _deref(vector).value = vectors.popleft()
+        return SUCCESS
+
+    def _set_configuration(self, handle, key, *values):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        self.configurations[key] = [_int(value) for value in values]
+        return SUCCESS
+
+    def _get_configuration(self, handle, key, *outputs):
+        if not self._handle(handle):
+            return INVALID_PARAMETER
+        values = self.configurations.get(key, [0] * len(outputs))
+        for output, value in zip(outputs, values):
+            _deref(output).value = value
+        return SUCCESS
+
+    def CAENVME_SetPulserConf(self, handle, pulser, *configuration):
+        return self._set_configuration(
+            handle, ("pulser", _int(pulser)), *configuration
+        )
+
+    def CAENVME_GetPulserConf(self, handle, pulser, *configuration):
+        return self._get_configuration(
+            handle, ("pulser", _int(pulser)), *configuration
+        )
+
+    def CAENVME_SetScalerConf(self, handle, *configuration):
+        return self._set_configuration(handle, ("scaler",), *configuration)
+
+    def CAENVME_GetScalerConf(self, handle, *configuration):
+        return self._get_configuration(handle, ("scaler",), *configuration)
+
+    def CAENVME_SetOutputConf(self, handle, channel, *configuration):
+        return self._set_configuration(
+            handle, ("output", _int(channel)), *configuration
+        )
+
+    def CAENVME_GetOutputConf(self, handle, channel, *configuration):
+        return self._get_configuration(
+            handle, ("output", _int(channel)), *configuration
+        )
+
+    def CAENVME_SetInputConf(self, handle, channel, *configuration):
+        return self._set_configuration(
+            handle, ("input", _int(channel)), *configuration
+        )
+
+    def CAENVME_GetInputConf(self, handle, channel, *configuration):
+        return self._get_configuration(
+            handle, ("input", _int(channel)), *configuration
+        )
+
+
+class SimulatedBridge:
+    """
+    Simulated bridge with several links, each connected to its own crate.
+
+    Calls for different links are independent and can run in parallel.
+
+    Args:
+        crates (dict): Simulated crates by link number.
+    """
+
+    def __init__(self, crates):
+        self.crates = dict(crates)
+        self._lock = Lock()
+        self._handles = {}
+        self._next_handle = 0
+
+    def CAENVME_Init(self, board_type, link, board, handle):
+        crate = self.crates.get(_int(link))
+        if crate is None:
+            return INVALID_PARAMETER
+        inner = _deref(handle).__class__()
+        result = crate.CAENVME_Init(board_type, link, board, inner)
+        if result == SUCCESS:
+            with self._lock:
+                self._next_handle += 1
+                self._handles[self._next_handle] = (crate, inner)
+                _deref(handle).value = self._next_handle
+        return result
+
+    def CAENVME_End(self, handle):
+        with self._lock:
+            crate, inner = self._handles.pop(_int(handle), (None, None))
+        if crate is None:
+            return INVALID_PARAMETER
+        return crate.CAENVME_End(inner)
+
+    def __getattr__(self, name):
+        if not name.startswith("CAENVME_"):
+            raise AttributeError(name)
+
+        def forward(handle, *args):
+            crate, inner = self._handles.get(_int(handle), (None, None))
+            if crate is None:
+                return INVALID_PARAMETER
+            return getattr(crate, name)(inner, *args)
+
+        return forward
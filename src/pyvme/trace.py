@@ -0,0 +1,297 @@
+"""
+Binary record and replay of VME cycles.
+
+A `TraceRecorder` installed on a controller (see `VMEController.enable_trace`)
+appends a fixed size record for every cycle to a memory-mapped ring file. The last
+`capacity` records survive, the oldest ones are overwritten. Traces are loaded with
+`load_trace` and re-issued with `replay`, e.g. against a `SimulatedCrate` as a
+reproducible performance regression test:
+
+    controller.enable_trace("/tmp/readout.trace")
+    ...
+    controller.disable_trace()
+
+    stats = replay(V2718(backend=crate), load_trace("/tmp/readout.trace"), speed=None)
+
+File layout (little endian): a header (magic, version, record size, capacity,
+number of records written) followed by `capacity` records of timestamp (f64,
+seconds since the epoch), address (u32), address modifier (u8), data width (u8),
+operation (u8), flags (u8), data (u32) and return code (i32). Block transfers are
+recorded as one record holding the requested size instead of the data.
+"""
+import mmap
+import os
+import struct
+from collections import namedtuple
+from ctypes import byref, c_int, c_uint32, create_string_buffer
+from threading import Lock
+from time import perf_counter, sleep, time
+from ._bindings import deref
+
+
+MAGIC = b"PYVMETRC"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+RECORD = struct.Struct("<dIBBBBIi")
+# Offset of the number of written records in the header
+_COUNT = struct.Struct("<Q")
+_COUNT_OFFSET = HEADER.size - _COUNT.size
+
+OP_READ = 0
+OP_WRITE = 1
+OP_BLT_READ = 2
+OP_BLT_WRITE = 3
+OP_MBLT_READ = 4
+OP_MBLT_WRITE = 5
+OP_FIFO_BLT_READ = 6
+OP_FIFO_MBLT_READ = 7
+
+# Flags of the cycles of multi-cycle calls
+FLAG_MULTI = 0x01
+FLAG_FIRST = 0x02
+
+_OPERATIONS = {
+    "ReadCycle": OP_READ,
+    "WriteCycle": OP_WRITE,
+    "MultiRead": OP_READ,
+    "MultiWrite": OP_WRITE,
+    "BLTReadCycle": OP_BLT_READ,
+    "BLTWriteCycle": OP_BLT_WRITE,
+    "MBLTReadCycle": OP_MBLT_READ,
+    "MBLTWriteCycle": OP_MBLT_WRITE,
+    "FIFOBLTReadCycle": OP_FIFO_BLT_READ,
+    "FIFOMBLTReadCycle": OP_FIFO_MBLT_READ,
+}
+_SINGLE_FUNCTIONS = {OP_READ: "CAENVME_ReadCycle", OP_WRITE: "CAENVME_WriteCycle"}
+_MULTI_FUNCTIONS = {OP_READ: "CAENVME_MultiRead", OP_WRITE: "CAENVME_MultiWrite"}
+_BLOCK_FUNCTIONS = {
+    OP_BLT_READ: "CAENVME_BLTReadCycle",
+    OP_BLT_WRITE: "CAENVME_BLTWriteCycle",
+    OP_MBLT_READ: "CAENVME_MBLTReadCycle",
+    OP_MBLT_WRITE: "CAENVME_MBLTWriteCycle",
+    OP_FIFO_BLT_READ: "CAENVME_FIFOBLTReadCycle",
+    OP_FIFO_MBLT_READ: "CAENVME_FIFOMBLTReadCycle",
+}
+_MBLT = (OP_MBLT_READ, OP_MBLT_WRITE, OP_FIFO_MBLT_READ)
+_D64 = 0x08
+
+TraceRecord = namedtuple(
+    "TraceRecord",
+    ["timestamp", "address", "modifier", "width", "operation", "flags", "data", "code"],
+)
+
+
+class TraceRecorder:
+    """
+    Append the cycles of controllers to a memory-mapped ring file.
+
+    Args:
+        path (str): Trace file.
+        capacity (int): Number of records kept in the file.
+        append (bool): Continue an existing trace of the same capacity instead of
+            starting a new one.
+    """
+
+    CAPACITY = 1 << 20
+
+    def __init__(self, path, capacity=CAPACITY, append=False):
+        self.path = path
+        self.capacity = capacity
+        self._lock = Lock()
+        size = HEADER.size + capacity * RECORD.size
+        self.count = 0
+        if append and os.path.exists(path) and os.path.getsize(path) == size:
+            with open(path, "rb") as f:
+                magic, version, record_size, file_capacity, count = HEADER.unpack(
+                    f.read(HEADER.size)
+                )
+            if (magic, version, record_size, file_capacity) == (
+                MAGIC,
+                VERSION,
+                RECORD.size,
+                capacity,
+            ):
+                self.count = count
+        with open(path, "a+b") as f:
+            f.truncate(size)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), size)
+        HEADER.pack_into(
+            self._map, 0, MAGIC, VERSION, RECORD.size, capacity, self.count
+        )
+        # Offset between perf_counter and the epoch for the timestamps
+        self._epoch = time() - perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+                self._map.close()
+                self._file.close()
+                self._map = None
+
+    def append(self, timestamp, address, modifier, width, operation, flags, data, code):
+        """ Append a record, overwriting the oldest one if the ring is full """
+        with self._lock:
+            if self._map is None:
+                return
+            offset = HEADER.size + (self.count % self.capacity) * RECORD.size
+            RECORD.pack_into(
+                self._map,
+                offset,
+                timestamp,
+                address & 0xFFFFFFFF,
+                modifier,
+                width,
+                operation,
+                flags,
+                data & 0xFFFFFFFF,
+                code,
+            )
+            self.count += 1
+            _COUNT.pack_into(self._map, _COUNT_OFFSET, self.count)
+
+    def hook(self, operation, args, code, start, end):
+        """ Hook for `VMEController.add_hook` recording the cycles of a call """
+        kind = _OPERATIONS.get(operation)
+        if kind is None:
+            return
+        timestamp = self._epoch + start
+        if operation in ("ReadCycle", "WriteCycle"):
+            data = deref(args[2]).value
+            self.append(timestamp, args[1], args[3], args[4], kind, 0, data, code)
+        elif operation in ("MultiRead", "MultiWrite"):
+            addresses, data, num_cycles, modifiers, widths, errors = args[1:]
+            for i in range(num_cycles):
+                flags = FLAG_MULTI | (FLAG_FIRST if i == 0 else 0)
+                self.append(
+                    timestamp,
+                    addresses[i],
+                    modifiers[i],
+                    widths[i],
+                    kind,
+                    flags,
+                    data[i],
+                    errors[i],
+                )
+        else:
+            width = _D64 if kind in _MBLT else args[5]
+            self.append(timestamp, args[1], args[4], width, kind, 0, args[3], code)
+
+
+def load_trace(path):
+    """
+    Load the records of a trace file, oldest first.
+
+    Returns:
+        list: `TraceRecord` of every cycle kept in the ring.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    magic, version, record_size, capacity, count = HEADER.unpack_from(content)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a pyvme trace file")
+    if count > capacity:
+        indices = [(count + i) % capacity for i in range(capacity)]
+    else:
+        indices = range(count)
+    return [
+        TraceRecord(*RECORD.unpack_from(content, HEADER.size + i * RECORD.size))
+        for i in indices
+    ]
+
+
+def _calls(records):
+    """ Group the records of multi-cycle calls """
+    call = []
+    for record in records:
+        if call and not (record.flags & FLAG_MULTI and not record.flags & FLAG_FIRST):
+            yield call
+            call = []
+        call.append(record)
+    if call:
+        yield call
+
+
+def replay(controller, records, speed=1.0):
+    """
+    Re-issue recorded cycles with the driver calls they were recorded with.
+
+    Args:
+        controller (VMEController): Controller to replay on.
+        records (list): `TraceRecord` as returned by `load_trace`.
+        speed (float): Factor on the original pace, None replays at maximum speed.
+
+    Returns:
+        dict: Number of driver calls and cycles, cycles whose return code or read
+        data differ from the recording (mismatches) and the elapsed time in
+        seconds.
+    """
+    backend = controller.backend
+    handle = controller.handle
+    calls = cycles = mismatches = 0
+    first = None
+    start = perf_counter()
+    for call in _calls(records):
+        if speed:
+            if first is None:
+                first = call[0].timestamp
+            delay = (call[0].timestamp - first) / speed - (perf_counter() - start)
+            if delay > 0:
+                sleep(delay)
+        calls += 1
+        cycles += len(call)
+        with controller._lock:
+            if call[0].flags & FLAG_MULTI:
+                mismatches += _replay_multi(backend, handle, call)
+            else:
+                mismatches += _replay_single(backend, handle, call[0])
+    return dict(
+        calls=calls,
+        cycles=cycles,
+        mismatches=mismatches,
+        elapsed=perf_counter() - start,
+    )
+
+
+def _replay_single(backend, handle, record):
+    if record.operation in (OP_READ, OP_WRITE):
+        data = c_uint32(record.data)
+        code = getattr(backend, _SINGLE_FUNCTIONS[record.operation])(
+            handle, record.address, byref(data), record.modifier, record.width
+        )
+        return code != record.code or data.value != record.data
+    buffer = create_string_buffer(record.data)
+    count = c_int()
+    arguments = [handle, record.address, buffer, record.data, record.modifier]
+    if record.operation not in _MBLT:
+        arguments.append(record.width)
+    code = getattr(backend, _BLOCK_FUNCTIONS[record.operation])(
+        *arguments, byref(count)
+    )
+    return code != record.code
+
+
+def _replay_multi(backend, handle, call):
+    num_cycles = len(call)
+    data = (c_uint32 * num_cycles)(*(record.data for record in call))
+    errors = (c_int * num_cycles)()
+    getattr(backend, _MULTI_FUNCTIONS[call[0].operation])(
+        handle,
+        (c_uint32 * num_cycles)(*(record.address for record in call)),
+        data,
+        num_cycles,
+        (c_int * num_cycles)(*(record.modifier for record in call)),
+        (c_int * num_cycles)(*(record.width for record in call)),
+        errors,
+    )
+    return sum(
+        errors[i] != record.code or data[i] != record.data
+        for i, record in enumerate(call)
+    )
@@ -1,24 +1,383 @@
-from ._vmetypes import DataWidth
+from .exceptions import BatchError, check_error
+from ._vmetypes import AddressModifier, DataWidth
+
+
+# Block transfer modifiers matching the data access modifier of a module
+BLOCK_MODIFIERS = {
+    AddressModifier.A24_SUPERVISORY_DATA_ACCESS: (
+        AddressModifier.A24_SUPERVISORY_BLOCK,
+        AddressModifier.A24_SUPERVISORY_BLOCK_64,
+    ),
+    AddressModifier.A24_NON_PRIVILEGED_DATA: (
+        AddressModifier.A24_NON_PRIVILEGED_BLOCK,
+        AddressModifier.A24_NON_PRIVILEGED_BLOCK_64,
+    ),
+    AddressModifier.A32_SUPERVISORY_DATA: (
+        AddressModifier.A32_SUPERVISORY_BLOCK,
+        AddressModifier.A32_SUPERVISORY_BLOCK_64,
+    ),
+    AddressModifier.A32_NON_PRIVILEGED_DATA: (
+        AddressModifier.A32_NON_PRIVILEGED_BLOCK,
+        AddressModifier.A32_NON_PRIVILEGED_BLOCK_64,
+    ),
+}
+
+# IEEE manufacturer ID of CAEN in the configuration ROM
+CAEN_MANUFACTURER_ID = 0x0040E6
 
 
 class VMEModule:
-    def __init__(self, controller, address):
+    """
+    Base class of the VME modules.
+
+    The address space, default data width and size of the address window are taken
+    from the class attributes unless given explicitly. Addresses passed to the
+    methods are offsets relative to the base address of the module.
+
+    Args:
+        controller (VMEController): Controller of the crate.
+        address (int): Base address of the module.
+        modifier (AddressModifier): Address modifier for single cycles.
+        width (DataWidth): Default data width.
+        window_size (int): Size of the address window of the module in bytes.
+        owns_controller (bool): Close the controller together with the module, e.g.
+            at the end of a with block, releasing its share of the driver handle.
+    """
+
+    ADDRESS_MODIFIER = AddressModifier.A24_NON_PRIVILEGED_DATA
+    DATA_WIDTH = DataWidth.D16
+    WINDOW_SIZE = 0x10000
+    # Identity registers: name -> offset of a word or (start, end) of a string
+    IDENTITY = {}
+    SERIAL_NUMBER = "serial_number"
+    # Offset read by `CrateScanner.probe` to detect the module, None for the serial
+    # number register (offset 0 without one)
+    PROBE_REGISTER = None
+    # Manufacturer and board ID in the CR/CSR configuration ROM (see `CrateScanner`)
+    MANUFACTURER_ID = None
+    BOARD_ID = None
+
+    def __init__(
+        self,
+        controller,
+        address,
+        modifier=None,
+        width=None,
+        window_size=None,
+        owns_controller=False,
+    ):
         self.controller = controller
+        self.owns_controller = owns_controller
         self.base_address = address
+        self.modifier = self.ADDRESS_MODIFIER if modifier is None else modifier
+        self.width = self.DATA_WIDTH if width is None else width
+        self.window_size = self.WINDOW_SIZE if window_size is None else window_size
+        self.block_modifier, self.mblt_modifier = BLOCK_MODIFIERS.get(
+            self.modifier, (self.modifier, self.modifier)
+        )
+        self._modifier_code = self.modifier.value
+        self._width_code = self.width.value
+        self._identity = None
+        self._identity_generation = None
+        # Shadow of the values last written to the registers (offset -> value)
+        self.shadow = {}
+        self._shadow_generation = controller.generation
+        controller.modules.add(self)
 
     def __enter__(self):
         return self
 
     def __exit__(self, type_, value, traceback):
-        del self.controller
+        self.close()
+
+    def close(self):
+        """ Close the controller if owned by the module and drop the reference """
+        controller = self.__dict__.pop("controller", None)
+        if controller is not None and self.owns_controller:
+            controller.close()
+
+    def _check_range(self, address, size=1):
+        if not 0 <= address <= self.window_size - size:
+            raise ValueError(
+                f"Address 0x{address:X} outside of module window "
+                f"(size 0x{self.window_size:X})"
+            )
+
+    @property
+    def identity(self):
+        """
+        Identity of the module read from the registers listed in `IDENTITY`.
+
+        The identity is fetched lazily in a single multi-cycle read and cached until
+        the controller is reset, or taken from the controller's `identity_cache`
+        if the serial number is known there.
+
+        Returns:
+            dict: Identity values by name, strings for string registers.
+        """
+        generation = self.controller.generation
+        if self._identity is None or self._identity_generation != generation:
+            self._identity = self._fetch_identity()
+            self._identity_generation = generation
+        return self._identity
+
+    def invalidate_identity(self):
+        """ Drop the cached identity, it is read again on the next access """
+        self._identity = None
+
+    def _fetch_identity(self):
+        cache = self.controller.identity_cache
+        serial_number = None
+        if cache is not None and self.SERIAL_NUMBER in self.IDENTITY:
+            serial_number = self.read(self.IDENTITY[self.SERIAL_NUMBER])
+            identity = cache.get(self, serial_number)
+            if identity is not None:
+                return identity
+
+        addresses = []
+        for register in self.IDENTITY.values():
+            if isinstance(register, tuple):
+                addresses.extend(range(register[0], register[1] + 0x02, 2))
+            else:
+                addresses.append(register)
+        data, errors = self.read_many(addresses, DataWidth.D16)
+        for error in errors:
+            check_error(error)
+
+        identity = {}
+        words = iter(data)
+        for name, register in self.IDENTITY.items():
+            if isinstance(register, tuple):
+                characters = []
+                for _ in range(register[0], register[1] + 0x02, 2):
+                    word = next(words)
+                    characters.append(chr(word >> 8))
+                    characters.append(chr(word & 0xFF))
+                identity[name] = "".join(characters).strip()
+            else:
+                identity[name] = next(words)
+
+        if cache is not None and serial_number is not None:
+            cache.put(self, serial_number, identity)
+        return identity
+
+    def clear_shadow(self):
+        """ Forget the recorded register values, e.g. after a power cycle """
+        self.shadow = {}
+        self._shadow_generation = self.controller.generation
+
+    def apply_registers(self, registers, resync=False):
+        """
+        Write register values, skipping the ones already written with the same value.
+
+        The required writes are issued as a single batch, the successful ones are
+        recorded in the shadow.
+
+        Args:
+            registers (dict): Register values by offset.
+            resync (bool): Write all registers regardless of the shadow, e.g. after
+                the module was power cycled.
+
+        Returns:
+            dict: The register values actually written.
+
+        Raises:
+            BatchError: If any write failed, with the exceptions by offset in
+                `errors` and the register values written anyway in `results`.
+        """
+        if resync or self._shadow_generation != self.controller.generation:
+            self.clear_shadow()
+        changes = {
+            address: value
+            for address, value in registers.items()
+            if self.shadow.get(address) != value
+        }
+        if changes:
+            try:
+                with self.batch(raise_errors=True) as batch:
+                    for address, value in changes.items():
+                        batch.write(address, value)
+            except BatchError as e:
+                written = {
+                    address: value
+                    for address, value in changes.items()
+                    if address not in e.errors
+                }
+                raise BatchError(e.errors, written) from None
+        return changes
+
+    def batch(self, raise_errors=False):
+        """
+        Create a batch on the controller with addresses relative to this module.
 
-    def read(self, address, width=DataWidth.D16):
-        return self.controller.read(self.base_address + address, width=width)
+        Args:
+            raise_errors (bool): Raise a `BatchError` on flush if any cycle failed,
+                with the failed addresses as offsets relative to the module.
+
+        Returns:
+            ModuleBatch: Module view on a new `VMEBatch`, flushed on context exit.
+        """
+        return self.controller.batch(raise_errors=raise_errors).module(self)
+
+    def read(self, address, width=None):
+        if not 0 <= address < self.window_size:
+            self._check_range(address)
+        return self.controller.raw_read(
+            self.base_address + address,
+            self._modifier_code,
+            self._width_code if width is None else width.value,
+        )
 
     def read_string(self, address_start, address_end):
+        self._check_range(address_start)
+        self._check_range(address_end, 2)
         return self.controller.read_string(
-            self.base_address + address_start, self.base_address + address_end
+            self.base_address + address_start,
+            self.base_address + address_end,
+            self.modifier,
+        )
+
+    def write(self, address, data, width=None):
+        if not 0 <= address < self.window_size:
+            self._check_range(address)
+        self.controller.raw_write(
+            self.base_address + address,
+            data,
+            self._modifier_code,
+            self._width_code if width is None else width.value,
+        )
+        self.shadow[address] = data
+
+    def read_many(self, addresses, widths=None, modifiers=None):
+        addresses = list(addresses)
+        for address in addresses:
+            self._check_range(address)
+        return self.controller.read_many(
+            [self.base_address + address for address in addresses],
+            self.width if widths is None else widths,
+            self.modifier if modifiers is None else modifiers,
+        )
+
+    def write_many(self, addresses, data, widths=None, modifiers=None):
+        addresses = list(addresses)
+        for address in addresses:
+            self._check_range(address)
+        data = list(data)
+        errors = self.controller.write_many(
+            [self.base_address + address for address in addresses],
+            data,
+            self.width if widths is None else widths,
+            self.modifier if modifiers is None else modifiers,
+        )
+        for address, value, error in zip(addresses, data, errors):
+            if error == 0:
+                self.shadow[address] = value
+        return errors
+
+    def blt_read(
+        self,
+        address,
+        buffer,
+        size=None,
+        width=DataWidth.D32,
+        modifier=None,
+        partial=False,
+    ):
+        self._check_range(address, size or memoryview(buffer).nbytes)
+        return self.controller.blt_read(
+            self.base_address + address,
+            buffer,
+            size,
+            width,
+            self.block_modifier if modifier is None else modifier,
+            partial,
+        )
+
+    def mblt_read(self, address, buffer, size=None, modifier=None, partial=False):
+        self._check_range(address, size or memoryview(buffer).nbytes)
+        return self.controller.mblt_read(
+            self.base_address + address,
+            buffer,
+            size,
+            self.mblt_modifier if modifier is None else modifier,
+            partial,
+        )
+
+    def fifo_blt_read(
+        self,
+        address,
+        buffer,
+        size=None,
+        width=DataWidth.D32,
+        modifier=None,
+        partial=True,
+    ):
+        self._check_range(address)
+        return self.controller.fifo_blt_read(
+            self.base_address + address,
+            buffer,
+            size,
+            width,
+            self.block_modifier if modifier is None else modifier,
+            partial,
+        )
+
+    def fifo_mblt_read(self, address, buffer, size=None, modifier=None, partial=True):
+        self._check_range(address)
+        return self.controller.fifo_mblt_read(
+            self.base_address + address,
+            buffer,
+            size,
+            self.mblt_modifier if modifier is None else modifier,
+            partial,
+        )
+
+    def drain_fifo(self, address, buffer, size=None, mblt=True, max_transfer=None):
+        """
+        Read a FIFO until it is empty or the buffer is full.
+
+        The FIFO is read in transfers as large as the remaining buffer (or
+        `max_transfer`), until a transfer is ended early by the module.
+
+        Args:
+            address (int): Offset of the FIFO.
+            buffer: Writable buffer that receives the data in place.
+            size (int): Maximum number of bytes to read, defaults to the buffer size.
+            mblt (bool): Use MBLT instead of 32-bit BLT transfers.
+            max_transfer (int): Maximum number of bytes per transfer.
+
+        Returns:
+            int: Number of bytes read.
+        """
+        view = memoryview(buffer).cast("B")
+        size = view.nbytes if size is None else size
+        read = self.fifo_mblt_read if mblt else self.fifo_blt_read
+        done = 0
+        while done < size:
+            length = size - done
+            if max_transfer is not None:
+                length = min(length, max_transfer)
+            count = read(address, view[done : done + length], length)
+            done += count
+            if count < length:
+                break
+        return done
+
+    def blt_write(self, address, buffer, size=None, width=DataWidth.D32, modifier=None):
+        self._check_range(address, size or memoryview(buffer).nbytes)
+        return self.controller.blt_write(
+            self.base_address + address,
+            buffer,
+            size,
+            width,
+            self.block_modifier if modifier is None else modifier,
         )
 
-    def write(self, address, data, width=DataWidth.D16):
-        self.controller.write(self.base_address + address, data, width)
+    def mblt_write(self, address, buffer, size=None, modifier=None):
+        self._check_range(address, size or memoryview(buffer).nbytes)
+        return self.controller.mblt_write(
+            self.base_address + address,
+            buffer,
+            size,
+            self.mblt_modifier if modifier is None else modifier,
+        )
@@ -0,0 +1,104 @@
+import pytest
+from pyvme import V2718, AddressModifier, DataWidth
+from pyvme.exceptions import BatchError, BusError
+from pyvme.modules import V895
+from pyvme.simulation import SimulatedCrate, SimulatedV895
+
+A24_DATA = AddressModifier.A24_NON_PRIVILEGED_DATA
+
+
+@pytest.fixture
+def crate():
+    crate = SimulatedCrate()
+    crate.add_module(0x200000, SimulatedV895())
+    return crate
+
+
+@pytest.fixture
+def controller(crate):
+    return V2718(backend=crate)
+
+
+def test_futures_resolve_on_flush(controller):
+    with controller.batch() as batch:
+        serial_number = batch.read(0x2000FE)
+        write = batch.write(0x200002, 30)
+        threshold = batch.read(0x200002)
+        assert not serial_number.done()
+    assert serial_number.result() == 42
+    assert write.result() is None
+    assert threshold.result() == 30
+
+
+def test_cycles_are_coalesced_in_order(controller, crate):
+    batch = controller.batch(max_cycles=4)
+    for channel in range(10):
+        batch.write(0x200000 + 0x02 * channel, channel + 1)
+    futures = [batch.read(0x200000 + 0x02 * channel) for channel in range(10)]
+    calls = crate.calls
+    # 10 writes and 10 reads in chunks of at most 4 cycles
+    assert batch.flush() == 6
+    assert crate.calls - calls == 6
+    assert [future.result() for future in futures] == list(range(1, 11))
+    assert len(batch) == 0
+
+
+def test_failed_cycle_sets_future_exception(controller, crate):
+    crate.bus_errors.add(0x200048)
+    with controller.batch() as batch:
+        failed = batch.write(0x200048, 1, DataWidth.D16, A24_DATA)
+        written = batch.write(0x20004A, 1, DataWidth.D16, A24_DATA)
+    assert isinstance(failed.exception(), BusError)
+    assert written.result() is None
+
+
+def test_raise_errors_lists_failed_cycles(controller, crate):
+    crate.bus_errors.add(0x200048)
+    with pytest.raises(BatchError) as error:
+        with controller.batch(raise_errors=True) as batch:
+            batch.write(0x200048, 1)
+            written = batch.write(0x20004A, 1)
+    assert list(error.value.errors) == [0x200048]
+    assert isinstance(error.value.errors[0x200048], BusError)
+    assert written.result() is None
+
+
+def test_cancel_on_exception(controller, crate):
+    calls = crate.calls
+    with pytest.raises(RuntimeError):
+        with controller.batch() as batch:
+            future = batch.read(0x2000FE)
+            raise RuntimeError()
+    assert future.cancelled()
+    assert crate.calls == calls
+
+
+def test_module_batch_uses_offsets(controller, crate):
+    discriminator = V895(controller, 0x200000)
+    crate.bus_errors.add(0x200002)
+    with pytest.raises(BatchError) as error:
+        with discriminator.batch(raise_errors=True) as batch:
+            batch.write(0x00, 10)
+            batch.write(0x02, 20)
+    assert list(error.value.errors) == [0x02]
+    with pytest.raises(ValueError):
+        discriminator.batch().write(discriminator.WINDOW_SIZE, 1)
+
+
+def test_set_thresholds(controller, crate):
+    discriminator = V895(controller, 0x200000)
+    discriminator.set_thresholds([10, 20, 30])
+    assert [discriminator.read(0x02 * channel) for channel in range(3)] == [
+        10,
+        20,
+        30,
+    ]
+
+
+def test_set_thresholds_raises_on_bus_error(controller, crate):
+    crate.bus_errors.add(0x200000)
+    discriminator = V895(controller, 0x200000)
+    with pytest.raises(BatchError) as error:
+        discriminator.set_thresholds({0: 10, 1: 20})
+    assert list(error.value.errors) == [0x00]
+    assert discriminator.read(0x02) == 20
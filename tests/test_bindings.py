@@ -0,0 +1,46 @@
+import os
+import shutil
+import subprocess
+from ctypes import cdll
+import pytest
+from pyvme import V2718, AddressModifier, DataWidth
+from pyvme._bindings import UNCHECKED, declare_prototypes, unchecked_functions
+from pyvme.simulation import SimulatedCrate
+
+STUB = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "benchmarks", "stub", "CAENVMEstub.c"
+)
+
+
+@pytest.fixture(scope="module")
+def library(tmp_path_factory):
+    compiler = os.environ.get("CC", "cc")
+    if shutil.which(compiler) is None:
+        pytest.skip("No C compiler to build the libCAENVME stub")
+    path = str(tmp_path_factory.mktemp("stub") / "libCAENVMEstub.so")
+    subprocess.check_call([compiler, "-O2", "-shared", "-fPIC", "-o", path, STUB])
+    return declare_prototypes(cdll.LoadLibrary(path))
+
+
+def test_hot_path_skips_prototypes(library):
+    functions = unchecked_functions(library)
+    assert set(functions) == set(UNCHECKED)
+    assert all(function.argtypes is None for function in functions.values())
+    assert library.CAENVME_ReadCycle.argtypes is not None
+
+
+def test_controller_on_unchecked_functions(library):
+    controller = V2718(backend=library)
+    modifier = AddressModifier.A32_NON_PRIVILEGED_DATA
+    assert controller.read(0xFFFFFFF0, DataWidth.D32, modifier) == 0
+    controller.write(0xFFFFFFF0, 0xFFFFFFFF, DataWidth.D32, modifier)
+    assert controller.read_many([0x100000, 0x100002]) == ([0, 0], [0, 0])
+    assert controller.blt_read(0x100000, bytearray(64)) == 64
+    controller.close()
+
+
+def test_other_backends_keep_their_functions():
+    crate = SimulatedCrate()
+    assert unchecked_functions(crate) == {}
+    controller = V2718(backend=crate)
+    assert controller._read_cycle == crate.CAENVME_ReadCycle
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+import pytest
+from pyvme import AddressModifier, DataWidth
+from pyvme import broker
+from pyvme.broker import SHARED_MEMORY_THRESHOLD, BrokerController, VMEBroker
+from pyvme.simulation import SimulatedCrate, SimulatedModule
+
+A32_BLOCK = AddressModifier.A32_NON_PRIVILEGED_BLOCK
+A32_DATA = AddressModifier.A32_NON_PRIVILEGED_DATA
+
+
+class Memory(SimulatedModule):
+    SPACE = "A32"
+    SIZE = 2 * SHARED_MEMORY_THRESHOLD
+
+
+@pytest.fixture
+def path(tmp_path):
+    crate = SimulatedCrate()
+    crate.add_module(0x10000000, Memory())
+    crate.add_module(0x20000000, Memory())
+    path = str(tmp_path / "broker.sock")
+    with VMEBroker(path, crate):
+        yield path
+        backend = broker._backends.pop(path, None)
+        if backend is not None:
+            backend.close()
+
+
+def test_concurrent_shared_memory_transfers(path):
+    errors = []
+
+    def transfer(link, address, pattern):
+        controller = BrokerController(path, link=link)
+        data = bytes([pattern]) * SHARED_MEMORY_THRESHOLD
+        buffer = bytearray(len(data))
+        for _ in range(10):
+            controller.blt_write(address, data, modifier=A32_BLOCK)
+            controller.blt_read(address, buffer, modifier=A32_BLOCK)
+            if buffer != data:
+                errors.append(link)
+
+    threads = [
+        threading.Thread(target=transfer, args=(link, address, pattern))
+        for link, address, pattern in ((0, 0x10000000, 0x55), (1, 0x20000000, 0xAA))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_short_block_transfer_is_not_a_bus_error(path):
+    controller = BrokerController(path)
+    controller.blt_write(0x10000000, bytes(range(1, 9)), modifier=A32_BLOCK)
+    buffer = bytearray(10)
+    assert controller.blt_read(0x10000000, buffer, 10, DataWidth.D32, A32_BLOCK) == 8
+    assert buffer[:8] == bytes(range(1, 9))
+
+
+def test_segments_are_unlinked_on_close(path):
+    controller = BrokerController(path)
+    buffer = bytearray(SHARED_MEMORY_THRESHOLD)
+    controller.blt_read(0x10000000, buffer, modifier=A32_BLOCK)
+    (connection,) = broker._backends[path]._connections.values()
+    segment = connection.segment
+    controller.close()
+    assert connection.segment is None
+    assert not os.path.exists("/dev/shm/" + segment.name)
+
+
+def test_links_are_not_serialized(tmp_path):
+    crate = SimulatedCrate(call_latency=0.05)
+    crate.add_module(0x10000000, Memory())
+    path = str(tmp_path / "broker.sock")
+    with VMEBroker(path, crate):
+        controllers = [BrokerController(path, link=link) for link in (0, 1)]
+
+        def read(controller):
+            for _ in range(4):
+                controller.read(0x10000000, modifier=A32_DATA)
+
+        threads = [threading.Thread(target=read, args=(c,)) for c in controllers]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        for controller in controllers:
+            controller.close()
+    # 8 calls of 50 ms, about half of it when both links are served concurrently
+    assert elapsed < 0.35
+
+
+def test_backend_is_dropped_with_the_last_controller(path):
+    first = BrokerController(path, link=0)
+    second = BrokerController(path, link=1)
+    backend = broker._backends[path]
+    assert second.backend is backend
+    first.close()
+    assert broker._backends[path] is backend
+    second.close()
+    assert path not in broker._backends
+    assert not backend.connected
+    third = BrokerController(path)
+    assert broker._backends[path] is not backend
+    assert third.read(0x10000000, modifier=A32_DATA) == 0
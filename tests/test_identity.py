@@ -0,0 +1,60 @@
+import json
+import pytest
+from pyvme import V2718, IdentityCache
+from pyvme.modules import V6533
+from pyvme.simulation import SimulatedCrate, SimulatedV6533
+
+
+@pytest.fixture
+def crate():
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    return crate
+
+
+def test_identity_is_read_once(crate):
+    hv = V6533(V2718(backend=crate), 0x100000)
+    assert hv.model == "V6533N"
+    assert hv.description == "6 Ch Neg. 6KV 3mA"
+    assert hv.serial_number == 1234
+    assert hv.firmware_release == (1, 4)
+    calls = crate.calls
+    assert hv.identity["num_channels"] == 6
+    assert hv.model == "V6533N"
+    assert crate.calls == calls
+
+
+def test_reset_system_invalidates_identity(crate):
+    controller = V2718(backend=crate)
+    hv = V6533(controller, 0x100000)
+    assert hv.serial_number == 1234
+    module = crate.modules[0][2]
+    module.registers[0x811E] = 4321
+    assert hv.serial_number == 1234
+    controller.reset_system()
+    module.registers[0x811E] = 4321
+    assert hv.serial_number == 4321
+    module.registers[0x811E] = 1
+    hv.invalidate_identity()
+    assert hv.serial_number == 1
+
+
+def test_persistent_cache_only_reads_serial_number(crate, tmp_path):
+    path = tmp_path / "identity.json"
+    controller = V2718(backend=crate)
+    controller.identity_cache = IdentityCache(path)
+    assert V6533(controller, 0x100000).model == "V6533N"
+    (key,) = json.loads(path.read_text())
+    assert key == "V6533@0x00100000/1234"
+
+    controller.identity_cache = IdentityCache(path)
+    hv = V6533(controller, 0x100000)
+    calls = crate.calls
+    assert hv.model == "V6533N"
+    assert crate.calls == calls + 1
+
+    # A different serial number is a different module
+    crate.modules[0][2].registers[0x811E] = 99
+    hv.invalidate_identity()
+    assert hv.serial_number == 99
+    assert len(json.loads(path.read_text())) == 2
@@ -0,0 +1,54 @@
+import time
+import pytest
+from pyvme import V2718, IRQDispatcher, IRQLevels
+from pyvme.exceptions import BusError
+from pyvme.simulation import BUS_ERROR, SimulatedCrate
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition() and time.monotonic() < end:
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def crate():
+    return SimulatedCrate()
+
+
+def test_dispatch(crate):
+    received = []
+    with IRQDispatcher(V2718(backend=crate), IRQLevels.IRQ_3, poll_timeout=0.01) as d:
+        d.register(0x55, lambda module, level, vector: received.append(vector))
+        crate.raise_irq(IRQLevels.IRQ_3, 0x55)
+        assert wait_for(lambda: received == [0x55])
+    assert d.error is None
+
+
+def test_handler_error_keeps_dispatcher_running(crate):
+    received = []
+
+    def handler(module, level, vector):
+        received.append(vector)
+        raise ValueError("handler failed")
+
+    with IRQDispatcher(V2718(backend=crate), IRQLevels.IRQ_3, poll_timeout=0.01) as d:
+        d.register(0x55, handler)
+        crate.raise_irq(IRQLevels.IRQ_3, 0x55)
+        crate.raise_irq(IRQLevels.IRQ_3, 0x55)
+        assert wait_for(lambda: len(received) == 2)
+        assert d.running
+
+
+def test_cycle_error_stops_dispatcher(crate):
+    crate.CAENVME_IACKCycle = lambda *args: BUS_ERROR
+    dispatcher = IRQDispatcher(V2718(backend=crate), IRQLevels.IRQ_3, poll_timeout=0.01)
+    dispatcher.start()
+    crate.raise_irq(IRQLevels.IRQ_3, 0x55)
+    with pytest.raises(BusError):
+        dispatcher.join(timeout=2.0)
+    assert not dispatcher.running
+    assert isinstance(dispatcher.error, BusError)
+    # Raised once, stop still disables the levels
+    dispatcher.stop()
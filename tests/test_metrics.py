@@ -0,0 +1,18 @@
+from pyvme import V2718, DataWidth, IRQLevels
+from pyvme.simulation import SimulatedCrate
+
+
+def test_errors_are_counted():
+    controller = V2718(backend=SimulatedCrate())
+    metrics = controller.enable_metrics()
+    controller.read_many([0x100000, 0x100004], DataWidth.D32)
+    assert metrics.stats()["errors"] == {"BusError": 2}
+
+
+def test_irq_wait_timeout_is_not_an_error():
+    controller = V2718(backend=SimulatedCrate())
+    metrics = controller.enable_metrics()
+    assert not controller.wait_irq(IRQLevels.IRQ_1, 0.001)
+    snapshot = metrics.stats()
+    assert snapshot["errors"] == {}
+    assert [series["operation"] for series in snapshot["series"]] == ["IRQWait"]
@@ -0,0 +1,74 @@
+import pytest
+from pyvme import V2718, AddressModifier, DataWidth, VMEModule
+from pyvme.exceptions import BusError
+from pyvme.simulation import SimulatedCrate, SimulatedModule
+
+
+class Memory(SimulatedModule):
+    SPACE = "A32"
+
+
+class Board(VMEModule):
+    ADDRESS_MODIFIER = AddressModifier.A32_NON_PRIVILEGED_DATA
+    DATA_WIDTH = DataWidth.D32
+    WINDOW_SIZE = 0x100
+
+
+@pytest.fixture
+def crate():
+    crate = SimulatedCrate()
+    crate.add_module(0x10000000, Memory())
+    return crate
+
+
+@pytest.fixture
+def board(crate):
+    return Board(V2718(backend=crate), 0x10000000)
+
+
+def test_class_attributes_select_address_space(board):
+    assert board.modifier is AddressModifier.A32_NON_PRIVILEGED_DATA
+    assert board.block_modifier is AddressModifier.A32_NON_PRIVILEGED_BLOCK
+    assert board.mblt_modifier is AddressModifier.A32_NON_PRIVILEGED_BLOCK_64
+    board.write(0x10, 0x12345678)
+    assert board.read(0x10) == 0x12345678
+    assert board.read(0x10, DataWidth.D16) == 0x5678
+    assert board.shadow == {0x10: 0x12345678}
+
+
+def test_constructor_overrides_class_attributes(board):
+    other = Board(
+        board.controller,
+        0x10000000,
+        modifier=AddressModifier.A24_NON_PRIVILEGED_DATA,
+        width=DataWidth.D16,
+        window_size=0x20,
+    )
+    assert other.window_size == 0x20
+    assert other.block_modifier is AddressModifier.A24_NON_PRIVILEGED_BLOCK
+    # Nothing is mapped at this address in A24 space
+    with pytest.raises(BusError):
+        other.read(0x10)
+
+
+@pytest.mark.parametrize("address", [-2, 0x100, 0x1000])
+def test_single_cycles_are_checked_against_window(board, address):
+    with pytest.raises(ValueError):
+        board.read(address)
+    with pytest.raises(ValueError):
+        board.write(address, 1)
+    with pytest.raises(ValueError):
+        board.read_many([0x00, address])
+
+
+def test_block_transfers_are_checked_against_window(board):
+    buffer = bytearray(0x40)
+    board.write(0xC0, 0xAABBCCDD)
+    assert board.blt_read(0xC0, buffer) == 0x40
+    assert buffer[:4] == bytes([0xDD, 0xCC, 0xBB, 0xAA])
+    with pytest.raises(ValueError):
+        board.blt_read(0xD0, buffer)
+    with pytest.raises(ValueError):
+        board.mblt_read(0xF8, buffer, 0x10)
+    with pytest.raises(ValueError):
+        board.read_string(0xF0, 0xFF)
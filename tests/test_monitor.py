@@ -0,0 +1,113 @@
+import time
+import pytest
+from pyvme import V2718, HVMonitor
+from pyvme.modules import V6533
+from pyvme.modules._V6533 import V6533ChannelStatus
+from pyvme.simulation import SimulatedCrate, SimulatedV6533
+
+np = pytest.importorskip("numpy")
+
+RAMP_UP = V6533ChannelStatus.RAMP_UP.value
+DISABLED = V6533ChannelStatus.DISABLED.value
+
+
+def status(channel):
+    return 0x80 * channel + 0x94
+
+
+def measured_voltage(channel):
+    return 0x80 * channel + 0x88
+
+
+@pytest.fixture
+def crate():
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    return crate
+
+
+@pytest.fixture
+def registers(crate):
+    return crate.modules[0][2].registers
+
+
+@pytest.fixture
+def hv(crate):
+    hv = V6533(V2718(backend=crate), 0x100000)
+    hv.channels[1].voltage = 1500
+    hv.channels[1].enabled = True
+    return hv
+
+
+def until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_fast_interval_is_held_after_a_ramp(hv, registers):
+    monitor = HVMonitor(hv, fast_interval=0.1, slow_interval=1.0, hold=0.5)
+    assert monitor._next_interval(hv.snapshot(), 100.0) == 1.0
+    registers[status(2)] = RAMP_UP
+    assert monitor._next_interval(hv.snapshot(), 100.0) == 0.1
+    registers[status(2)] = DISABLED
+    snapshot = hv.snapshot()
+    assert monitor._next_interval(snapshot, 100.4) == 0.1
+    assert monitor._next_interval(snapshot, 100.6) == 1.0
+
+
+def test_shortest_interval_of_all_channels_is_used(hv, registers):
+    monitor = HVMonitor(
+        hv,
+        fast_interval=0.1,
+        slow_interval=1.0,
+        intervals={V6533ChannelStatus.ON: 0.5, V6533ChannelStatus.TRIP: 0.02},
+    )
+    assert monitor._next_interval(hv.snapshot(), 0.0) == 0.5
+    registers[status(3)] = V6533ChannelStatus.TRIP.value
+    registers[status(4)] = RAMP_UP
+    assert monitor._next_interval(hv.snapshot(), 0.0) == 0.02
+
+
+def test_polling_switches_between_intervals(hv, registers):
+    with HVMonitor(hv, fast_interval=0.01, slow_interval=10.0, hold=0.05) as monitor:
+        until(lambda: monitor.stats["polls"] == 1)
+        assert monitor.stats["interval"] == 10.0
+        registers[status(0)] = RAMP_UP
+        monitor.poll_now()
+        until(lambda: monitor.stats["fast_polls"] >= 5)
+        registers[status(0)] = DISABLED
+        until(lambda: monitor.stats["interval"] == 10.0)
+    stats = monitor.stats
+    assert stats["errors"] == 0
+    history = monitor.history(0, ["status"])
+    assert len(history["timestamp"]) == stats["polls"]
+    assert np.all(np.diff(history["timestamp"]) >= 0)
+    assert history["status"].tolist()[:2] == [DISABLED, RAMP_UP]
+    assert history["status"][-1] == DISABLED
+
+
+def test_subscribers_get_changes_beyond_tolerance(hv, registers):
+    changes = []
+    with HVMonitor(hv, slow_interval=10.0) as monitor:
+        until(lambda: monitor.stats["polls"] == 1)
+        monitor.subscribe(lambda timestamp, change: changes.append(change))
+        (state,) = changes
+        assert sorted(state) == list(range(hv.NUM_CHANNELS))
+        assert state[1]["measured_voltage"] == pytest.approx(1500)
+
+        registers[measured_voltage(1)] += 3
+        monitor.poll_now()
+        until(lambda: monitor.stats["polls"] == 2)
+        assert len(changes) == 1
+
+        registers[measured_voltage(1)] += 10
+        registers[status(5)] = RAMP_UP
+        monitor.poll_now()
+        until(lambda: monitor.stats["polls"] == 3)
+    assert changes[1] == {
+        1: {"measured_voltage": pytest.approx(1501.3)},
+        5: {"status": RAMP_UP},
+    }
+    assert monitor.stats["notifications"] == 1
@@ -0,0 +1,68 @@
+from time import perf_counter
+import pytest
+from pyvme import BoardTypes, ControllerPool
+from pyvme.exceptions import InvalidParameterError
+from pyvme.modules import V6533
+from pyvme.simulation import SimulatedBridge, SimulatedCrate, SimulatedV6533
+
+
+def bridge(num_links, call_latency=0.0):
+    crates = {}
+    for link in range(num_links):
+        crate = crates[link] = SimulatedCrate(call_latency=call_latency)
+        crate.add_module(0x100000, SimulatedV6533({0x811E: 100 + link}))
+    return SimulatedBridge(crates)
+
+
+def serial_number(controller):
+    return V6533(controller, 0x100000).serial_number
+
+
+def test_links_are_independent():
+    with ControllerPool(bridge(2)) as pool:
+        first = pool.add(BoardTypes.A3818, link=0)
+        assert pool.add(BoardTypes.A3818, link=0) is first
+        pool.add(BoardTypes.A3818, link=1)
+        assert len(pool) == 2
+        assert pool.map(serial_number) == {
+            (BoardTypes.A3818, 0, 0): 100,
+            (BoardTypes.A3818, 1, 0): 101,
+        }
+
+
+def test_read_write_on_link_workers():
+    with ControllerPool(bridge(2)) as pool:
+        keys = [(BoardTypes.A3818, link, 0) for link in range(2)]
+        for _, link, board in keys:
+            pool.add(BoardTypes.A3818, link, board)
+        writes = [pool.write(key, 0x100080, 10 * (i + 1)) for i, key in enumerate(keys)]
+        reads = [pool.read(key, 0x100080) for key in keys]
+        assert [future.result(timeout=2) for future in writes] == [None, None]
+        assert [future.result(timeout=2) for future in reads] == [10, 20]
+
+
+def test_links_run_in_parallel():
+    latency = 0.05
+    with ControllerPool(bridge(4, latency)) as pool:
+        for link in range(4):
+            pool.add(BoardTypes.A3818, link=link)
+        start = perf_counter()
+        pool.map(lambda controller: controller.read(0x100050))
+        # Four links with one call each in about the time of a single call
+        assert perf_counter() - start < 3 * latency
+
+
+def test_close_releases_links():
+    simulated = bridge(1)
+    pool = ControllerPool(simulated)
+    pool.add(BoardTypes.A3818, link=0)
+    assert simulated._handles
+    pool.close()
+    assert not simulated._handles
+    assert len(pool) == 0
+
+
+def test_unknown_link_fails():
+    with ControllerPool(bridge(1)) as pool:
+        with pytest.raises(InvalidParameterError):
+            pool.add(BoardTypes.A3818, link=5)
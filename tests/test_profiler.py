@@ -0,0 +1,48 @@
+import sys
+import threading
+from pyvme import V2718, DataWidth
+from pyvme.modules import V6533
+from pyvme._profiler import PHASES
+from pyvme.simulation import SimulatedCrate, SimulatedV6533
+
+
+def controller():
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    return V2718(backend=crate)
+
+
+def test_profiling_leaves_the_profile_functions_alone():
+    bridge = controller()
+    profile = sys.getprofile()
+    profiler = bridge.enable_profiling()
+    assert sys.getprofile() is profile
+    bridge.read(0x100050, DataWidth.D16)
+    bridge.disable_profiling()
+    assert sys.getprofile() is profile
+    assert bridge.profiler is None
+    assert bridge.hooks == ()
+    assert "read" not in bridge.__dict__
+    (row,) = profiler.stats()
+    assert row["vme_calls"] == 1
+    assert row["driver"] > 0
+    assert row["total"] == sum(row[phase] for phase in PHASES)
+
+
+def test_calls_are_attributed_to_module_methods_in_all_threads():
+    bridge = controller()
+    other = controller()
+    channel = V6533(bridge, 0x100000).channels[0]
+    profiler = bridge.enable_profiling()
+    thread = threading.Thread(target=lambda: [channel.voltage for _ in range(3)])
+    thread.start()
+    thread.join()
+    V6533(other, 0x100000).channels[0].voltage
+    bridge.disable_profiling()
+    rows = {row["function"]: row for row in profiler.stats()}
+    assert rows["HVChannel.voltage"]["vme_calls"] == 3
+    assert len(rows) == 1
+    assert all(
+        line.split(";")[-3:-1] == ["HVChannel.voltage", "V2718.raw_read"]
+        for line in profiler.collapsed().splitlines()
+    )
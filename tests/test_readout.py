@@ -0,0 +1,97 @@
+import struct
+import threading
+import time
+import pytest
+from pyvme import V2718, ReadoutPipeline, read_records
+from pyvme.modules import V2495
+from pyvme.simulation import SimulatedCrate, SimulatedV2495
+
+EVENT_SIZE = 16
+NUM_EVENTS = 10
+
+
+@pytest.fixture
+def fifo():
+    module = SimulatedV2495()
+    crate = SimulatedCrate()
+    crate.add_module(0x32100000, module)
+    module.push_fifo(V2495.FIFO, range(NUM_EVENTS * EVENT_SIZE // 4))
+    return V2495(V2718(backend=crate), 0x32100000)
+
+
+def event(number):
+    words = EVENT_SIZE // 4
+    return struct.pack(f"<{words}I", *range(number * words, (number + 1) * words))
+
+
+def until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def gated(pipeline):
+    """ Hold the writer thread before every write until the returned event is set """
+    gate = threading.Event()
+    write = pipeline._output.write
+
+    def held(*args):
+        gate.wait()
+        write(*args)
+
+    pipeline._output.write = held
+    return gate
+
+
+def pipeline(fifo, path, **kwargs):
+    return ReadoutPipeline(
+        fifo.read_fifo,
+        str(path / "run"),
+        buffer_size=EVENT_SIZE,
+        num_buffers=2,
+        chunk_size=4096,
+        **kwargs,
+    )
+
+
+def test_records_are_written_in_order(fifo, tmp_path):
+    with pipeline(fifo, tmp_path) as readout:
+        until(lambda: readout.stats["buffers_written"] == NUM_EVENTS)
+    records = list(read_records(str(tmp_path / "run")))
+    assert [sequence for sequence, _, _ in records] == list(range(1, NUM_EVENTS + 1))
+    assert [data for _, _, data in records] == [event(i) for i in range(NUM_EVENTS)]
+
+
+def test_reader_waits_for_free_buffers(fifo, tmp_path):
+    readout = pipeline(fifo, tmp_path)
+    gate = gated(readout)
+    with readout:
+        until(lambda: readout.stats["backpressure"] == 1)
+        assert readout.stats["buffers_read"] == 2
+        gate.set()
+        until(lambda: readout.stats["buffers_written"] == NUM_EVENTS)
+    stats = readout.stats
+    assert stats["dropped"] == 0
+    assert stats["backpressure_time"] > 0
+    records = list(read_records(str(tmp_path / "run")))
+    assert [data for _, _, data in records] == [event(i) for i in range(NUM_EVENTS)]
+
+
+def test_drop_mode_keeps_reading(fifo, tmp_path):
+    readout = pipeline(fifo, tmp_path, drop=True)
+    gate = gated(readout)
+    with readout:
+        until(lambda: readout.stats["buffers_read"] == NUM_EVENTS)
+        gate.set()
+    stats = readout.stats
+    assert stats["backpressure"] == 0
+    assert stats["dropped"] == NUM_EVENTS - 2
+    assert stats["dropped_bytes"] == (NUM_EVENTS - 2) * EVENT_SIZE
+    assert stats["buffers_written"] == 2
+    records = list(read_records(str(tmp_path / "run")))
+    # Sequence numbers count the dropped buffers as well
+    assert [(sequence, data) for sequence, _, data in records] == [
+        (1, event(0)),
+        (2, event(1)),
+    ]
@@ -0,0 +1,83 @@
+import threading
+import pytest
+from pyvme import V2718, handle_registry
+from pyvme.modules import V6533
+from pyvme.simulation import SimulatedCrate, SimulatedV6533
+
+
+def references(crate):
+    return sum(
+        count for key, count in handle_registry.open_handles.items() if key[0] is crate
+    )
+
+
+def test_controllers_share_handle():
+    crate = SimulatedCrate()
+    with V2718(backend=crate) as first, V2718(backend=crate) as second:
+        assert first.handle is second.handle
+        assert references(crate) == 2
+    assert references(crate) == 0
+    assert not crate._handles
+
+
+def test_module_closes_owned_controller():
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    with V6533(V2718(backend=crate), 0x100000, owns_controller=True) as hv:
+        assert hv.max_current == 3000
+        assert references(crate) == 1
+    assert references(crate) == 0
+
+
+def test_module_keeps_shared_controller_open():
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    with V2718(backend=crate) as controller:
+        with V6533(controller, 0x100000) as hv:
+            hv.max_current
+        assert references(crate) == 1
+        assert not controller.closed
+    assert references(crate) == 0
+
+
+def test_controller_released_while_registry_is_locked():
+    # A controller collected during an allocation under the registry lock
+    crate = SimulatedCrate()
+    controller = V2718(backend=crate)
+    with handle_registry._lock:
+        controller.close()
+    assert references(crate) == 0
+
+
+def test_lock_timeout_is_per_controller():
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    first = V2718(backend=crate, lock_timeout=5.0)
+    second = V2718(backend=crate, lock_timeout=0.01)
+    assert first.lock_timeout == 5.0
+    assert second.lock_timeout == 0.01
+    second.lock_timeout = 0.02
+    assert first.lock_timeout == 5.0
+
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with first._lock:
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    try:
+        with pytest.raises(TimeoutError):
+            second.read(0x100050)
+        assert second.busy
+    finally:
+        release.set()
+        thread.join()
+    assert second.read(0x100050) == 6000
+    assert first.lock_stats == second.lock_stats
+    first.close()
+    second.close()
@@ -0,0 +1,47 @@
+from pyvme import V2718, CrateScanner
+from pyvme.modules import V895, V2495, V6533
+from pyvme.simulation import (
+    SimulatedCrate,
+    SimulatedV2495,
+    SimulatedV6533,
+    SimulatedV895,
+)
+
+
+def test_cached_scan_depends_on_parameters(tmp_path):
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533(), slot=3)
+    crate.add_module(0x200000, SimulatedV895())
+    scanner = CrateScanner(V2718(backend=crate), cache_path=tmp_path / "scan.json")
+
+    (result,) = scanner.scan(slots=[3])
+    assert result.module_class is V6533 and result.slot == 3
+    calls = crate.calls
+    assert [result.slot for result in scanner.scan(slots=[3])] == [3]
+    assert crate.calls == calls
+
+    assert scanner.scan(slots=[4]) == []
+    assert crate.calls > calls
+    (result,) = scanner.scan(slots=[4], candidates=[(V895, 0x200000)])
+    assert result.module_class is V895 and result.address == 0x200000
+
+    calls = crate.calls
+    other = CrateScanner(
+        scanner.controller, classes=[V895], cache_path=tmp_path / "scan.json"
+    )
+    other.scan(slots=[4], candidates=[(V895, 0x200000)])
+    assert crate.calls > calls
+
+
+def test_probe_reads_the_probe_register():
+    crate = SimulatedCrate()
+    crate.add_module(0x32100000, SimulatedV2495())
+    # Offsets outside the main FPGA registers depend on the user firmware
+    crate.bus_errors.add(0x32100000)
+    scanner = CrateScanner(V2718(backend=crate))
+
+    (result,) = scanner.probe([(V2495, 0x32100000)])
+    assert result.module_class is V2495 and result.address == 0x32100000
+
+    crate.bus_errors.add(0x32100000 + V2495.PROBE_REGISTER)
+    assert scanner.probe([(V2495, 0x32100000)]) == []
@@ -0,0 +1,83 @@
+import threading
+import pytest
+from pyvme import LinkScheduler, Priority, V2718
+from pyvme.simulation import SimulatedCrate, SimulatedModule, SimulatedV6533
+
+
+@pytest.fixture
+def controller():
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    crate.add_module(0x200000, SimulatedModule())
+    return V2718(backend=crate)
+
+
+def blocked(scheduler):
+    """ Occupy the scheduler thread until the returned event is set """
+    started = threading.Event()
+    release = threading.Event()
+    scheduler.submit(lambda: (started.set(), release.wait()))
+    started.wait()
+    return release
+
+
+def test_higher_priority_is_served_first(controller):
+    order = []
+    with LinkScheduler(controller) as scheduler:
+        release = blocked(scheduler)
+        for priority in (Priority.BULK, Priority.NORMAL, Priority.CRITICAL):
+            scheduler.submit(order.append, priority, priority=priority)
+        release.set()
+    assert order == [Priority.CRITICAL, Priority.NORMAL, Priority.BULK]
+
+
+def test_clients_are_served_round_robin(controller):
+    order = []
+    with LinkScheduler(controller) as scheduler:
+        release = blocked(scheduler)
+        for client in ("a", "a", "a", "b", "b"):
+            scheduler.submit(order.append, client, client=client)
+        release.set()
+    assert order == ["a", "b", "a", "b", "a"]
+
+
+def test_single_cycles_are_coalesced(controller):
+    with LinkScheduler(controller) as scheduler:
+        release = blocked(scheduler)
+        futures = [scheduler.read(0x100050) for _ in range(10)]
+        release.set()
+        assert [future.result(timeout=2) for future in futures] == [6000] * 10
+    assert scheduler.driver_calls == 2
+    assert scheduler.stats["NORMAL"]["requests"] == 11
+    assert scheduler.stats["NORMAL"]["depth_max"] == 10
+
+
+def test_block_transfer_is_preempted_between_chunks(controller):
+    controller.write(0x200000, 0x1234)
+    operations = []
+    critical = []
+
+    def hook(operation, args, code, start, end):
+        operations.append(operation)
+        if not critical:
+            critical.append(scheduler.read(0x100050, priority=Priority.CRITICAL))
+
+    buffer = bytearray(0x400)
+    with LinkScheduler(controller, chunk_size=0x100) as scheduler:
+        release = blocked(scheduler)
+        transfer = scheduler.blt_read(0x200000, buffer)
+        controller.add_hook(hook)
+        release.set()
+        assert transfer.result(timeout=2) == 0x400
+        assert critical[0].result(timeout=2) == 6000
+    controller.remove_hook(hook)
+    assert operations == ["BLTReadCycle", "MultiRead"] + ["BLTReadCycle"] * 3
+    assert scheduler.chunks == 4
+    assert buffer[:4] == (0x1234).to_bytes(4, "little")
+
+
+def test_requests_after_stop_fail(controller):
+    scheduler = LinkScheduler(controller)
+    scheduler.stop()
+    with pytest.raises(RuntimeError, match="stopped"):
+        scheduler.read(0x100050)
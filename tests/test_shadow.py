@@ -0,0 +1,82 @@
+import pytest
+from pyvme import V2718
+from pyvme.exceptions import BatchError, BusError
+from pyvme.modules import V895
+from pyvme.simulation import SimulatedCrate, SimulatedV895
+
+CONFIG = {
+    "thresholds": [10, 20],
+    "output_width": [100, 200],
+    "majority_threshold": 2,
+    "inhibit_pattern": 0xFFFF,
+}
+REGISTERS = {0x00: 10, 0x02: 20, 0x40: 100, 0x42: 200, 0x48: 18, 0x4A: 0xFFFF}
+
+
+@pytest.fixture
+def crate():
+    crate = SimulatedCrate()
+    crate.add_module(0x200000, SimulatedV895())
+    return crate
+
+
+@pytest.fixture
+def discriminator(crate):
+    return V895(V2718(backend=crate), 0x200000)
+
+
+def registers(crate):
+    return {offset: crate.modules[0][2].registers[offset] for offset in REGISTERS}
+
+
+def test_apply_skips_unchanged_registers(discriminator, crate):
+    assert discriminator.apply(CONFIG) == REGISTERS
+    assert registers(crate) == REGISTERS
+    assert discriminator.shadow == REGISTERS
+    calls = crate.calls
+    assert discriminator.apply(CONFIG) == {}
+    assert crate.calls == calls
+    assert discriminator.apply({"thresholds": {1: 30}}) == {0x02: 30}
+
+
+def test_single_writes_update_shadow(discriminator):
+    discriminator.set_threshold(3, 40)
+    assert discriminator.apply({"thresholds": {3: 40}}) == {}
+
+
+def test_resync_writes_everything(discriminator, crate):
+    discriminator.apply(CONFIG)
+    # Power cycle of the module
+    crate.modules[0][2].reset()
+    assert discriminator.apply(CONFIG, resync=True) == REGISTERS
+    assert registers(crate) == REGISTERS
+
+
+def test_reset_system_clears_shadow(discriminator):
+    discriminator.apply(CONFIG)
+    discriminator.controller.reset_system()
+    assert discriminator.apply(CONFIG) == REGISTERS
+
+
+def test_failed_writes_are_reported_and_retried(discriminator, crate):
+    crate.bus_errors.add(0x200048)
+    with pytest.raises(BatchError) as error:
+        discriminator.apply(CONFIG)
+    assert list(error.value.errors) == [0x48]
+    assert isinstance(error.value.errors[0x48], BusError)
+    written = {offset: value for offset, value in REGISTERS.items() if offset != 0x48}
+    assert error.value.results == written
+    assert discriminator.shadow == written
+
+    crate.bus_errors.clear()
+    assert discriminator.apply(CONFIG) == {0x48: 18}
+    assert discriminator.shadow == REGISTERS
+
+
+def test_write_many_records_successful_writes(discriminator, crate):
+    crate.bus_errors.add(0x200002)
+    errors = discriminator.write_many([0x00, 0x02], [5, 6])
+    assert errors[0] == 0 and errors[1] != 0
+    assert discriminator.shadow == {0x00: 5}
+    discriminator.clear_shadow()
+    assert discriminator.shadow == {}
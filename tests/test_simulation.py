@@ -0,0 +1,145 @@
+import pytest
+from pyvme import V2718, AddressModifier, DataWidth
+from pyvme.exceptions import BusError
+from pyvme.simulation import SimulatedCrate, SimulatedModule, SimulatedV6533
+
+A32_DATA = AddressModifier.A32_NON_PRIVILEGED_DATA
+A32_BLOCK = AddressModifier.A32_NON_PRIVILEGED_BLOCK
+A32_BLOCK_64 = AddressModifier.A32_NON_PRIVILEGED_BLOCK_64
+
+
+class Memory(SimulatedModule):
+    SPACE = "A32"
+    FIFOS = (0x8000,)
+
+
+@pytest.fixture
+def crate():
+    return SimulatedCrate()
+
+
+@pytest.fixture
+def memory(crate):
+    return crate.add_module(0x10000000, Memory())
+
+
+@pytest.fixture
+def controller(crate, memory):
+    return V2718(backend=crate)
+
+
+def test_read_write(controller, memory):
+    controller.write(0x10000010, 0xDEADBEEF, DataWidth.D32, A32_DATA)
+    assert memory.registers[0x10] == 0xDEADBEEF
+    assert controller.read(0x10000010, DataWidth.D32, A32_DATA) == 0xDEADBEEF
+    assert controller.read(0x10000010, DataWidth.D16, A32_DATA) == 0xBEEF
+
+
+def test_unmapped_address_is_bus_error(controller):
+    with pytest.raises(BusError):
+        controller.read(0x20000000, DataWidth.D32, A32_DATA)
+    with pytest.raises(BusError):
+        controller.read(0x10000010, DataWidth.D16)
+
+
+def test_registers_defaults(crate):
+    hv = crate.add_module(0x100000, SimulatedV6533())
+    controller = V2718(backend=crate)
+    assert controller.read(0x100050) == 6000
+    controller.write(0x100050, 1)
+    hv.reset()
+    assert controller.read(0x100050) == 6000
+
+
+def test_blt_read_write(controller, memory):
+    data = bytes(range(64))
+    assert controller.blt_write(0x10000100, data, modifier=A32_BLOCK) == 64
+    assert memory.registers[0x100] == int.from_bytes(data[:4], "little")
+    buffer = bytearray(64)
+    assert controller.blt_read(0x10000100, buffer, modifier=A32_BLOCK) == 64
+    assert buffer == data
+
+
+def test_mblt_uses_64_bit_words(crate, controller, memory):
+    for i in range(8):
+        memory.registers[0x200 + 4 * i] = i
+    buffer = bytearray(36)
+    calls = crate.calls
+    cycles = crate.cycles
+    count = controller.mblt_read(0x10000200, buffer, modifier=A32_BLOCK_64)
+    # Only complete 64-bit words are transferred
+    assert count == 32
+    assert crate.calls - calls == 1
+    assert crate.cycles - cycles == 4
+    assert [int.from_bytes(buffer[i : i + 4], "little") for i in range(0, 32, 4)] == [
+        0,
+        1,
+        2,
+        3,
+        4,
+        5,
+        6,
+        7,
+    ]
+    data = bytes(range(16))
+    assert controller.mblt_write(0x10000300, data, modifier=A32_BLOCK_64) == 16
+    assert memory.registers[0x304] == int.from_bytes(data[4:8], "little")
+
+
+def test_block_read_ends_at_bus_error(crate, controller):
+    crate.bus_errors.add(0x10000010)
+    buffer = bytearray(64)
+    with pytest.raises(BusError):
+        controller.blt_read(0x10000000, buffer, modifier=A32_BLOCK)
+    assert (
+        controller.blt_read(0x10000000, buffer, modifier=A32_BLOCK, partial=True) == 16
+    )
+    assert (
+        controller.mblt_read(0x10000000, buffer, modifier=A32_BLOCK_64, partial=True)
+        == 16
+    )
+
+
+def test_fifo_mblt_read(controller, memory):
+    memory.push_fifo(0x8000, range(5))
+    buffer = bytearray(64)
+    # The odd last word does not complete a 64-bit transfer
+    assert controller.fifo_mblt_read(0x10008000, buffer, modifier=A32_BLOCK_64) == 16
+    assert [int.from_bytes(buffer[i : i + 4], "little") for i in range(0, 16, 4)] == [
+        0,
+        1,
+        2,
+        3,
+    ]
+
+
+def test_multi_read_errors(crate, controller, memory):
+    memory.registers[0x0] = 7
+    crate.bus_errors.add(0x10000004)
+    data, errors = controller.read_many(
+        [0x10000000, 0x10000004], DataWidth.D32, A32_DATA
+    )
+    assert data[0] == 7
+    assert errors[0] == 0
+    assert errors[1] != 0
+
+
+def test_bus_error_injection_rate(crate, controller):
+    crate.bus_error_rate = 0.5
+    failures = 0
+    for _ in range(200):
+        try:
+            controller.read(0x10000000, DataWidth.D32, A32_DATA)
+        except BusError:
+            failures += 1
+    assert 50 < failures < 150
+    crate.bus_error_rate = 0.0
+    controller.read(0x10000000, DataWidth.D32, A32_DATA)
+
+
+def test_latency_accounting():
+    crate = SimulatedCrate(call_latency=1e-4, cycle_latency=1e-5)
+    crate.add_module(0x10000000, Memory())
+    controller = V2718(backend=crate)
+    controller.blt_read(0x10000000, bytearray(64), modifier=A32_BLOCK)
+    assert crate.bus_time == pytest.approx(1e-4 + 16 * 1e-5)
@@ -0,0 +1,15 @@
+from pyvme import V2718, DataWidth
+from pyvme.simulation import SimulatedCrate, SimulatedV6533
+
+
+def test_disable_trace_removes_hook(tmp_path):
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    controller = V2718(backend=crate)
+    trace = controller.enable_trace(str(tmp_path / "trace.bin"), capacity=16)
+    assert controller.hooks == (trace.hook,)
+    assert controller.read(0x100050, DataWidth.D16) == 6000
+    controller.disable_trace()
+    assert controller.hooks == ()
+    assert controller.backend is crate
+    assert controller.trace is None
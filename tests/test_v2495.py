@@ -0,0 +1,113 @@
+import time
+import pytest
+from pyvme import V2718
+from pyvme.exceptions import BatchError, BusError
+from pyvme.modules import V2495
+from pyvme.simulation import SimulatedCrate, SimulatedV2495
+
+BASE = 0x32100000
+
+
+@pytest.fixture
+def crate():
+    crate = SimulatedCrate()
+    crate.add_module(BASE, SimulatedV2495())
+    return crate
+
+
+@pytest.fixture
+def plu(crate):
+    return V2495(V2718(backend=crate), BASE)
+
+
+def registers(crate):
+    return crate.modules[0][2].registers
+
+
+def test_main_fpga_registers(plu):
+    assert plu.firmware_release == (1, 3)
+    assert plu.board_version == 1
+    assert plu.serial_number == 0x012C
+    assert plu.geo_address == 5
+    plu.interrupt_level = 3
+    assert plu.interrupt_level == 3
+    with pytest.raises(ValueError):
+        plu.interrupt_level = 8
+
+
+def test_user_window(plu, crate):
+    plu.user_write(0x10, 0xDEADBEEF)
+    assert registers(crate)[0x1010] == 0xDEADBEEF
+    assert plu.user_read(0x10) == 0xDEADBEEF
+    with pytest.raises(ValueError, match="user FPGA window"):
+        plu.user_read(0x7000)
+
+
+def test_gates_are_rounded_to_steps(plu, crate):
+    plu.set_gate(3, 104, 57)
+    assert registers(crate)[V2495.GATE_DELAY + 0x0C] == 10
+    assert registers(crate)[V2495.GATE_WIDTH + 0x0C] == 6
+    assert plu.gate(3) == (100, 60)
+    for channel, delay, width in ((32, 0, 0), (0, -10, 10), (0, 0, 655360)):
+        with pytest.raises(ValueError):
+            plu.set_gate(channel, delay, width)
+
+
+def test_set_gate_raises_on_bus_error(plu, crate):
+    crate.bus_errors.add(BASE + V2495.GATE_WIDTH)
+    with pytest.raises(BatchError) as info:
+        plu.set_gate(0, 100, 50)
+    assert list(info.value.errors) == [V2495.GATE_WIDTH]
+    assert isinstance(info.value.errors[V2495.GATE_WIDTH], BusError)
+    assert registers(crate)[V2495.GATE_DELAY] == 10
+
+
+def test_set_gates_only_writes_changes(plu, crate):
+    gates = [(100, 50), (200, 60)]
+    assert plu.set_gates(gates) == {
+        V2495.GATE_DELAY: 10,
+        V2495.GATE_WIDTH: 5,
+        V2495.GATE_DELAY + 0x04: 20,
+        V2495.GATE_WIDTH + 0x04: 6,
+    }
+    calls = crate.calls
+    assert plu.set_gates(gates) == {}
+    assert crate.calls == calls
+    assert plu.set_gates({1: (200, 80)}) == {V2495.GATE_WIDTH + 0x04: 8}
+    plu.reset()
+    assert len(plu.set_gates(gates)) == 4
+
+
+def test_scalers_are_latched_together(plu):
+    np = pytest.importorskip("numpy")
+    plu.reset_scalers()
+    plu.enable_scalers()
+    time.sleep(0.02)
+    plu.disable_scalers()
+    timestamp, counts = plu.read_scalers()
+    assert timestamp == pytest.approx(time.time(), abs=1)
+    assert counts.dtype == np.uint32 and counts.shape == (V2495.NUM_SCALERS,)
+    assert counts[0] >= 20
+    # Rates of 1 kHz times the scaler number, counted over the same time
+    for scaler, count in enumerate(counts):
+        assert abs(int(count) - (scaler + 1) * int(counts[0])) <= scaler + 1
+    plu.reset_scalers()
+    assert plu.read_scalers(latch=False)[1].tolist() == counts.tolist()
+    assert not plu.read_scalers()[1].any()
+
+
+def test_sample_scalers(plu):
+    np = pytest.importorskip("numpy")
+    plu.enable_scalers()
+    timestamps, counts = plu.sample_scalers(3, period=0.01)
+    assert timestamps.shape == (3,) and counts.shape == (3, V2495.NUM_SCALERS)
+    assert np.all(np.diff(timestamps) > 0)
+    assert np.all(np.diff(counts.astype(np.int64), axis=0) > 0)
+
+
+def test_read_fifo(plu, crate):
+    crate.modules[0][2].push_fifo(V2495.FIFO, range(1, 9))
+    buffer = bytearray(64)
+    assert plu.read_fifo(buffer) == 32
+    assert buffer[:32] == b"".join(i.to_bytes(4, "little") for i in range(1, 9))
+    assert plu.read_fifo(buffer) == 0
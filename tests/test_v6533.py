@@ -0,0 +1,77 @@
+import pytest
+from pyvme import V2718
+from pyvme.modules import V6533
+from pyvme.modules._V6533 import V6533ChannelStatus
+from pyvme.simulation import SimulatedCrate, SimulatedV6533
+
+np = pytest.importorskip("numpy")
+
+PROPERTIES = [
+    "voltage",
+    "current_limit",
+    "measured_voltage",
+    "enabled",
+    "trip_time",
+    "voltage_limit",
+    "ramp_down_rate",
+    "ramp_up_rate",
+    "power_down_mode",
+    "polarity",
+    "temperature",
+    "imon_range",
+]
+
+
+@pytest.fixture
+def crate():
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    return crate
+
+
+@pytest.fixture
+def hv(crate):
+    hv = V6533(V2718(backend=crate), 0x100000)
+    hv.channels[1].voltage = 1500
+    hv.channels[1].enabled = True
+    hv.channels[2].current_limit = 2.5
+    hv.channels[3].imon_range = True
+    return hv
+
+
+def test_snapshot_is_one_driver_call(hv, crate):
+    calls = crate.calls
+    snapshot = hv.snapshot()
+    assert crate.calls == calls + 1
+    assert len(snapshot) == hv.NUM_CHANNELS
+
+
+def test_snapshot_matches_channel_properties(hv):
+    snapshot = hv.snapshot()
+    for channel in range(hv.NUM_CHANNELS):
+        values = snapshot.channel(channel)
+        for name in PROPERTIES:
+            expected = getattr(hv.channels[channel], name)
+            assert values[name] == pytest.approx(expected), (channel, name)
+        assert snapshot.statuses[channel] is hv.channels[channel].status
+
+
+def test_snapshot_columns(hv):
+    snapshot = hv.snapshot()
+    assert snapshot.voltage.dtype == np.float64
+    assert snapshot.enabled.dtype == np.bool_
+    assert snapshot.voltage[1] == pytest.approx(1500)
+    assert snapshot.measured_voltage[1] == pytest.approx(1500)
+    assert snapshot.enabled.tolist() == [False, True, False, False, False, False]
+    assert snapshot.statuses[1] is V6533ChannelStatus.ON
+    assert snapshot.statuses[0] is V6533ChannelStatus.DISABLED
+    # The measured current is taken from the range selected by imon_range
+    assert snapshot.imon_range.tolist() == [False, False, False, True, False, False]
+    np.testing.assert_array_equal(
+        snapshot.measured_current,
+        np.where(
+            snapshot.imon_range,
+            snapshot.measured_current_low,
+            snapshot.measured_current_high,
+        ),
+    )
@@ -0,0 +1,45 @@
+import threading
+import pytest
+from pyvme import V2718
+from pyvme._worker import LinkWorker
+from pyvme.simulation import SimulatedCrate, SimulatedV6533
+
+
+@pytest.fixture
+def controller():
+    crate = SimulatedCrate()
+    crate.add_module(0x100000, SimulatedV6533())
+    return V2718(backend=crate)
+
+
+def test_reads_are_coalesced(controller):
+    worker = LinkWorker(controller)
+    started = threading.Event()
+    release = threading.Event()
+    worker.submit(lambda: (started.set(), release.wait()))
+    started.wait()
+    futures = [worker.read(0x100050) for _ in range(10)]
+    release.set()
+    assert [future.result(timeout=2) for future in futures] == [6000] * 10
+    worker.stop()
+    assert worker.driver_calls == 2
+
+
+def test_queued_operations_run_before_stop(controller):
+    worker = LinkWorker(controller)
+    futures = [worker.read(0x100050) for _ in range(5)]
+    worker.stop()
+    assert [future.result(timeout=0) for future in futures] == [6000] * 5
+
+
+def test_operations_after_stop_fail(controller):
+    worker = LinkWorker(controller)
+    worker.stop()
+    for future in (
+        worker.read(0x100050),
+        worker.write(0x100080, 1),
+        worker.submit(lambda: None),
+    ):
+        with pytest.raises(RuntimeError, match="worker stopped"):
+            future.result(timeout=1)
+    worker.stop()